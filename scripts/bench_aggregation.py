@@ -0,0 +1,65 @@
+"""Benchmark the pure-Python and NumPy grouping of auctions."""
+
+import sys
+import time
+from pathlib import Path
+
+l_script_dir = Path(__file__).parent
+l_project_root = l_script_dir.parent
+sys.path.insert(0, str(l_project_root / 'src'))
+
+from converters import numpy_aggregation
+from converters.ahscanner_converter import AHScannerConverter
+from converters.lua_table_parser import LuaTableParser
+
+
+def read_realms(p_file_path: Path):
+    """[(realm, [(item name, [auction])])] read once, so that only aggregation is timed."""
+    l_converter = AHScannerConverter(p_file_path, False)
+    with LuaTableParser(p_file_path) as l_parser:
+        l_parser.open_global(l_converter.m_global_var)
+        return [(c_realm, [(c_item_name, list(c_auctions)) for c_item_name, c_auctions in c_items])
+                for c_realm, c_items in l_converter._iter_parsed_realms(l_parser)]
+
+
+def time_aggregation(p_file_path: Path, p_realms, p_use_numpy: bool):
+    """Return (seconds, aggregated data)."""
+    l_converter = AHScannerConverter(p_file_path, p_use_numpy)
+    l_start = time.perf_counter()
+    l_data = l_converter._aggregate_realms(
+        (c_realm, ((c_item_name, iter(c_auctions)) for c_item_name, c_auctions in c_items))
+        for c_realm, c_items in p_realms)
+    return time.perf_counter() - l_start, l_data
+
+
+def bench(p_dailies_dir: Path, p_scale: int) -> int:
+    """Aggregate every snapshot, its auctions repeated p_scale times, both ways."""
+    if not numpy_aggregation.is_available():
+        print("***", "NumPy is not installed", file=sys.stderr)
+        return 1
+    l_files = sorted(p_dailies_dir.glob('*/AHScanner.lua'))
+    l_totals = [0, 0.0, 0.0]
+    l_mismatches = 0
+    print(f"{'snapshot':<22} {'auctions':>9} {'python':>8} {'numpy':>8}")
+    for c_file in l_files:
+        l_realms = [(c_realm, [(c_name, c_auctions * p_scale) for c_name, c_auctions in c_items])
+                    for c_realm, c_items in read_realms(c_file)]
+        l_auctions = sum(len(c_auctions) for _, c_items in l_realms for _, c_auctions in c_items)
+        l_python_time, l_python_data = time_aggregation(c_file, l_realms, False)
+        l_numpy_time, l_numpy_data = time_aggregation(c_file, l_realms, True)
+        l_match = l_python_data == l_numpy_data
+        l_mismatches += not l_match
+        l_totals = [l_totals[0] + l_auctions, l_totals[1] + l_python_time, l_totals[2] + l_numpy_time]
+        print(f"{c_file.parent.name:<22} {l_auctions:>9} {l_python_time:>8.3f} {l_numpy_time:>8.3f}"
+              f"{'' if l_match else '  MISMATCH'}")
+    print(f"{'total':<22} {l_totals[0]:>9} {l_totals[1]:>8.3f} {l_totals[2]:>8.3f}")
+    if l_mismatches:
+        print("***", f"{l_mismatches} snapshot(s) differ between Python and NumPy", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    l_dailies_dir = Path(sys.argv[1]) if len(sys.argv) > 1 else l_project_root / 'dailies'
+    l_scale = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+    sys.exit(bench(l_dailies_dir, l_scale))
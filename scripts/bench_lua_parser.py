@@ -0,0 +1,83 @@
+"""Benchmark the native AHScanner.lua parser against the lupa runtime."""
+
+import sys
+import time
+from pathlib import Path
+
+l_script_dir = Path(__file__).parent
+l_project_root = l_script_dir.parent
+sys.path.insert(0, str(l_project_root / 'src'))
+
+from converters.ahscanner_converter import AHScannerConverter
+from converters.lua_table_parser import LuaTableParser
+from converters.lua_to_yaml import LuaToYamlConverter
+
+
+def time_parse(p_file_path: Path, p_use_lupa: bool) -> float:
+    """Return seconds spent reading every auction record, no aggregation."""
+    l_converter = AHScannerConverter(p_file_path)
+    l_start = time.perf_counter()
+    if p_use_lupa:
+        LuaToYamlConverter.load(l_converter)
+        l_realms = l_converter._iter_loaded_realms()
+        for _, c_items in l_realms:
+            for _, c_auctions in c_items:
+                for _ in c_auctions:
+                    pass
+    else:
+        with LuaTableParser(p_file_path) as l_parser:
+            l_parser.open_global(l_converter.m_global_var)
+            for _, c_items in l_converter._iter_parsed_realms(l_parser):
+                for _, c_auctions in c_items:
+                    for _ in c_auctions:
+                        pass
+    return time.perf_counter() - l_start
+
+
+def time_load(p_file_path: Path, p_use_lupa: bool):
+    """Return (seconds, aggregated data) for one load of p_file_path."""
+    l_converter = AHScannerConverter(p_file_path)
+    l_start = time.perf_counter()
+    if p_use_lupa:
+        l_converter.load_with_lupa()
+    else:
+        l_converter.load()
+    return time.perf_counter() - l_start, l_converter.m_python_data
+
+
+def bench(p_dailies_dir: Path) -> int:
+    """Run both paths on every AHScanner.lua and compare their results."""
+    l_files = sorted(p_dailies_dir.glob('*/AHScanner.lua'))
+    if not l_files:
+        print("***", f"No AHScanner.lua found in {p_dailies_dir}", file=sys.stderr)
+        return 1
+
+    l_totals = [0.0] * 5
+    l_mismatches = 0
+    print(f"{'snapshot':<22} {'MB':>7} {'parse lupa':>11} {'parse native':>13} "
+          f"{'load lupa':>10} {'load native':>12}")
+    for c_file in l_files:
+        l_size = c_file.stat().st_size
+        l_lupa_parse = time_parse(c_file, True)
+        l_native_parse = time_parse(c_file, False)
+        l_lupa_time, l_lupa_data = time_load(c_file, True)
+        l_native_time, l_native_data = time_load(c_file, False)
+        l_match = l_lupa_data == l_native_data
+        if not l_match:
+            l_mismatches += 1
+        l_row = [l_size / 1e6, l_lupa_parse, l_native_parse, l_lupa_time, l_native_time]
+        l_totals = [c_total + c_value for c_total, c_value in zip(l_totals, l_row)]
+        print(f"{c_file.parent.name:<22} {l_row[0]:>7.2f} {l_row[1]:>11.3f} {l_row[2]:>13.3f} "
+              f"{l_row[3]:>10.3f} {l_row[4]:>12.3f}{'' if l_match else '  MISMATCH'}")
+
+    print(f"{'total':<22} {l_totals[0]:>7.2f} {l_totals[1]:>11.3f} {l_totals[2]:>13.3f} "
+          f"{l_totals[3]:>10.3f} {l_totals[4]:>12.3f}")
+    if l_mismatches:
+        print("***", f"{l_mismatches} file(s) differ between lupa and native parser", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    l_dailies_dir = Path(sys.argv[1]) if len(sys.argv) > 1 else l_project_root / 'dailies'
+    sys.exit(bench(l_dailies_dir))
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""Peak RSS of the in-memory and streaming conversions of AHScanner.lua, per file size and layout."""
+
+import resource
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import List
+
+l_script_dir = Path(__file__).parent
+l_project_root = l_script_dir.parent
+sys.path.insert(0, str(l_project_root / 'src'))
+
+from converters.ahscanner_converter import AHScannerConverter, SKIPPED_KEYS
+
+
+MODES = ('load', 'stream')
+
+
+LAYOUTS = ('realms', 'items')
+
+
+def write_scaled(p_source: Path, p_target: Path, p_scale: int, p_layout: str = 'realms') -> None:
+    """
+    Write p_source scaled p_scale times under numbered names: each realm
+    repeated with layout 'realms', each item repeated inside its realm
+    with layout 'items', which keeps a single realm as real dailies do.
+    """
+    l_lines = p_source.read_text(encoding='utf-8').splitlines(keepends=True)
+    l_head = []
+    l_realms = []
+    l_tail = []
+    l_current = None
+    for c_line in l_lines[1:-1]:
+        if l_current is None and c_line.startswith('\t["'):
+            l_current = [c_line]
+            continue
+        if l_current is not None:
+            l_current.append(c_line)
+            if c_line.startswith('\t}'):
+                l_name = l_current[0].split('"')[1]
+                (l_tail if l_name in SKIPPED_KEYS else l_realms).append(l_current)
+                l_current = None
+            continue
+        l_head.append(c_line)
+    with open(p_target, 'w', encoding='utf-8') as l_file:
+        l_file.write(l_lines[0])
+        l_file.writelines(l_head)
+        if p_layout == 'realms':
+            for c_copy in range(p_scale):
+                for c_realm in l_realms:
+                    l_file.write(_rename(c_realm[0], c_copy))
+                    l_file.writelines(c_realm[1:])
+        else:
+            for c_realm in l_realms:
+                l_file.write(c_realm[0])
+                l_items = _split_items(c_realm[1:-1])
+                for c_copy in range(p_scale):
+                    for c_item in l_items:
+                        l_file.write(_rename(c_item[0], c_copy))
+                        l_file.writelines(c_item[1:])
+                l_file.write(c_realm[-1])
+        for c_block in l_tail:
+            l_file.writelines(c_block)
+        l_file.write(l_lines[-1])
+
+
+def _split_items(p_lines: List[str]) -> List[List[str]]:
+    """Item blocks of the lines of one realm."""
+    l_items = []
+    for c_line in p_lines:
+        if c_line.startswith('\t\t["'):
+            l_items.append([])
+        l_items[-1].append(c_line)
+    return l_items
+
+
+def _rename(p_line: str, p_copy: int) -> str:
+    """'["name"] = {' line of copy p_copy, the first copy keeping its name."""
+    return p_line.replace('"]', f' #{p_copy}"]', 1) if p_copy else p_line
+
+
+def run_child(p_mode: str, p_source: Path, p_output: Path) -> None:
+    """Convert p_source one way, then print the peak RSS of this process in KiB."""
+    l_converter = AHScannerConverter(p_source)
+    if p_mode == 'load':
+        l_converter.load()
+        l_converter.save_yaml(p_output)
+    else:
+        l_converter.convert(p_output)
+    print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+
+
+def measure(p_mode: str, p_source: Path, p_output: Path) -> int:
+    l_output = subprocess.run([sys.executable, __file__, '--child', p_mode, str(p_source), str(p_output)],
+                              check=True, capture_output=True, text=True).stdout
+    return int(l_output.split()[-1])
+
+
+def bench(p_source: Path, p_scales) -> int:
+    print(f"{'layout':>7} {'scale':>6} {'size MiB':>9} " + " ".join(f"{c_mode + ' MiB':>11}" for c_mode in MODES))
+    with tempfile.TemporaryDirectory() as l_tmp_dir:
+        l_tmp = Path(l_tmp_dir)
+        for c_layout in LAYOUTS:
+            for c_scale in p_scales:
+                l_source = l_tmp / f"AHScanner_{c_layout}_{c_scale}.lua"
+                write_scaled(p_source, l_source, c_scale, c_layout)
+                l_peaks = []
+                l_outputs = []
+                for c_mode in MODES:
+                    l_output = l_tmp / f"{c_mode}_{c_layout}_{c_scale}.yaml"
+                    l_peaks.append(measure(c_mode, l_source, l_output))
+                    l_outputs.append(l_output.read_bytes())
+                l_size = l_source.stat().st_size / 1024 / 1024
+                print(f"{c_layout:>7} {c_scale:>6} {l_size:>9.1f} " + " ".join(f"{c_peak / 1024:>11.1f}" for c_peak in l_peaks))
+                if l_outputs[0] != l_outputs[1]:
+                    print("***", f"{c_layout} scale {c_scale}: outputs differ", file=sys.stderr)
+                    return 1
+                l_source.unlink()
+                for c_mode in MODES:
+                    (l_tmp / f"{c_mode}_{c_layout}_{c_scale}.yaml").unlink()
+    return 0
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 5 and sys.argv[1] == '--child':
+        run_child(sys.argv[2], Path(sys.argv[3]), Path(sys.argv[4]))
+        sys.exit(0)
+    if len(sys.argv) < 2:
+        print("Usage: python bench_memory.py <AHScanner.lua> [SCALE ...]")
+        sys.exit(1)
+    l_scales = [int(c_arg) for c_arg in sys.argv[2:]] or [1, 10, 50]
+    sys.exit(bench(Path(sys.argv[1]), l_scales))
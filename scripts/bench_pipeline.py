@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Run convert, update-item-db, obsidian and obsidian-auctions on synthetic
+dailies at several multiples of the current volume, and report per command
+and stage the time, throughput, latency per snapshot and peak RSS.
+
+With --baseline, exit with 1 when a command or stage got slower, or a
+command used more memory, than in the baseline by more than --tolerance.
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+l_script_dir = Path(__file__).parent
+l_project_root = l_script_dir.parent
+sys.path.insert(0, str(l_script_dir))
+
+import gen_synthetic_dailies
+
+
+MAIN = l_project_root / 'src' / 'main.py'
+COMMANDS = ('convert', 'update-item-db', 'obsidian', 'obsidian-auctions')
+# Counter whose rate is the throughput of each command
+THROUGHPUT_COUNTERS = {
+    'convert': 'auctions',
+    'update-item-db': 'items_ingested',
+    'obsidian': 'pages_written',
+    'obsidian-auctions': 'pages_written',
+}
+# Stages shorter than this in the baseline are too noisy to compare
+MIN_COMPARED_SECONDS = 0.2
+
+
+def run_command(p_work_dir: Path, p_command: str, p_jobs: int) -> Dict:
+    """Run one command of main.py in p_work_dir, return its metrics."""
+    l_metrics_file = p_work_dir / 'metrics' / f"{p_command}.json"
+    l_args = [sys.executable, str(MAIN), '--metrics-file', str(l_metrics_file), p_command]
+    if p_command == 'convert':
+        l_args += ['dailies', '--force']
+    elif p_command == 'update-item-db':
+        l_args += ['--rebuild']
+    l_args += ['--jobs', str(p_jobs)]
+    l_result = subprocess.run(l_args, cwd=p_work_dir, capture_output=True, text=True)
+    if l_result.returncode != 0:
+        raise ValueError(f"*** Error: {p_command} failed:\n{l_result.stderr[-2000:]}")
+    with open(l_metrics_file, encoding='utf-8') as l_file:
+        return json.load(l_file)
+
+
+def summarize(p_command: str, p_metrics: Dict, p_snapshots: int) -> Dict:
+    """Time, throughput, latency per snapshot and peak RSS of one command run."""
+    l_seconds = p_metrics["seconds"]
+    l_counter = THROUGHPUT_COUNTERS[p_command]
+    return {
+        "seconds": round(l_seconds, 3),
+        "peak_rss_mib": round(p_metrics["peak_rss_mib"], 1),
+        "throughput": round(p_metrics["counters"].get(l_counter, 0) / l_seconds, 1) if l_seconds else 0.0,
+        "throughput_unit": f"{l_counter}/s",
+        "latency_per_snapshot": round(l_seconds / p_snapshots, 4),
+        "stages": {c_name: {"seconds": round(c_stage["seconds"], 3), "calls": c_stage["calls"],
+                            "peak_rss_mib": round(c_stage["peak_rss_mib"], 1)}
+                   for c_name, c_stage in p_metrics["stages"].items()},
+    }
+
+
+def bench_scale(p_work_dir: Path, p_scale: int, p_args: argparse.Namespace) -> Dict:
+    """Generate the dailies of one scale and run every command on them."""
+    l_sizes = dict(gen_synthetic_dailies.DEFAULTS)
+    l_sizes[p_args.axis] *= p_scale
+    l_start = time.perf_counter()
+    l_auctions = gen_synthetic_dailies.generate(p_work_dir, l_sizes["realms"], l_sizes["items"], l_sizes["auctions"],
+                                                l_sizes["snapshots"], p_args.stack_sizes, p_args.turnover, p_args.seed)
+    l_lua_bytes = sum(c_path.stat().st_size for c_path in (p_work_dir / 'dailies').glob('*/*.lua'))
+    print(f"--- {p_scale}x: {l_sizes}, {l_auctions} auctions, {l_lua_bytes / 1024 / 1024:.1f} MiB of Lua "
+          f"generated in {time.perf_counter() - l_start:.1f}s")
+    l_results = {"sizes": l_sizes, "auctions": l_auctions, "lua_mib": round(l_lua_bytes / 1024 / 1024, 1), "commands": {}}
+    for c_command in COMMANDS:
+        l_summary = summarize(c_command, run_command(p_work_dir, c_command, p_args.jobs), l_sizes["snapshots"])
+        l_results["commands"][c_command] = l_summary
+        print(f"---   {c_command:<18} {l_summary['seconds']:9.2f}s {l_summary['throughput']:12.1f} "
+              f"{l_summary['throughput_unit']:<18} {l_summary['latency_per_snapshot']:8.3f}s/snapshot "
+              f"{l_summary['peak_rss_mib']:8.1f} MiB")
+    return l_results
+
+
+def compare(p_results: Dict, p_baseline: Dict, p_tolerance: float) -> List[str]:
+    """Regressions of p_results against p_baseline, as messages."""
+    l_regressions = []
+    for c_scale, c_scale_results in p_results["scales"].items():
+        l_base_scale = p_baseline["scales"].get(c_scale)
+        if l_base_scale is None or l_base_scale["sizes"] != c_scale_results["sizes"]:
+            print(f"=== Warning: no comparable baseline for scale {c_scale}")
+            continue
+        for c_command, c_summary in c_scale_results["commands"].items():
+            l_base = l_base_scale["commands"].get(c_command)
+            if l_base is None:
+                continue
+            l_checks = [(c_command, "seconds", c_summary["seconds"], l_base["seconds"]),
+                        (c_command, "peak_rss_mib", c_summary["peak_rss_mib"], l_base["peak_rss_mib"])]
+            for c_stage, c_base_stage in l_base["stages"].items():
+                if c_stage in c_summary["stages"] and c_base_stage["seconds"] >= MIN_COMPARED_SECONDS:
+                    l_checks.append((f"{c_command} {c_stage}", "seconds",
+                                     c_summary["stages"][c_stage]["seconds"], c_base_stage["seconds"]))
+            for c_name, c_measure, c_value, c_base_value in l_checks:
+                if c_value > c_base_value * (1 + p_tolerance):
+                    l_regressions.append(f"{c_scale}x {c_name} {c_measure}: {c_value} vs {c_base_value} "
+                                         f"(+{(c_value / c_base_value - 1) * 100:.0f}%)")
+    return l_regressions
+
+
+def main() -> int:
+    l_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    l_parser.add_argument('scales', nargs='*', type=int, default=[1, 10, 100], help="Multiples of the current volume")
+    l_parser.add_argument('--axis', choices=sorted(gen_synthetic_dailies.DEFAULTS), default='items',
+                          help="Size multiplied by the scale")
+    l_parser.add_argument('--stack-sizes', default=gen_synthetic_dailies.DEFAULT_STACK_SIZES)
+    l_parser.add_argument('--turnover', type=float, default=0.2)
+    l_parser.add_argument('--seed', type=int, default=0)
+    l_parser.add_argument('--jobs', '-j', type=int, default=1)
+    l_parser.add_argument('--output', type=Path, help="Write the results as JSON")
+    l_parser.add_argument('--baseline', type=Path, help="Fail on regressions against these results")
+    l_parser.add_argument('--tolerance', type=float, default=0.25, help="Allowed relative increase over the baseline")
+    l_parser.add_argument('--work-dir', type=Path, help="Keep the generated data there instead of a temporary directory")
+    l_args = l_parser.parse_args()
+
+    l_results = {"axis": l_args.axis, "seed": l_args.seed, "jobs": l_args.jobs, "scales": {}}
+    with tempfile.TemporaryDirectory() as l_tmp_dir:
+        l_root = l_args.work_dir or Path(l_tmp_dir)
+        for c_scale in l_args.scales:
+            l_work_dir = l_root / f"{l_args.axis}_{c_scale}x"
+            if l_work_dir.exists():
+                raise ValueError(f"*** Error: {l_work_dir} already exists")
+            l_results["scales"][str(c_scale)] = bench_scale(l_work_dir, c_scale, l_args)
+
+    if l_args.output:
+        with open(l_args.output, 'w', encoding='utf-8') as l_file:
+            json.dump(l_results, l_file, indent=2, sort_keys=True)
+            l_file.write('\n')
+        print(f"--- Results written to {l_args.output}")
+    if l_args.baseline:
+        with open(l_args.baseline, encoding='utf-8') as l_file:
+            l_regressions = compare(l_results, json.load(l_file), l_args.tolerance)
+        for c_regression in l_regressions:
+            print("***", f"Regression: {c_regression}", file=sys.stderr)
+        if l_regressions:
+            return 1
+        print(f"--- No regression against {l_args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
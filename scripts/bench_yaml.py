@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""Benchmark YAML load and save with the pure-Python and LibYAML implementations."""
+
+import sys
+import time
+from pathlib import Path
+
+import yaml
+
+l_script_dir = Path(__file__).parent
+l_project_root = l_script_dir.parent
+sys.path.insert(0, str(l_project_root / 'src'))
+
+import yaml_io
+
+
+def time_file(p_file: Path, p_loader, p_dumper):
+    """Return (load seconds, dump seconds, data, text) of p_file with one implementation."""
+    l_text = p_file.read_text(encoding='utf-8')
+    l_start = time.perf_counter()
+    l_data = yaml.load(l_text, Loader=p_loader)
+    l_loaded = time.perf_counter()
+    l_dumped = yaml.dump(l_data, Dumper=p_dumper, default_flow_style=False, allow_unicode=True)
+    return l_loaded - l_start, time.perf_counter() - l_loaded, l_data, l_dumped
+
+
+def bench(p_files) -> int:
+    if not yaml_io.has_libyaml():
+        print("***", "PyYAML is built without LibYAML", file=sys.stderr)
+        return 1
+    l_mismatches = 0
+    l_totals = [0.0] * 4
+    print(f"{'file':<40} {'load py':>8} {'load C':>8} {'save py':>8} {'save C':>8}")
+    for c_file in p_files:
+        l_python = time_file(c_file, yaml.SafeLoader, yaml.SafeDumper)
+        l_libyaml = time_file(c_file, yaml_io.LOADER, yaml_io.DUMPER)
+        l_match = l_python[2] == l_libyaml[2] and l_python[3] == l_libyaml[3]
+        l_mismatches += not l_match
+        l_times = [l_python[0], l_libyaml[0], l_python[1], l_libyaml[1]]
+        l_totals = [c_total + c_time for c_total, c_time in zip(l_totals, l_times)]
+        l_name = str(c_file.relative_to(c_file.parents[1]))
+        print(f"{l_name:<40} " + " ".join(f"{c_time:>8.3f}" for c_time in l_times)
+              + ('' if l_match else '  MISMATCH'))
+    print(f"{'total':<40} " + " ".join(f"{c_total:>8.3f}" for c_total in l_totals))
+    if l_mismatches:
+        print("***", f"{l_mismatches} file(s) differ between Python and LibYAML", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    l_datas_dir = Path(sys.argv[1]) if len(sys.argv) > 1 else l_project_root / 'datas'
+    l_gen_dailies_dir = Path(sys.argv[2]) if len(sys.argv) > 2 else l_project_root / 'gen_dailies'
+    l_files = sorted(l_datas_dir.glob('*.yaml')) + sorted(l_gen_dailies_dir.glob('*/*.yaml'))
+    sys.exit(bench(l_files))
@@ -0,0 +1,123 @@
+"""Check PriceHistogram against the statistics module and time both."""
+
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+l_script_dir = Path(__file__).parent
+l_project_root = l_script_dir.parent
+sys.path.insert(0, str(l_project_root / 'src'))
+
+from converters.histogram_stats import PriceHistogram
+from converters.lua_table_parser import LuaTableParser
+from converters.ahscanner_converter import AHScannerConverter
+
+
+FUNCTIONS = ("mean", "median", "harmonic_mean", "median_grouped", "median_high", "median_low", "mode",
+             "pstdev", "stdev", "pvariance", "variance")
+
+
+def get_expected(p_counts):
+    """Statistics of the expanded sorted price list, errors included."""
+    l_prices = sorted(c_price for c_price, c_count in p_counts.items() for _ in range(c_count))
+    l_result = {}
+    for c_name in FUNCTIONS:
+        l_result[c_name] = call(getattr(statistics, c_name), l_prices)
+    for c_n in (4, 10):
+        l_result[f"quantiles{c_n}"] = call(lambda c_prices: statistics.quantiles(c_prices, n=c_n), l_prices)
+    return l_result
+
+
+def get_actual(p_counts):
+    l_histogram = PriceHistogram(p_counts)
+    l_result = {}
+    for c_name in FUNCTIONS:
+        l_result[c_name] = call(getattr(l_histogram, c_name))
+    for c_n in (4, 10):
+        l_result[f"quantiles{c_n}"] = call(lambda: l_histogram.quantiles(n=c_n))
+    return l_result
+
+
+def call(p_function, *p_args):
+    """(type, value) or (exception type, message), so that 1 and 1.0 differ."""
+    try:
+        l_value = p_function(*p_args)
+    except Exception as l_error:
+        return type(l_error), str(l_error)
+    if isinstance(l_value, list):
+        return [(type(c), c) for c in l_value]
+    return type(l_value), l_value
+
+
+def iter_random_histograms(p_count: int):
+    l_random = random.Random(42)
+    for c_index in range(p_count):
+        l_size = l_random.choice((1, 2, 3, 5, 20, 200))
+        l_high = l_random.choice((2, 50, 10 ** 4, 10 ** 9))
+        l_float = c_index % 7 == 0
+        l_counts = {}
+        for _ in range(l_size):
+            l_price = l_random.randint(0 if c_index % 11 == 0 else 1, l_high)
+            if l_float:
+                l_price = l_price / l_random.choice((3, 4, 10))
+            l_counts[l_price] = l_random.choice((1, 1, 2, 5, 20, 200))
+        yield l_counts
+
+
+def iter_dailies_histograms(p_dailies_dir: Path):
+    """Price histograms of every item and auction type of the dailies."""
+    for c_file in sorted(p_dailies_dir.glob('*/AHScanner.lua')):
+        l_converter = AHScannerConverter(c_file)
+        with LuaTableParser(c_file) as l_parser:
+            l_parser.open_global(l_converter.m_global_var)
+            for _, c_items in l_converter._iter_parsed_realms(l_parser):
+                for _, c_auctions in c_items:
+                    l_counts = {"buyout": {}, "minBid": {}}
+                    for c_auction in c_auctions:
+                        l_type = "buyout" if c_auction["buyoutUnit"] else "minBid"
+                        l_price = c_auction["buyoutUnit"] or c_auction["minBidUnit"]
+                        l_type_counts = l_counts[l_type]
+                        l_type_counts[l_price] = l_type_counts.get(l_price, 0) + c_auction.get("count", 0)
+                    for c_type_counts in l_counts.values():
+                        l_type_counts = {c_price: c_count for c_price, c_count in c_type_counts.items() if c_count}
+                        if l_type_counts:
+                            yield l_type_counts
+
+
+def check(p_dailies_dir: Path) -> int:
+    l_histograms = list(iter_random_histograms(2000))
+    l_random_count = len(l_histograms)
+    if p_dailies_dir.is_dir():
+        l_histograms += list(iter_dailies_histograms(p_dailies_dir))
+
+    l_mismatches = 0
+    for c_counts in l_histograms:
+        l_expected = get_expected(c_counts)
+        l_actual = get_actual(c_counts)
+        if l_expected != l_actual:
+            l_mismatches += 1
+            if l_mismatches <= 5:
+                l_diff = {c_key: (l_expected[c_key], l_actual[c_key])
+                          for c_key in l_expected if l_expected[c_key] != l_actual[c_key]}
+                print("***", f"Mismatch for {c_counts}: {l_diff}", file=sys.stderr)
+    print(f"--- {len(l_histograms)} histogram(s) checked "
+          f"({l_random_count} random, {len(l_histograms) - l_random_count} from dailies), "
+          f"{l_mismatches} mismatch(es)")
+
+    l_start = time.perf_counter()
+    for c_counts in l_histograms:
+        get_expected(c_counts)
+    l_expected_time = time.perf_counter() - l_start
+    l_start = time.perf_counter()
+    for c_counts in l_histograms:
+        get_actual(c_counts)
+    l_actual_time = time.perf_counter() - l_start
+    print(f"--- statistics on expanded lists: {l_expected_time:.3f}s, PriceHistogram: {l_actual_time:.3f}s")
+    return 1 if l_mismatches else 0
+
+
+if __name__ == '__main__':
+    l_dailies_dir = Path(sys.argv[1]) if len(sys.argv) > 1 else l_project_root / 'dailies'
+    sys.exit(check(l_dailies_dir))
@@ -1,26 +1,46 @@
 
 # NOT REVIEWED, FULL CURSOR
 
-"""Count outliers for each timestamp in auctions.yaml."""
+"""Count outliers for each timestamp of the auction database, optionally for one item."""
 
 import sys
+from itertools import chain, groupby
+from operator import itemgetter
 from pathlib import Path
-
-import yaml
-
-
-def count_outliers(p_auctions_file: Path) -> None:
-    """Count outliers below Q1 - 1.5*IQR and above Q3 + 1.5*IQR."""
-    with open(p_auctions_file, 'r', encoding='utf-8') as l_file:
-        l_data = yaml.safe_load(l_file) or {}
-
-    if not l_data:
-        print("***", "No data found in auctions.yaml", file=sys.stderr)
+from typing import Dict, Iterator, Optional, Tuple
+
+l_script_dir = Path(__file__).parent
+l_project_root = l_script_dir.parent
+sys.path.insert(0, str(l_project_root / 'src'))
+
+from auction_database import AuctionDatabase
+from storage.storage_factory import create_storage
+
+
+def iter_snapshots(p_database: AuctionDatabase, p_item_id: Optional[str]) -> Iterator[Tuple[str, str, Dict]]:
+    """(realm, timestamp, {item_id: item data}) of every snapshot, for all items or p_item_id."""
+    if p_item_id is not None:
+        for c_realm, c_timestamps in p_database.get_item_history(p_item_id).items():
+            for c_timestamp, c_item_data in c_timestamps.items():
+                yield c_realm, c_timestamp, {p_item_id: c_item_data}
+        return
+    for c_realm, c_timestamp in p_database.get_snapshot_keys():
+        yield c_realm, c_timestamp, p_database.get_snapshot(c_realm, c_timestamp)
+
+
+def count_outliers(p_auctions_file: Path, p_item_id: Optional[str] = None) -> None:
+    """Count outliers below Q1 - 1.5*IQR and above Q3 + 1.5*IQR, for all items or p_item_id."""
+    # An SQLite database is queried one snapshot or item at a time instead of being loaded
+    l_database = AuctionDatabase(p_auctions_file, p_lazy=True)
+    l_snapshots = iter_snapshots(l_database, p_item_id)
+    l_first = next(l_snapshots, None)
+    if l_first is None:
+        print("***", f"No data found in {p_auctions_file}", file=sys.stderr)
         sys.exit(1)
 
-    for c_realm, c_timestamps in l_data.items():
+    for c_realm, c_realm_snapshots in groupby(chain([l_first], l_snapshots), key=itemgetter(0)):
         print(f"\n=== {c_realm} ===")
-        for c_timestamp, c_items in c_timestamps.items():
+        for _, c_timestamp, c_items in c_realm_snapshots:
             l_total_lower_outliers = 0
             l_total_upper_outliers = 0
             l_total_items = 0
@@ -86,16 +106,19 @@ def count_outliers(p_auctions_file: Path) -> None:
                     print(f"    Item {c_item['id']}: "
                           f"lower={c_item['lower']}, "
                           f"upper={c_item['upper']}")
+    l_database.close()
 
 
 if __name__ == '__main__':
-    l_script_dir = Path(__file__).parent
-    l_project_root = l_script_dir.parent
-    l_auctions_file = l_project_root / 'datas' / 'auctions.yaml'
+    if len(sys.argv) > 1:
+        l_auctions_file = Path(sys.argv[1])
+    else:
+        l_auctions_file = l_project_root / 'datas' / 'auctions.col'
 
-    if not l_auctions_file.exists():
+    # A columnar database may only exist as appended segments
+    if not create_storage(l_auctions_file, 'auctions').exists():
         print("***", f"File not found: {l_auctions_file}", file=sys.stderr)
         sys.exit(1)
 
-    count_outliers(l_auctions_file)
+    count_outliers(l_auctions_file, sys.argv[2] if len(sys.argv) > 2 else None)
 
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Write synthetic dailies/<timestamp>/AHScanner.lua snapshots and the matching
+datas/items.yaml, shaped like real AHScannerDB SavedVariables.
+
+Each item of each realm keeps a book of listings: between two snapshots a
+part of them is sold or expires and is replaced by new ones around a price
+that drifts, so consecutive snapshots share most of their auctions as real
+scans do. A few listings are priced far off to exercise outlier filtering.
+"""
+
+import argparse
+import math
+import random
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+l_script_dir = Path(__file__).parent
+l_project_root = l_script_dir.parent
+sys.path.insert(0, str(l_project_root / 'src'))
+
+import yaml_io
+
+
+# Volume of the real dailies: one realm, 13 items, about 280 auctions per
+# item and snapshot, 19 snapshots twice a day
+DEFAULTS = {"realms": 1, "items": 13, "auctions": 280, "snapshots": 19}
+DEFAULT_STACK_SIZES = "1:45,2:5,4:5,5:15,10:10,11:2,20:18"
+FIRST_ITEM_ID = 900001
+TIMESTAMP_FORMAT = '%Y_%m_%dT%H_%M_%S'
+
+_AUCTION_FORMAT = (
+    "\t\t\t\t{{\n"
+    "\t\t\t\t\t[\"buyoutUnit\"] = {buyout_unit},\n"
+    "\t\t\t\t\t[\"seller\"] = \"{seller}\",\n"
+    "\t\t\t\t\t[\"bidAmount\"] = 0,\n"
+    "\t\t\t\t\t[\"buyout\"] = {buyout},\n"
+    "\t\t\t\t\t[\"level\"] = 0,\n"
+    "\t\t\t\t\t[\"count\"] = {count},\n"
+    "\t\t\t\t\t[\"name\"] = \"{name}\",\n"
+    "\t\t\t\t\t[\"minIncrement\"] = 0,\n"
+    "\t\t\t\t\t[\"minBid\"] = {min_bid},\n"
+    "\t\t\t\t\t[\"minBidUnit\"] = {min_bid_unit},\n"
+    "\t\t\t\t\t[\"quality\"] = {quality},\n"
+    "\t\t\t\t}}, -- [{index}]\n"
+).format
+
+Listing = Tuple[str, int, int, float]
+
+
+def parse_stack_sizes(p_spec: str) -> Tuple[List[int], List[float]]:
+    """'1:45,5:15,20:18' as ([1, 5, 20], [45, 15, 18])."""
+    l_sizes = []
+    l_weights = []
+    for c_part in p_spec.split(','):
+        l_size, l_weight = c_part.split(':')
+        l_sizes.append(int(l_size))
+        l_weights.append(float(l_weight))
+    return l_sizes, l_weights
+
+
+def format_number(p_value: float) -> str:
+    """A Lua number as WoW writes it: integers without decimals."""
+    return str(int(p_value)) if p_value == int(p_value) else repr(p_value)
+
+
+class SyntheticAuctionHouse:
+    """Listings books of every realm and item, advanced one snapshot at a time."""
+
+    def __init__(self, p_realms: int, p_items: int, p_auctions: int, p_stack_sizes: str,
+                 p_turnover: float = 0.2, p_seed: int = 0):
+        """
+        Args:
+            p_realms: Number of realms
+            p_items: Number of items per realm
+            p_auctions: Mean number of auctions per item and snapshot
+            p_stack_sizes: Stack size weights, as '1:45,5:15,20:18'
+            p_turnover: Share of the listings replaced between two snapshots
+            p_seed: Seed of the random generator, same seed same files
+        """
+        self.m_random = random.Random(p_seed)
+        self.m_realms = [f"Synthetic Realm {c_index + 1}" for c_index in range(p_realms)]
+        self.m_items = {str(FIRST_ITEM_ID + c_index): f"Synthetic Item {c_index + 1:05d}" for c_index in range(p_items)}
+        self.m_auctions = p_auctions
+        self.m_stack_sizes, self.m_stack_weights = parse_stack_sizes(p_stack_sizes)
+        self.m_turnover = p_turnover
+        self.m_sellers = [f"Seller{c_index:04d}" for c_index in range(max(20, p_auctions))]
+        # Unit price each item drifts around, per realm
+        self.m_prices: Dict[Tuple[str, str], float] = {}
+        self.m_qualities: Dict[str, int] = {}
+        self.m_books: Dict[Tuple[str, str], List[Listing]] = {}
+        for c_item_id in self.m_items:
+            self.m_qualities[c_item_id] = self.m_random.choice((1, 1, 2, 2, 3))
+        for c_realm in self.m_realms:
+            for c_item_id in self.m_items:
+                self.m_prices[(c_realm, c_item_id)] = math.exp(self.m_random.gauss(math.log(1500), 1.0))
+                self.m_books[(c_realm, c_item_id)] = []
+
+    def step(self) -> None:
+        """Move prices and replace part of the listings, as between two scans."""
+        for c_key, c_book in self.m_books.items():
+            self.m_prices[c_key] *= math.exp(self.m_random.gauss(0, 0.03))
+            l_target = max(2, int(self.m_random.gauss(self.m_auctions, self.m_auctions * 0.1)))
+            l_kept = [c_listing for c_listing in c_book if self.m_random.random() >= self.m_turnover]
+            while len(l_kept) > l_target:
+                l_kept.pop(self.m_random.randrange(len(l_kept)))
+            while len(l_kept) < l_target:
+                l_kept.extend(self._new_listings(self.m_prices[c_key]))
+            self.m_books[c_key] = l_kept
+
+    def write_snapshot(self, p_path: Path) -> int:
+        """Write the current listings as AHScanner.lua, return the number of auctions."""
+        p_path.parent.mkdir(parents=True, exist_ok=True)
+        l_count = 0
+        with open(p_path, 'w', encoding='utf-8') as l_file:
+            l_file.write("\nAHScannerDB = {\n")
+            for c_realm in self.m_realms:
+                l_file.write(f"\t[\"{c_realm}\"] = {{\n")
+                for c_item_id, c_name in self.m_items.items():
+                    l_file.write(f"\t\t[\"{c_name}\"] = {{\n\t\t\t[\"items\"] = {{\n")
+                    for c_index, (c_seller, c_stack, c_unit, c_min_unit) in enumerate(self.m_books[(c_realm, c_item_id)]):
+                        l_file.write(_AUCTION_FORMAT(
+                            buyout_unit=c_unit, seller=c_seller, buyout=c_unit * c_stack, count=c_stack,
+                            name=c_name, min_bid=format_number(c_min_unit * c_stack),
+                            min_bid_unit=format_number(c_min_unit), quality=self.m_qualities[c_item_id],
+                            index=c_index + 1))
+                        l_count += 1
+                    l_file.write("\t\t\t},\n\t\t},\n")
+                l_file.write("\t},\n")
+            l_file.write("\t[\"settings\"] = {\n\t\t[\"autoScan\"] = false,\n\t\t[\"scanDelay\"] = 0.5,\n\t},\n")
+            l_file.write("\t[\"scans\"] = {\n\t},\n}\n")
+        return l_count
+
+    def _new_listings(self, p_price: float) -> List[Listing]:
+        """A seller posting a few identical stacks at one price, as real scans show."""
+        l_stack = self.m_random.choices(self.m_stack_sizes, self.m_stack_weights)[0]
+        l_factor = math.exp(self.m_random.gauss(0, 0.1))
+        if self.m_random.random() < 0.02:
+            l_factor *= self.m_random.choice((0.2, 4.0, 10.0))
+        l_unit = max(1, int(p_price * l_factor))
+        if l_unit > 200:
+            l_unit -= l_unit % 5
+        # Min bids are often a half-copper unit price
+        l_min_unit = max(1, int(l_unit * self.m_random.uniform(0.85, 0.97) * 2)) / 2
+        l_listing = (self.m_random.choice(self.m_sellers), l_stack, l_unit, l_min_unit)
+        return [l_listing] * min(12, int(self.m_random.expovariate(1 / 3)) + 1)
+
+
+def generate(p_output_dir: Path, p_realms: int = DEFAULTS["realms"], p_items: int = DEFAULTS["items"],
+             p_auctions: int = DEFAULTS["auctions"], p_snapshots: int = DEFAULTS["snapshots"],
+             p_stack_sizes: str = DEFAULT_STACK_SIZES, p_turnover: float = 0.2, p_seed: int = 0,
+             p_interval_hours: float = 12.0) -> int:
+    """
+    Write p_output_dir/dailies/<timestamp>/AHScanner.lua and p_output_dir/datas/items.yaml.
+
+    Returns:
+        Number of auctions written
+    """
+    l_house = SyntheticAuctionHouse(p_realms, p_items, p_auctions, p_stack_sizes, p_turnover, p_seed)
+    l_items_file = p_output_dir / 'datas' / 'items.yaml'
+    l_items_file.parent.mkdir(parents=True, exist_ok=True)
+    yaml_io.dump_file(l_house.m_items, l_items_file)
+    l_time = datetime(2025, 1, 1, 6, 0, 0)
+    l_count = 0
+    for _ in range(p_snapshots):
+        l_house.step()
+        l_count += l_house.write_snapshot(p_output_dir / 'dailies' / l_time.strftime(TIMESTAMP_FORMAT) / 'AHScanner.lua')
+        l_time += timedelta(hours=p_interval_hours, minutes=l_house.m_random.randrange(-90, 90))
+    return l_count
+
+
+if __name__ == "__main__":
+    l_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    l_parser.add_argument('output_dir', type=Path, help="Receives dailies/ and datas/items.yaml")
+    l_parser.add_argument('--realms', type=int, default=DEFAULTS["realms"])
+    l_parser.add_argument('--items', type=int, default=DEFAULTS["items"], help="Items per realm")
+    l_parser.add_argument('--auctions', type=int, default=DEFAULTS["auctions"], help="Mean auctions per item and snapshot")
+    l_parser.add_argument('--snapshots', type=int, default=DEFAULTS["snapshots"])
+    l_parser.add_argument('--stack-sizes', default=DEFAULT_STACK_SIZES, help="Stack size weights, as '1:45,5:15,20:18'")
+    l_parser.add_argument('--turnover', type=float, default=0.2, help="Share of the listings replaced between two snapshots")
+    l_parser.add_argument('--seed', type=int, default=0)
+    l_args = l_parser.parse_args()
+    l_auctions_count = generate(l_args.output_dir, l_args.realms, l_args.items, l_args.auctions, l_args.snapshots,
+                                l_args.stack_sizes, l_args.turnover, l_args.seed)
+    print(f"--- {l_args.snapshots} snapshot(s), {l_auctions_count} auctions written to {l_args.output_dir / 'dailies'}")
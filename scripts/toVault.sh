@@ -12,7 +12,30 @@ if [ ! -d ${DST_DIR} ]; then
   exit 1
 fi
 
-rm -rf ${DST_DIR}/index.md ${DST_DIR}/items
 cp obsidian/index.md ${DST_DIR}
-cp -r obsidian/items ${DST_DIR}
 
+# Apply the change list written by the obsidian command: 'A path',
+# 'M path' or 'D path' per line, paths relative to obsidian/. Only the
+# item pages are synced.
+CHANGES=obsidian/changes.txt
+if [ ! -d ${DST_DIR}/items ]; then
+  cp -r obsidian/items ${DST_DIR}
+  rm -f ${CHANGES}
+elif [ -f ${CHANGES} ]; then
+  while read -r CHANGE FILE; do
+    case "${FILE}" in
+      items/*) ;;
+      *) continue ;;
+    esac
+    if [ "${CHANGE}" = "D" ]; then
+      rm -f "${DST_DIR}/${FILE}"
+    else
+      mkdir -p "$(dirname "${DST_DIR}/${FILE}")"
+      cp "obsidian/${FILE}" "${DST_DIR}/${FILE}" || exit 1
+    fi
+  done < ${CHANGES}
+  echo "--- $(wc -l < ${CHANGES}) change(s) synced to ${DST_DIR}"
+  rm -f ${CHANGES}
+else
+  echo "--- No change to sync"
+fi
@@ -2,20 +2,37 @@
 """Obsidian markdown generator for AHScanner auctions."""
 
 from pathlib import Path
-from typing import Dict, List
-
-from datetime import datetime
+from typing import Dict, List, Optional, Set
 
 from item_database import ItemDatabase
 from auction_database import AuctionDatabase
+from graph_elements import get_mustache_segments, get_step_curve, get_step_segments
+from metrics import Metrics
+from item_time_series import ItemHistorySeries, ItemTimeSeries, get_label
+from page_renderer import render_pages
+from time_series_downsampling import downsample, max_of, mean_of, mean_of_lists, min_of, rounded_mean_of
+from vault_writer import VaultWriter
 
 
 class AHScannerObsidianGenerator:
     """Generate Obsidian markdown files from AHScanner auction files."""
 
-    def __init__(self, p_items_db: ItemDatabase, p_auction_database: AuctionDatabase, p_output_dir: Path):
-        """Initialize generator."""
+    def __init__(self, p_items_db: ItemDatabase, p_auction_database: AuctionDatabase, p_output_dir: Path,
+                 p_force: bool = False, p_jobs: int = 1, p_polyline: bool = False,
+                 p_max_points: int = 0, p_recent_days: int = 14, p_metrics: Optional[Metrics] = None):
+        """
+        Initialize generator.
+
+        Args:
+            p_force: Render the per-snapshot auction pages again even if already written
+            p_jobs: Number of processes rendering the pages, 0 for one per core
+            p_polyline: Draw each price chart as one curve element instead of a segment per step
+            p_max_points: Maximum number of points of a stats chart, 0 for one per snapshot
+            p_recent_days: Days of history kept at full resolution when charts are downsampled
+            p_metrics: Receives the generation time and the pages written
+        """
         self.m_items_db = p_items_db
+        self.m_metrics = p_metrics or Metrics()
         self.m_auction_database = p_auction_database
         self.m_output_dir = p_output_dir
         self.m_output_dir.mkdir(parents=True, exist_ok=True)
@@ -26,33 +43,79 @@ class AHScannerObsidianGenerator:
         self.m_chart_pxxx_template = self._load_template('chart_pXxx.md')
         self.m_graph_mustache_template = self._load_template('graph_mustache.md')
         self.m_step_count = 1000
+        self.m_series = None
+        self.m_force = p_force
+        self.m_writer = None
+        self.m_jobs = p_jobs
+        self.m_polyline = p_polyline
+        self.m_max_points = p_max_points
+        self.m_recent_days = p_recent_days
+
+    def __getstate__(self) -> Dict:
+        """Sent to the rendering workers: templates and item names, pages get their data slice."""
+        l_state = self.__dict__.copy()
+        for c_name in ('m_auction_database', 'm_series', 'm_writer', 'm_metrics'):
+            l_state[c_name] = None
+        return l_state
+
+    def generate(self, p_item_ids: Optional[Set[str]] = None) -> int:
+        """
+        Generate all Obsidian markdown files for auctions, only rewriting changed ones.
+
+        Args:
+            p_item_ids: Only render the stats pages of these items, keeping the others already written, None for all
+        """
+        with self.m_metrics.stage('obsidian.auctions'):
+            return self._generate(p_item_ids)
 
-    def generate(self) -> int:
-        """Generate all Obsidian markdown files for auctions."""
+    def _generate(self, p_item_ids: Optional[Set[str]]) -> int:
         l_generated_count = 0
         l_index_items = []
-
-        l_auctions_data = self.m_auction_database.m_auctions_by_realm
-        for c_realm, c_timestamps in l_auctions_data.items():
-            for c_timestamp, c_auctions in c_timestamps.items():
-                l_markdown = self._generate_auction_markdown(c_auctions, c_realm, c_timestamp)
-                if not l_markdown:
-                    continue
-
-                l_output_file = self.m_output_dir / f"auctions_{c_timestamp}.md"
-                with open(l_output_file, 'w', encoding='utf-8') as l_file:
-                    l_file.write(l_markdown)
+        self.m_writer = VaultWriter(self.m_output_dir, self.m_metrics)
+
+        l_snapshot_keys = []
+        for c_realm, c_timestamp in self.m_auction_database.get_snapshot_keys():
+            l_page = f"auctions_{c_timestamp}.md"
+            if not self.m_force and self.m_writer.has(l_page):
+                # A snapshot never changes once ingested
+                self.m_writer.keep(l_page)
                 l_index_items.append(f"- [[auctions_{c_timestamp}|auctions/auctions_{c_timestamp}]]")
                 l_generated_count += 1
+            else:
+                l_snapshot_keys.append((c_realm, c_timestamp))
+        # Snapshots are read as pages are rendered, a lazy database is never held whole
+        l_tasks = ((self.m_auction_database.get_snapshot(c_realm, c_timestamp), c_realm, c_timestamp)
+                   for c_realm, c_timestamp in l_snapshot_keys)
+        l_pages = render_pages(self, '_generate_auction_markdown', l_tasks, self.m_jobs, len(l_snapshot_keys))
+        for (_, c_timestamp), l_markdown in zip(l_snapshot_keys, l_pages):
+            if not l_markdown:
+                continue
+            self.m_writer.write(f"auctions_{c_timestamp}.md", l_markdown)
+            l_index_items.append(f"- [[auctions_{c_timestamp}|auctions/auctions_{c_timestamp}]]")
+            l_generated_count += 1
 
-        l_all_items = self.m_items_db.get_all_by_id()
-        for c_item_id, c_item_name in sorted(l_all_items.items()):
+        # Only the filtered buyout stats are charted, keep the slices sent to workers small
+        if self.m_auction_database.is_lazy():
+            self.m_series = ItemHistorySeries(self.m_auction_database,
+                                              lambda p_item: p_item['buyout']['filtered'] if p_item else None)
+        else:
+            self.m_series = ItemTimeSeries(self.m_auction_database.m_auctions_by_realm, lambda p_items: {
+                c_item_id: c_item['buyout']['filtered'] for c_item_id, c_item in p_items.items() if c_item})
+        l_all_items = []
+        for c_item_id, c_item_name in sorted(self.m_items_db.get_all_by_id().items()):
+            l_item_filename = f"{c_item_name} - {c_item_id}.md"
+            if p_item_ids is not None and c_item_id not in p_item_ids and self.m_writer.has(f'stats_{l_item_filename}'):
+                self.m_writer.keep(f'stats_{l_item_filename}')
+                l_index_items.append(f"- [[stats_{l_item_filename}|stats/stats_{l_item_filename}]]")
+                l_generated_count += 1
+                continue
+            l_all_items.append((c_item_id, c_item_name))
+        l_tasks = ((c_item_id, self.m_series.get_item_slice(c_item_id)) for c_item_id, _ in l_all_items)
+        l_pages = render_pages(self, '_generate_stats_chart', l_tasks, self.m_jobs, len(l_all_items))
+        for (c_item_id, c_item_name), l_markdown in zip(l_all_items, l_pages):
             l_item_filename = f"{c_item_name} - {c_item_id}.md"
-            l_item_file = self.m_output_dir / f'stats_{l_item_filename}'
-            l_markdown = self._generate_stats_chart(c_item_id)
             if l_markdown:
-                with open(l_item_file, 'w', encoding='utf-8') as l_file:
-                    l_file.write(l_markdown)
+                self.m_writer.write(f'stats_{l_item_filename}', l_markdown)
                 l_index_items.append(f"- [[stats_{l_item_filename}|stats/stats_{l_item_filename}]]")
                 l_generated_count += 1
 
@@ -60,14 +123,15 @@ class AHScannerObsidianGenerator:
             self._generate_index(l_index_items)
             l_generated_count += 1
 
+        self.m_writer.finish()
         return l_generated_count
 
 
-    def _generate_stats_chart(self, p_item_id):
-        """Generate stats charts."""
+    def _generate_stats_chart(self, p_item_id, p_item_slice):
+        """Generate stats charts from the [(realm, filtered buyout stats points)] of one item."""
         l_markdown = ""
-        for c_realm, c_timestamps in self.m_auction_database.m_auctions_by_realm.items():
-            l_dates = []
+        for c_realm, c_points in p_item_slice:
+            l_times = []
             l_harmonic_means = []
             l_medians = []
             l_medians_groupe = []
@@ -80,14 +144,7 @@ class AHScannerObsidianGenerator:
             l_p_variances = []
             l_variances = []
             l_mustaches = []
-            for c_timestamp, c_items in c_timestamps.items():
-                l_timestamp_obj = datetime.strptime(c_timestamp, '%Y_%m_%dT%H_%M_%S')
-                l_date_str = l_timestamp_obj.strftime('%Y-%m-%d %H:%M')
-
-                l_item = c_items.get(p_item_id)
-                if not l_item:
-                    continue
-                l_buyout_filtered = l_item['buyout']['filtered']
+            for c_time, l_buyout_filtered in c_points:
                 l_harmonic_mean = l_buyout_filtered.get('harmonic_mean', 0)
                 l_median = l_buyout_filtered.get('median', 0)
                 l_median_groupe = l_buyout_filtered.get('median_grouped', 0)
@@ -100,7 +157,7 @@ class AHScannerObsidianGenerator:
                 l_p_variance = l_buyout_filtered.get('pvariance', 0)
                 l_variance = l_buyout_filtered.get('variance', 0)
                 l_mustache = l_buyout_filtered.get('quartiles', [])
-                l_dates.append(l_date_str)
+                l_times.append(c_time)
                 l_harmonic_means.append(l_harmonic_mean)
                 l_medians.append(l_median)
                 l_medians_groupe.append(l_median_groupe)
@@ -113,13 +170,26 @@ class AHScannerObsidianGenerator:
                 l_p_variances.append(l_p_variance)
                 l_variances.append(l_variance)
                 l_mustaches.append(l_mustache)
-            if not l_dates:
+            if not l_times:
                 return ""
+            if self.m_max_points:
+                l_times, l_columns = downsample(
+                    l_times,
+                    [l_harmonic_means, l_medians, l_medians_groupe, l_medians_low, l_means, l_mins, l_maxs,
+                     l_p_stdevs, l_stdevs, l_p_variances, l_variances, l_mustaches],
+                    self.m_max_points,
+                    # Prices are rounded to the copper, deviations and variances are not
+                    [rounded_mean_of, rounded_mean_of, rounded_mean_of, rounded_mean_of, rounded_mean_of,
+                     min_of, max_of, mean_of, mean_of, mean_of, mean_of, mean_of_lists],
+                    p_primary=4, p_recent_days=self.m_recent_days)
+                l_harmonic_means, l_medians, l_medians_groupe, l_medians_low, l_means, l_mins, l_maxs, \
+                    l_p_stdevs, l_stdevs, l_p_variances, l_variances, l_mustaches = l_columns
+            l_dates = [get_label(c_time, '%Y-%m-%d %H:%M') for c_time in l_times]
             l_stats_chart_content = self._generate_stats_chart_content(l_dates, l_harmonic_means, l_medians, l_medians_groupe, l_medians_low, l_means, l_mins, l_maxs)
             l_mmmm_chart_content = self._generate_mmmm_chart_content(l_dates, l_mins, l_means, l_medians, l_maxs)
             l_devs_chart_content = self._generate_pxxx_chart_content(l_dates, l_p_stdevs, l_stdevs)
             l_variances_chart_content = self._generate_pxxx_chart_content(l_dates, l_p_variances, l_variances)
-            l_mustaches_graph_content = self._generate_mustaches_graph_content(l_dates, l_mustaches, l_mins, l_maxs)
+            l_mustaches_graph_content = self._generate_mustaches_graph_content(l_times, l_mustaches, l_mins, l_maxs)
             l_markdown = f"\n## {c_realm}\n\n" + \
                 f"### Mustaches\n" + \
                 f"\n" + \
@@ -196,14 +266,10 @@ class AHScannerObsidianGenerator:
             l_max_count = (2 + int(l_max_count / 10)) * 10
         else:
             l_max_count = (2 + int(l_max_count / 100)) * 100
-        l_elements = []
-        l_last_price = 0
-        l_last_cumulative_item_count = 0
-        for c_price, c_cumulative_item_count in l_prices_to_count.items():
-            l_elements.append(f"{{type: segment, def: [[{l_last_price}, {l_last_cumulative_item_count}], [{c_price}, {l_last_cumulative_item_count}]]}}")
-            l_elements.append(f"{{type: segment, def: [[{c_price}, {l_last_cumulative_item_count}], [{c_price}, {c_cumulative_item_count}]]}}")
-            l_last_price = c_price
-            l_last_cumulative_item_count = c_cumulative_item_count
+        if self.m_polyline:
+            l_elements = [get_step_curve(list(l_prices_to_count), list(l_prices_to_count.values()))]
+        else:
+            l_elements = get_step_segments(list(l_prices_to_count), list(l_prices_to_count.values()))
 
         l_xmax = l_prices[-1] * 1.05
         l_ymax = l_max_count * 1.05
@@ -223,11 +289,8 @@ class AHScannerObsidianGenerator:
 
     def _generate_index(self, p_index_items: List[str]) -> None:
         """Generate Auction Index.md file."""
-        l_index_file = self.m_output_dir / 'Auction Index.md'
         l_index_content = "# Auction Index\n\n" + '\n'.join(sorted(p_index_items)) + '\n'
-
-        with open(l_index_file, 'w', encoding='utf-8') as l_file:
-            l_file.write(l_index_content)
+        self.m_writer.write('Auction Index.md', l_index_content)
 
     def _generate_stats_chart_content(self, p_dates, p_harmonic_means, p_medians, p_medians_groupe, p_medians_low, p_means, p_mins, p_maxs):
         """Generate chart content from dates and stats."""
@@ -276,14 +339,13 @@ class AHScannerObsidianGenerator:
             vals=l_vals_str,
         )
 
-    def _generate_mustaches_graph_content(self, p_dates, p_mustaches, p_mins, p_maxs):
-        """Generate graph content from dates and mustaches, mins and maxs."""
-        l_elements = []
-        l_x_min_ts = datetime.strptime(p_dates[0], '%Y-%m-%d %H:%M').timestamp() * 0.99999
-        l_x_max_ts = datetime.strptime(p_dates[-1], '%Y-%m-%d %H:%M').timestamp() * 1.00001
-        for c_index, c_date in enumerate(p_dates):
-            l_x = datetime.strptime(c_date, '%Y-%m-%d %H:%M').timestamp() - l_x_min_ts
-            l_elements += self._draw_one_mustache(l_x, 10000, p_mustaches[c_index], p_mins[c_index], p_maxs[c_index])
+    def _generate_mustaches_graph_content(self, p_times, p_mustaches, p_mins, p_maxs):
+        """Generate graph content from snapshot datetimes and mustaches, mins and maxs."""
+        # x axis at the minute precision of the chart labels
+        l_xs = [c_time.replace(second=0).timestamp() for c_time in p_times]
+        l_x_min_ts = l_xs[0] * 0.99999
+        l_x_max_ts = l_xs[-1] * 1.00001
+        l_elements = get_mustache_segments([c_x - l_x_min_ts for c_x in l_xs], 10000, p_mustaches, p_mins, p_maxs)
         l_elements_str = ','.join(l_elements)
         l_xmax = (l_x_max_ts - l_x_min_ts)
         l_ymax = max(p_mins + p_maxs) * 1.05
@@ -294,24 +356,3 @@ class AHScannerObsidianGenerator:
             xmax=l_xmax,
             ymax=l_ymax,
         )
-
-    def _draw_one_mustache(self, p_x, p_delta, p_mustache, p_min, p_max):
-        """
-        Draw one mustache.
-        https://github.com/DylanHojnoski/obsidian-graphs
-        """
-        l_elements = []
-        if not p_mustache:
-            return l_elements
-        l_left = p_x - p_delta / 2
-        l_right = p_x + p_delta / 2
-        l_elements.append(f"{{type: segment, def: [[{l_left}, {p_min}], [{l_right}, {p_min}]]}}")                  # bottom line
-        l_elements.append(f"{{type: segment, def: [[{l_left}, {p_max}], [{l_right}, {p_max}]]}}")                  # top line
-        l_elements.append(f"{{type: segment, def: [[{l_left}, {p_mustache[0]}], [{l_right}, {p_mustache[0]}]]}}")  # q1 line
-        l_elements.append(f"{{type: segment, def: [[{l_left}, {p_mustache[1]}], [{l_right}, {p_mustache[1]}]]}}")  # q2 line
-        l_elements.append(f"{{type: segment, def: [[{l_left}, {p_mustache[2]}], [{l_right}, {p_mustache[2]}]]}}")  # q3 line
-        l_elements.append(f"{{type: segment, def: [[{l_left}, {p_mustache[0]}], [{l_left}, {p_mustache[2]}]]}}")   # q1-q3 left vertical line
-        l_elements.append(f"{{type: segment, def: [[{l_right}, {p_mustache[0]}], [{l_right}, {p_mustache[2]}]]}}") # q1-q3 right vertical line
-        l_elements.append(f"{{type: segment, def: [[{p_x}, {p_min}], [{p_x}, {p_mustache[0]}]]}}")                 # bottom vertical line
-        l_elements.append(f"{{type: segment, def: [[{p_x}, {p_max}], [{p_x}, {p_mustache[2]}]]}}")                 # top vertical line
-        return l_elements
@@ -1,25 +1,95 @@
 """Auction database management."""
 
 from pathlib import Path
-from typing import Dict
-import yaml
+from typing import Dict, List, Optional, Set, Tuple
+
+from metrics import Metrics
+from storage.storage_factory import create_storage
 
 
 class AuctionDatabase:
     """Manage auction database with lookup by item name and realm."""
 
-    def __init__(self, p_database_file: Path):
-        """Initialize empty database."""
+    def __init__(self, p_database_file: Path, p_append_only: bool = False, p_lazy: bool = False,
+                 p_metrics: Optional[Metrics] = None):
+        """
+        Initialize database, YAML, columnar or SQLite depending on the file suffix.
+
+        With p_append_only and a storage supporting it, the stored data is
+        not loaded: the database starts empty and save() appends what was
+        added as a new segment.
+
+        With p_lazy and a storage supporting queries, the stored data is not
+        loaded either: the database is read only and every getter queries
+        the storage indexes.
+
+        Load, save and compaction are timed in p_metrics when given.
+        """
         self.m_filename = p_database_file
-        self.m_auctions_by_realm = {}
-        if not p_database_file.exists():
-            self.m_auctions_by_realm = {}
-            return
-        with open(p_database_file, 'r', encoding='utf-8') as l_file:
-            self.m_auctions_by_realm = yaml.safe_load(l_file) or {}
+        self.m_metrics = p_metrics or Metrics()
+        self.m_storage = create_storage(p_database_file, 'auctions', self.m_metrics)
+        self.m_append_only = p_append_only and self.m_storage.SUPPORTS_APPEND
+        self.m_lazy = p_lazy and self.m_storage.SUPPORTS_QUERIES
+        with self.m_metrics.stage('db.load'):
+            self.m_auctions_by_realm = {} if self.m_append_only or self.m_lazy else self.m_storage.load()
+    def is_lazy(self) -> bool:
+        return self.m_lazy
     def save(self) -> None:
-        with open(self.m_filename, 'w', encoding='utf-8') as l_file:
-            yaml.dump(self.m_auctions_by_realm, l_file, default_flow_style=False, allow_unicode=True, sort_keys=True)
+        if self.m_lazy:
+            raise ValueError(f"*** Error: {self.m_filename} is opened read only")
+        with self.m_metrics.stage('db.save'):
+            if self.m_append_only:
+                self.m_storage.append(self.m_auctions_by_realm)
+                return
+            self.m_storage.save(self.m_auctions_by_realm)
+    def compact(self) -> None:
+        """Merge the appended segments into the main file."""
+        if self.m_storage.get_segment_count():
+            with self.m_metrics.stage('db.compact'):
+                self.m_storage.save(self.m_storage.load())
+    def get_segment_count(self) -> int:
+        return self.m_storage.get_segment_count()
+    def close(self) -> None:
+        """Close what a lazy database keeps open for its queries."""
+        self.m_storage.close()
+    def get_timestamps(self) -> Set[str]:
+        """Snapshot timestamps held by the database."""
+        if self.m_lazy:
+            return self.m_storage.get_timestamps()
+        l_timestamps = {c_timestamp for c_timestamps in self.m_auctions_by_realm.values() for c_timestamp in c_timestamps}
+        if self.m_append_only:
+            l_timestamps |= self.m_storage.get_timestamps()
+        return l_timestamps
+    def get_realms(self) -> List[str]:
+        """Realms in database order."""
+        if self.m_lazy:
+            return self.m_storage.get_realms()
+        return list(self.m_auctions_by_realm)
+    def get_snapshot_keys(self) -> List[Tuple[str, str]]:
+        """(realm, timestamp) of every snapshot, in database order."""
+        if self.m_lazy:
+            return self.m_storage.get_snapshot_keys()
+        return [(c_realm, c_timestamp) for c_realm, c_timestamps in self.m_auctions_by_realm.items()
+                for c_timestamp in c_timestamps]
+    def get_snapshot(self, p_realm: str, p_timestamp: str) -> Dict:
+        """Data of one snapshot, as held under m_auctions_by_realm[p_realm][p_timestamp]."""
+        if self.m_lazy:
+            return self.m_storage.get_snapshot(p_realm, p_timestamp)
+        return self.m_auctions_by_realm[p_realm][p_timestamp]
+    def get_item_history(self, p_item_id: str) -> Dict:
+        """
+        {realm: {timestamp: {type: auction stats}}} of one item. A lazy database reads it
+        through the storage index instead of loading everything.
+        """
+        if self.m_lazy:
+            return self.m_storage.get_item_history(p_item_id)
+        l_data = self.m_storage.load() if self.m_append_only else self.m_auctions_by_realm
+        l_result = {}
+        for c_realm, c_timestamps in l_data.items():
+            for c_timestamp, c_item_data in c_timestamps.items():
+                if p_item_id in c_item_data:
+                    l_result.setdefault(c_realm, {})[c_timestamp] = c_item_data[p_item_id]
+        return l_result
 
     def add_realm(self, p_realm: str) -> None:
         if p_realm not in self.m_auctions_by_realm:
@@ -38,3 +108,17 @@ class AuctionDatabase:
         if p_timestamp not in self.m_auctions_by_realm[p_realm]:
             raise ValueError(f"*** Error: Timestamp '{p_timestamp}' does not exist. Use add_timestamp() first. At {p_timestamp} in {p_realm}")
         self.m_auctions_by_realm[p_realm][p_timestamp][p_item_id] = p_auction_data
+
+    def add_auction_data_batch(self, p_realm: str, p_timestamp: str, p_auction_data_by_item: Dict[str, Dict]) -> None:
+        """
+        Add the auction data of many items of one snapshot, creating the realm
+        and timestamp as needed. Only item IDs are checked per row.
+
+        Args:
+            p_auction_data_by_item: {item_id: auction data}
+        """
+        for c_item_id in p_auction_data_by_item:
+            if not c_item_id or not all(c in '0123456789' for c in c_item_id):
+                raise ValueError(f"*** Error: Item ID must contain only digits: '{c_item_id}'. At {p_timestamp} in {p_realm}")
+        l_timestamps = self.m_auctions_by_realm.setdefault(p_realm, {})
+        l_timestamps.setdefault(p_timestamp, {}).update(p_auction_data_by_item)
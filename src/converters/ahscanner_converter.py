@@ -2,146 +2,199 @@
 """Convert AHScanner to YAML."""
 
 from pathlib import Path
-from typing import Any, List, Dict
-from copy import deepcopy
-import statistics
+from typing import Any, List, Dict, Iterator, Optional
 
 from .lua_to_yaml import LuaToYamlConverter
+from .lua_table_parser import LuaTableParser, TABLE
+from .histogram_stats import PriceHistogram
+from .item_auctions import ItemAuctions
+from .sectioned_yaml_writer import SectionedYamlWriter
+from . import numpy_aggregation
+from metrics import Metrics
+
+
+SKIPPED_KEYS = ("settings", "scans")
+# Fields of an auction read by the aggregation
+AUCTION_KEYS = ("buyoutUnit", "minBidUnit", "count")
+# Auctions buffered before a NumPy grouping, the largest item may exceed it
+NUMPY_BATCH_AUCTIONS = 1 << 16
 
 
 class AHScannerConverter(LuaToYamlConverter):
     """Convert AHScanner Lua to YAML."""
 
-    def __init__(self, p_file_path: Path):
+    # Bump when the generated YAML changes, so convert redoes old snapshots
+    VERSION = 1
+
+    def __init__(self, p_file_path: Path, p_use_numpy: bool = False, p_metrics: Optional[Metrics] = None):
         """
         Initialize converter.
 
         Args:
             p_file_path: Path to AHScanner.lua file
+            p_use_numpy: Group auctions with NumPy, which needs it installed
+            p_metrics: Receives the stats and YAML dump times, items and auctions counts
         """
-        super().__init__(p_file_path, 'AHScannerDB')
+        super().__init__(p_file_path, 'AHScannerDB', p_metrics)
+        if p_use_numpy and not numpy_aggregation.is_available():
+            raise ValueError("*** Error: NumPy is not installed")
+        self.m_use_numpy = p_use_numpy
 
     def load(self) -> None:
+        """Stream AHScanner.lua through the native parser and aggregate it."""
+        if not self.m_file_path.exists():
+            raise FileNotFoundError(f"*** Error: File not found: {self.m_file_path}")
+        if self.m_file_path.parent.name.startswith('_'):
+            return
+        with LuaTableParser(self.m_file_path) as l_parser:
+            l_parser.open_global(self.m_global_var)
+            self.m_python_data = self._aggregate_realms(self._iter_parsed_realms(l_parser))
+
+    def convert(self, p_output_path: Optional[Path] = None) -> bool:
+        """
+        Stream AHScanner.lua to YAML an item at a time, never holding the whole file.
+
+        Writes the same file as load() then save_yaml().
+
+        Args:
+            p_output_path: Output path (default: same as input with .yaml)
+        """
+        if not self.m_file_path.exists():
+            raise FileNotFoundError(f"*** Error: File not found: {self.m_file_path}")
+        if self.m_file_path.parent.name.startswith('_'):
+            return False
+        if p_output_path is None:
+            p_output_path = self.m_file_path.with_suffix('.yaml')
+        with LuaTableParser(self.m_file_path) as l_parser, SectionedYamlWriter(p_output_path, self.m_metrics) as l_writer:
+            l_parser.open_global(self.m_global_var)
+            for c_realm, c_items in self._iter_aggregated_realms(self._iter_parsed_realms(l_parser)):
+                l_writer.start_section(c_realm)
+                for c_item_name, c_data in c_items:
+                    l_writer.add(c_realm, c_item_name, c_data)
+            return l_writer.finish()
+
+    def load_with_lupa(self) -> None:
+        """Load through the lupa runtime, kept as the reference path."""
         super().load()
-        l_scans = self.m_python_data.get('scans', {})
-        self.m_python_data = self._aggregate_scans()
+        if self.m_python_data is None:
+            return
+        self.m_python_data = self._aggregate_realms(self._iter_loaded_realms())
+
+    def _iter_parsed_realms(self, p_parser: LuaTableParser) -> Iterator:
+        """Yield (realm, items) where items yields (item name, auctions)."""
+        for c_realm, c_value in p_parser.iter_entries():
+            if c_realm in SKIPPED_KEYS or c_value is not TABLE:
+                continue
+            yield c_realm, self._iter_parsed_items(p_parser)
+
+    def _iter_parsed_items(self, p_parser: LuaTableParser) -> Iterator:
+        for c_item_name, c_value in p_parser.iter_entries():
+            if c_value is not TABLE:
+                continue
+            yield c_item_name, self._iter_parsed_auctions(p_parser)
+
+    def _iter_parsed_auctions(self, p_parser: LuaTableParser) -> Iterator[Dict]:
+        for c_key, c_value in p_parser.iter_entries():
+            if c_key != "items" or c_value is not TABLE:
+                continue
+            yield from p_parser.iter_records(AUCTION_KEYS)
 
-    def _aggregate_scans(self) -> Dict:
-        l_result = {}
+    def _iter_loaded_realms(self) -> Iterator:
         for c_realm, c_items_by_name in self.m_python_data.items():
-            if c_realm in ["settings", "scans"]:
+            if c_realm in SKIPPED_KEYS:
                 continue
-            l_item_name_to_auctions = {}
-            for c_item_name, c_items in c_items_by_name.items():
-                if c_item_name not in l_item_name_to_auctions:
-                    l_item_name_to_auctions[c_item_name] = {}
-                for c_item in c_items["items"].values():
-                    l_type = self._get_type_and_prepare_data(c_item_name, c_item, l_item_name_to_auctions)
-                    self._add_auction_to_data(c_item_name, c_item, l_type, l_item_name_to_auctions)
-            l_result[c_realm] = self._get_counted_data(l_item_name_to_auctions)
-        return l_result
-
-    def _get_type_and_prepare_data(self, p_item_name, p_item, p_item_name_to_auctions):
-        l_type = "buyout"
-        l_price_unit = p_item["buyoutUnit"]
-        l_min_bid_unit = p_item["minBidUnit"]
-        if l_price_unit == 0:
-            l_type = "minBid"
-            l_price_unit = l_min_bid_unit
-        if "buyout" not in p_item_name_to_auctions[p_item_name]:
-            p_item_name_to_auctions[p_item_name]["buyout"] = {}
-        if "minBid" not in p_item_name_to_auctions[p_item_name]:
-            p_item_name_to_auctions[p_item_name]["minBid"] = {}
-        if l_min_bid_unit not in p_item_name_to_auctions[p_item_name]["minBid"]:
-            p_item_name_to_auctions[p_item_name]["minBid"][l_min_bid_unit] = {}
-            p_item_name_to_auctions[p_item_name]["minBid"][l_min_bid_unit]["auctions"] = []
-        if l_type == "buyout" and l_price_unit not in p_item_name_to_auctions[p_item_name]["buyout"]:
-            p_item_name_to_auctions[p_item_name]["buyout"][l_price_unit] = {}
-            p_item_name_to_auctions[p_item_name]["buyout"][l_price_unit]["auctions"] = []
-        return l_type
-
-    def _add_auction_to_data(self, p_item_name, p_item, p_type, p_item_name_to_auctions):
-        l_data = {
-            "minBid": p_item.get('minBid', 0),
-            "minBidUnit": p_item.get('minBidUnit', 0),
-            "buyout": p_item.get('buyout', 0),
-            "buyoutUnit": p_item.get('buyoutUnit', 0),
-            "count": p_item.get('count', 0),
-            "quality": p_item.get('quality', 0),
-            "level": p_item.get('level', 0),
-            "minIncrement": p_item.get('minIncrement', 0),
-            "highBidder": p_item.get('highBidder', ''),
-            "seller": p_item.get('seller', ''),
-            "type": p_type,
-        }
-        l_min_bid_unit = p_item["minBidUnit"]
-        p_item_name_to_auctions[p_item_name]["minBid"][l_min_bid_unit]["auctions"].append(l_data)
-        if p_type == "buyout":
-            l_buyout_unit = p_item["buyoutUnit"]
-            p_item_name_to_auctions[p_item_name]["buyout"][l_buyout_unit]["auctions"].append(deepcopy(l_data))
-
-    def _get_counted_data(self, p_item_name_to_auctions):
-        l_counted_data = {}
-        for c_item_name, c_item_data in p_item_name_to_auctions.items():
-            l_counted_data[c_item_name] = {}
-            for c_type, c_prices in c_item_data.items():
-                l_prices = []
-                l_counts_by_prices = {}
-                for c_price, c_auctions in c_prices.items():
-                    l_item_count = 0
-                    l_auctions = c_auctions.get('auctions', [])
-                    for c_auction in l_auctions:
-                        l_item_count += c_auction.get('count', 0)
-                    if l_item_count > 0:
-                        l_counts_by_prices[c_price] = {}
-                        l_counts_by_prices[c_price]["item_count"] = l_item_count
-                        l_counts_by_prices[c_price]["auctions_count"] = len(l_auctions)
-                        l_prices += [c_price] * l_item_count
-                l_counted_data[c_item_name][c_type] = {}
-                l_counted_data[c_item_name][c_type]["filtered"] = {}
-                l_counted_data[c_item_name][c_type]["all"] = {}
-
-                if len(l_prices) < 2:
-                    print("---", c_item_name, c_type, "not enough prices")
-                    continue
-
-                l_quartiles = statistics.quantiles(l_prices, n=4)
-                l_q1 = l_quartiles[0]
-                l_q3 = l_quartiles[2]
-                l_iqr = l_q3 - l_q1
-                l_lower_fence = l_q1 - 1.5 * l_iqr
-                l_upper_fence = l_q3 + 1.5 * l_iqr
-
-                l_filtered_prices = []
-                for c_price, c_price_data in l_counts_by_prices.items():
-                    if c_price < l_lower_fence:
-                        l_counts_by_prices[c_price]["lower"] = True
-                    elif c_price > l_upper_fence:
-                        l_counts_by_prices[c_price]["upper"] = True
-                    else:
-                        l_filtered_prices += [c_price] * c_price_data.get('item_count', 0)
-                l_counted_data[c_item_name][c_type]["counts_by_prices"] = dict(l_counts_by_prices)
-                l_prices.sort()
-                l_filtered_prices.sort()
-
-                self._get_stats_data(l_counted_data[c_item_name][c_type]["all"], l_prices)
-                self._get_stats_data(l_counted_data[c_item_name][c_type]["filtered"], l_filtered_prices)
-        return l_counted_data
-
-    def _get_stats_data(self, p_data, p_prices):
+            yield c_realm, ((c_item_name, c_items["items"].values())
+                            for c_item_name, c_items in c_items_by_name.items())
+
+    def _aggregate_realms(self, p_realms: Iterator) -> Dict:
+        return {c_realm: dict(c_items) for c_realm, c_items in self._iter_aggregated_realms(p_realms)}
+
+    def _iter_aggregated_realms(self, p_realms: Iterator) -> Iterator:
+        """Yield (realm, items) where items yields (item name, data), to be consumed in order."""
+        for c_realm, c_items in p_realms:
+            yield c_realm, self._iter_aggregated_items(c_items)
+
+    def _iter_aggregated_items(self, p_items: Iterator) -> Iterator:
+        if self.m_use_numpy:
+            # Grouped by batch of items, so that memory follows the batch, not the realm
+            l_batch = []
+            l_batch_size = 0
+            for c_item_name, c_auctions in p_items:
+                l_auctions = list(c_auctions)
+                l_batch.append((c_item_name, l_auctions))
+                l_batch_size += len(l_auctions)
+                if l_batch_size >= NUMPY_BATCH_AUCTIONS:
+                    yield from self._iter_grouped_batch(l_batch)
+                    l_batch = []
+                    l_batch_size = 0
+            yield from self._iter_grouped_batch(l_batch)
+            return
+        for c_item_name, c_auctions in p_items:
+            l_item_auctions = ItemAuctions()
+            for c_auction in c_auctions:
+                l_item_auctions.add(c_auction)
+            yield c_item_name, self._get_item_data(c_item_name, l_item_auctions.get_counts_by_prices())
+
+    def _iter_grouped_batch(self, p_batch: List) -> Iterator:
+        l_grouped = numpy_aggregation.group_realm(p_batch)
+        for c_item_name, _ in p_batch:
+            yield c_item_name, self._get_item_data(c_item_name, l_grouped[c_item_name])
+
+    def _get_item_data(self, p_item_name, p_counts_by_prices_by_type):
+        l_metrics = self.m_metrics
+        l_metrics.count('items')
+        l_metrics.count('auctions', sum(c_price_data["auctions_count"] for c_price_data in
+                                        p_counts_by_prices_by_type.get("minBid", {}).values()))
+        with l_metrics.stage('convert.stats'):
+            return {c_type: self._get_type_data(p_item_name, c_type, c_counts_by_prices)
+                    for c_type, c_counts_by_prices in p_counts_by_prices_by_type.items()}
+
+    def _get_type_data(self, p_item_name, p_type, p_counts_by_prices):
+        l_type_data = {}
+        l_type_data["filtered"] = {}
+        l_type_data["all"] = {}
+
+        l_prices = PriceHistogram({c_price: c_price_data["item_count"]
+                                   for c_price, c_price_data in p_counts_by_prices.items()})
+        if len(l_prices) < 2:
+            print("---", p_item_name, p_type, "not enough prices")
+            return l_type_data
+
+        l_quartiles = l_prices.quantiles(n=4)
+        l_q1 = l_quartiles[0]
+        l_q3 = l_quartiles[2]
+        l_iqr = l_q3 - l_q1
+        l_lower_fence = l_q1 - 1.5 * l_iqr
+        l_upper_fence = l_q3 + 1.5 * l_iqr
+
+        l_filtered_counts = {}
+        for c_price, c_price_data in p_counts_by_prices.items():
+            if c_price < l_lower_fence:
+                p_counts_by_prices[c_price]["lower"] = True
+            elif c_price > l_upper_fence:
+                p_counts_by_prices[c_price]["upper"] = True
+            else:
+                l_filtered_counts[c_price] = c_price_data['item_count']
+        l_type_data["counts_by_prices"] = dict(p_counts_by_prices)
+
+        self._get_stats_data(l_type_data["all"], l_prices)
+        self._get_stats_data(l_type_data["filtered"], PriceHistogram(l_filtered_counts))
+        return l_type_data
+
+    def _get_stats_data(self, p_data, p_prices: PriceHistogram):
         p_data["count"] = len(p_prices)
         p_data["min"] = p_prices[0]
         p_data["max"] = p_prices[-1]
-        p_data["mean"] = statistics.mean(p_prices)
-        p_data["median"] = statistics.median(p_prices)
-        p_data["harmonic_mean"] = statistics.harmonic_mean(p_prices)
-        p_data["median_grouped"] = statistics.median_grouped(p_prices)
-        p_data["median_high"] = statistics.median_high(p_prices)
-        p_data["median_low"] = statistics.median_low(p_prices)
-        p_data["mode"] = statistics.mode(p_prices)
-        p_data["pstdev"] = statistics.pstdev(p_prices)
-        p_data["stdev"] = statistics.stdev(p_prices)
-        p_data["pvariance"] = statistics.pvariance(p_prices)
-        p_data["variance"] = statistics.variance(p_prices)
-        p_data["deciles"] = statistics.quantiles(p_prices, n=10)
-        p_data["quartiles"] = statistics.quantiles(p_prices, n=4)
+        p_data["mean"] = p_prices.mean()
+        p_data["median"] = p_prices.median()
+        p_data["harmonic_mean"] = p_prices.harmonic_mean()
+        p_data["median_grouped"] = p_prices.median_grouped()
+        p_data["median_high"] = p_prices.median_high()
+        p_data["median_low"] = p_prices.median_low()
+        p_data["mode"] = p_prices.mode()
+        p_data["pstdev"] = p_prices.pstdev()
+        p_data["stdev"] = p_prices.stdev()
+        p_data["pvariance"] = p_prices.pvariance()
+        p_data["variance"] = p_prices.variance()
+        p_data["deciles"] = p_prices.quantiles(n=10)
+        p_data["quartiles"] = p_prices.quantiles(n=4)
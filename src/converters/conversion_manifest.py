@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""Manifest of the Lua sources already converted to gen_dailies."""
+
+import hashlib
+from pathlib import Path
+from typing import Dict, Optional
+
+import yaml_io
+from metrics import Metrics
+
+
+class ConversionManifest:
+    """
+    Remember size, mtime and hash of each converted source file, plus the
+    converter version that produced its YAML.
+    """
+
+    FILENAME = 'manifest.yaml'
+
+    def __init__(self, p_output_base: Path, p_metrics: Optional[Metrics] = None):
+        """
+        Initialize manifest.
+
+        Args:
+            p_output_base: gen_dailies directory holding the manifest
+            p_metrics: Times the manifest load and save
+        """
+        self.m_filename = p_output_base / self.FILENAME
+        self.m_metrics = p_metrics or Metrics()
+        self.m_entries: Dict[str, Dict] = {}
+        self.m_pending: Dict[str, Dict] = {}
+        if self.m_filename.exists():
+            self.m_entries = yaml_io.load_file(self.m_filename, self.m_metrics) or {}
+
+    def save(self) -> None:
+        self.m_filename.parent.mkdir(parents=True, exist_ok=True)
+        yaml_io.dump_file(self.m_entries, self.m_filename, p_metrics=self.m_metrics)
+
+    def is_up_to_date(self, p_key: str, p_source: Path, p_output: Path, p_version: int) -> bool:
+        """
+        Tell whether p_output was produced from the current p_source by
+        converter p_version. Size and mtime are checked first, the file is
+        only hashed when they changed.
+        """
+        l_stat = p_source.stat()
+        l_entry = self.m_entries.get(p_key)
+        l_hash = None
+        if l_entry and l_entry.get("converter_version") == p_version \
+                and l_entry.get("size") == l_stat.st_size and p_output.exists():
+            if l_entry.get("mtime_ns") == l_stat.st_mtime_ns:
+                return True
+            l_hash = self._hash(p_source)
+            if l_hash == l_entry.get("sha256"):
+                l_entry["mtime_ns"] = l_stat.st_mtime_ns
+                return True
+        self.m_pending[p_key] = {
+            "size": l_stat.st_size,
+            "mtime_ns": l_stat.st_mtime_ns,
+            "sha256": l_hash or self._hash(p_source),
+            "converter_version": p_version,
+        }
+        return False
+
+    def record(self, p_key: str) -> None:
+        """Store the fingerprint taken by is_up_to_date() once converted."""
+        l_entry = self.m_pending.pop(p_key, None)
+        if l_entry is not None:
+            self.m_entries[p_key] = l_entry
+
+    def _hash(self, p_source: Path) -> str:
+        l_hash = hashlib.sha256()
+        with open(p_source, 'rb') as l_file:
+            for c_chunk in iter(lambda: l_file.read(1 << 20), b''):
+                l_hash.update(c_chunk)
+        return l_hash.hexdigest()
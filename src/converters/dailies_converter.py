@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""Convert every snapshot directory of dailies to YAML."""
+
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional
+
+from .ahscanner_converter import AHScannerConverter
+from .conversion_manifest import ConversionManifest
+import metrics
+
+
+FILES_TO_CONVERT = [
+    ('AHScanner.lua', AHScannerConverter),
+]
+
+
+class SnapshotResult(NamedTuple):
+    """Outcome of the conversion of one snapshot directory."""
+    name: str
+    converted: int
+    seconds: float
+    error: Optional[str]
+    metrics: Optional[Dict] = None
+
+
+def convert_snapshot(p_subdir: Path, p_output_dir: Path) -> SnapshotResult:
+    """
+    Convert all supported Lua files of one snapshot directory.
+
+    Module level so that it can be sent to a process pool. Errors are
+    returned rather than raised so that one bad snapshot does not abort
+    the batch, metrics are returned for the caller to merge.
+    """
+    l_metrics = metrics.Metrics()
+    with l_metrics.stage('convert.snapshot'):
+        l_result = _convert_snapshot(p_subdir, p_output_dir, l_metrics)
+    add_parse_time(l_metrics)
+    return l_result._replace(metrics=l_metrics.get_data())
+
+
+def add_parse_time(p_metrics: metrics.Metrics) -> None:
+    """
+    Record stage convert.parse_group: the streaming parser interleaves Lua
+    reading, walk and auction grouping, timed together as what is left of
+    convert.snapshot once stats and YAML dump are taken out.
+    """
+    l_seconds, l_cpu_seconds = p_metrics.get_time('convert.snapshot')
+    for c_name in ('convert.stats', 'yaml.dump'):
+        l_inner_seconds, l_inner_cpu_seconds = p_metrics.get_time(c_name)
+        l_seconds -= l_inner_seconds
+        l_cpu_seconds -= l_inner_cpu_seconds
+    p_metrics.add_time('convert.parse_group', l_seconds, l_cpu_seconds)
+
+
+def _convert_snapshot(p_subdir: Path, p_output_dir: Path, p_metrics: metrics.Metrics) -> SnapshotResult:
+    l_start = time.perf_counter()
+    l_converted_count = 0
+    try:
+        for l_filename, l_converter_class in FILES_TO_CONVERT:
+            l_file_path = p_subdir / l_filename
+            if not l_file_path.exists():
+                print(f"=== Warning: {l_filename} in {p_subdir.name} (not found)")
+                p_metrics.count('warnings')
+                continue
+
+            l_converter = l_converter_class(l_file_path, p_metrics=p_metrics)
+            l_output_path = p_output_dir / l_filename.replace('.lua', '.yaml')
+            if l_converter.convert(l_output_path):
+                l_converted_count += 1
+    except Exception as l_error:
+        return SnapshotResult(p_subdir.name, l_converted_count,
+                              time.perf_counter() - l_start, str(l_error))
+    return SnapshotResult(p_subdir.name, l_converted_count, time.perf_counter() - l_start, None)
+
+
+class DailiesConverter:
+    """Convert the snapshot subdirectories of dailies, optionally in parallel."""
+
+    def __init__(self, p_dailies_dir: Path, p_output_base: Path, p_jobs: int = 1, p_force: bool = False,
+                 p_metrics: Optional[metrics.Metrics] = None):
+        """
+        Initialize converter.
+
+        Args:
+            p_dailies_dir: Directory containing one subdirectory per snapshot
+            p_output_base: Directory receiving gen_dailies/<snapshot>/
+            p_jobs: Number of worker processes, 0 for one per core
+            p_force: Convert snapshots even if the manifest says they are up to date
+            p_metrics: Receives the stages and counters of every snapshot
+        """
+        self.m_dailies_dir = p_dailies_dir
+        self.m_metrics = p_metrics or metrics.Metrics()
+        self.m_output_base = p_output_base
+        self.m_jobs = p_jobs if p_jobs > 0 else (os.cpu_count() or 1)
+        self.m_force = p_force
+        self.m_manifest = ConversionManifest(p_output_base, self.m_metrics)
+        self.m_results: List[SnapshotResult] = []
+
+    def get_subdirs(self) -> List[Path]:
+        """Snapshot directories, '_' prefixed ones are ignored by the converters."""
+        return sorted(c_path for c_path in self.m_dailies_dir.iterdir()
+                      if c_path.is_dir() and not c_path.name.startswith('_'))
+
+    def get_outdated_subdirs(self) -> List[Path]:
+        """
+        Snapshot directories with a source new or changed since last
+        conversion, all of them with force. Every snapshot is fingerprinted
+        either way, so that a forced run also repairs the manifest.
+        """
+        return [c_subdir for c_subdir in self.get_subdirs()
+                if self._is_outdated(c_subdir) or self.m_force]
+
+    def convert_all(self, p_subdirs: Optional[List[Path]] = None) -> List[SnapshotResult]:
+        """Convert snapshots and return their results sorted by name."""
+        if p_subdirs is None:
+            l_all_count = len(self.get_subdirs())
+            p_subdirs = self.get_outdated_subdirs()
+            print(f"--- {l_all_count - len(p_subdirs)} snapshot(s) up to date, {len(p_subdirs)} to convert")
+        self.m_results = []
+        l_start = time.perf_counter()
+        with self.m_metrics.stage('convert'):
+            self._convert(p_subdirs)
+        self.m_results.sort(key=lambda c_result: c_result.name)
+        self.m_manifest.save()
+        self._print_summary(time.perf_counter() - l_start)
+        return self.m_results
+
+    def _convert(self, p_subdirs: List[Path]) -> None:
+        if self.m_jobs == 1 or len(p_subdirs) < 2:
+            for c_subdir in p_subdirs:
+                self._report(convert_snapshot(c_subdir, self.m_output_base / c_subdir.name), len(p_subdirs))
+        else:
+            with ProcessPoolExecutor(max_workers=min(self.m_jobs, len(p_subdirs))) as l_pool:
+                l_futures = {
+                    l_pool.submit(convert_snapshot, c_subdir, self.m_output_base / c_subdir.name): c_subdir
+                    for c_subdir in p_subdirs
+                }
+                for c_future in as_completed(l_futures):
+                    try:
+                        l_result = c_future.result()
+                    except Exception as l_error:
+                        l_result = SnapshotResult(l_futures[c_future].name, 0, 0.0, str(l_error))
+                    self._report(l_result, len(p_subdirs))
+
+    def get_converted_count(self) -> int:
+        return sum(c_result.converted for c_result in self.m_results)
+
+    def get_failed(self) -> List[SnapshotResult]:
+        return [c_result for c_result in self.m_results if c_result.error]
+
+    def _is_outdated(self, p_subdir: Path) -> bool:
+        l_outdated = False
+        for l_filename, l_converter_class in FILES_TO_CONVERT:
+            l_source = p_subdir / l_filename
+            if not l_source.exists():
+                continue
+            l_output = self.m_output_base / p_subdir.name / l_filename.replace('.lua', '.yaml')
+            if not self.m_manifest.is_up_to_date(f"{p_subdir.name}/{l_filename}", l_source,
+                                                 l_output, l_converter_class.VERSION):
+                l_outdated = True
+        return l_outdated
+
+    def _report(self, p_result: SnapshotResult, p_total: int) -> None:
+        self.m_results.append(p_result)
+        l_metrics = self.m_metrics
+        if p_result.metrics:
+            l_metrics.merge(p_result.metrics)
+        l_progress = f"[{len(self.m_results)}/{p_total}]"
+        if p_result.error:
+            l_metrics.count('errors')
+            print("***", f"{l_progress} {p_result.name} failed: {p_result.error}", file=sys.stderr)
+            return
+        for l_filename, _ in FILES_TO_CONVERT:
+            self.m_manifest.record(f"{p_result.name}/{l_filename}")
+        l_metrics.count('snapshots_converted')
+        print(f"--- {l_progress} {p_result.name} converted in {p_result.seconds:.2f}s")
+
+    def _print_summary(self, p_elapsed: float) -> None:
+        l_cpu_time = sum(c_result.seconds for c_result in self.m_results)
+        print(f"--- {len(self.m_results)} snapshot(s) in {p_elapsed:.2f}s "
+              f"({l_cpu_time:.2f}s of conversion, {self.m_jobs} job(s))")
+        if self.m_results:
+            l_slowest = max(self.m_results, key=lambda c_result: c_result.seconds)
+            print(f"--- Slowest: {l_slowest.name} ({l_slowest.seconds:.2f}s)")
+        for c_result in self.get_failed():
+            print("***", f"Failed: {c_result.name}: {c_result.error}", file=sys.stderr)
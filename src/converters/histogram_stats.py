@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""Statistics of a (price, count) histogram, equal to the statistics module on the expanded data."""
+
+import math
+import sys
+from bisect import bisect_right
+from fractions import Fraction
+from itertools import accumulate
+from statistics import StatisticsError
+from typing import Dict, List, Union
+
+
+Number = Union[int, float]
+
+# For 53 bit precision floats, as statistics._float_sqrt_of_frac()
+_SQRT_BIT_WIDTH = 2 * sys.float_info.mant_dig + 3
+
+
+def _integer_sqrt_of_frac_rto(p_numerator: int, p_denominator: int) -> int:
+    """Square root of n/m, rounded to the nearest integer using round-to-odd."""
+    l_root = math.isqrt(p_numerator // p_denominator)
+    return l_root | (l_root * l_root * p_denominator != p_numerator)
+
+
+def _float_sqrt_of_frac(p_numerator: int, p_denominator: int) -> float:
+    """Square root of n/m as a float, correctly rounded, as statistics.stdev() does."""
+    l_shift = (p_numerator.bit_length() - p_denominator.bit_length() - _SQRT_BIT_WIDTH) // 2
+    if l_shift >= 0:
+        l_root = _integer_sqrt_of_frac_rto(p_numerator, p_denominator << 2 * l_shift) << l_shift
+        l_divisor = 1
+    else:
+        l_root = _integer_sqrt_of_frac_rto(p_numerator << -2 * l_shift, p_denominator)
+        l_divisor = 1 << -l_shift
+    return l_root / l_divisor
+
+
+def _convert(p_value: Fraction, p_type: type) -> Number:
+    """Exact result to the data type, as statistics._convert()."""
+    if p_type is int and p_value.denominator != 1:
+        return float(p_value)
+    return p_type(p_value)
+
+
+class PriceHistogram:
+    """
+    Prices with their item count, sorted once.
+
+    Each method returns exactly what the statistics function of the same
+    name returns on the list where every price is repeated count times,
+    without building that list: sums are exact and taken in one pass over
+    distinct prices, order statistics are found by bisection on the
+    cumulative counts.
+    """
+
+    def __init__(self, p_counts: Dict[Number, int]):
+        """
+        Build the histogram.
+
+        Args:
+            p_counts: {price: item count}, counts must be positive
+        """
+        self.m_prices: List[Number] = sorted(p_counts)
+        self.m_counts: List[int] = [p_counts[c_price] for c_price in self.m_prices]
+        self.m_ends: List[int] = list(accumulate(self.m_counts))
+        self.m_count = self.m_ends[-1] if self.m_ends else 0
+        self.m_type = float if any(isinstance(c_price, float) for c_price in self.m_prices) else int
+
+        l_sum = 0
+        l_sum_of_squares = 0
+        l_sum_of_inverses = Fraction(0)
+        self.m_has_zero = False
+        for c_price, c_count in zip(self.m_prices, self.m_counts):
+            l_price = Fraction(c_price) if self.m_type is float else c_price
+            l_sum += l_price * c_count
+            l_sum_of_squares += l_price * l_price * c_count
+            if c_price == 0:
+                self.m_has_zero = True
+            else:
+                # statistics sums the float 1 / x, not the exact inverse
+                l_sum_of_inverses += Fraction(1 / c_price) * c_count
+        self.m_sum = Fraction(l_sum)
+        self.m_sum_of_inverses = l_sum_of_inverses
+        l_count = self.m_count
+        self.m_sum_of_squared_deviations = \
+            Fraction(l_count * l_sum_of_squares - l_sum * l_sum, l_count) if l_count else Fraction(0)
+
+    def __len__(self) -> int:
+        return self.m_count
+
+    def __getitem__(self, p_index: int) -> Number:
+        """Value at p_index of the sorted expanded data."""
+        if p_index < 0:
+            p_index += self.m_count
+        if not 0 <= p_index < self.m_count:
+            raise IndexError("list index out of range")
+        return self.m_prices[bisect_right(self.m_ends, p_index)]
+
+    def min(self) -> Number:
+        return self.m_prices[0]
+
+    def max(self) -> Number:
+        return self.m_prices[-1]
+
+    def mean(self) -> Number:
+        if self.m_count < 1:
+            raise StatisticsError('mean requires at least one data point')
+        return _convert(self.m_sum / self.m_count, self.m_type)
+
+    def harmonic_mean(self) -> Number:
+        if self.m_count < 1:
+            raise StatisticsError('harmonic_mean requires at least one data point')
+        if self.m_prices[0] < 0:
+            raise StatisticsError('harmonic mean does not support negative values')
+        if self.m_count == 1:
+            return self.m_prices[0]
+        if self.m_has_zero:
+            return 0
+        return float(self.m_count / self.m_sum_of_inverses)
+
+    def median(self) -> Number:
+        self._check_not_empty("no median for empty data")
+        l_index = self.m_count // 2
+        if self.m_count % 2 == 1:
+            return self[l_index]
+        return (self[l_index - 1] + self[l_index]) / 2
+
+    def median_low(self) -> Number:
+        self._check_not_empty("no median for empty data")
+        if self.m_count % 2 == 1:
+            return self[self.m_count // 2]
+        return self[self.m_count // 2 - 1]
+
+    def median_high(self) -> Number:
+        self._check_not_empty("no median for empty data")
+        return self[self.m_count // 2]
+
+    def median_grouped(self, p_interval: float = 1.0) -> float:
+        self._check_not_empty("no median for empty data")
+        l_position = bisect_right(self.m_ends, self.m_count // 2)
+        l_interval = float(p_interval)
+        l_value = float(self.m_prices[l_position])
+        l_lower_limit = l_value - l_interval / 2.0
+        l_cumulative = self.m_ends[l_position] - self.m_counts[l_position]
+        l_frequency = self.m_counts[l_position]
+        return l_lower_limit + l_interval * (self.m_count / 2 - l_cumulative) / l_frequency
+
+    def mode(self) -> Number:
+        """Most common price, the lowest one on ties as statistics.mode() on sorted data."""
+        if not self.m_count:
+            raise StatisticsError('no mode for empty data')
+        l_max_count = max(self.m_counts)
+        return self.m_prices[self.m_counts.index(l_max_count)]
+
+    def pvariance(self) -> Number:
+        if self.m_count < 1:
+            raise StatisticsError('pvariance requires at least one data point')
+        return _convert(self.m_sum_of_squared_deviations / self.m_count, self.m_type)
+
+    def variance(self) -> Number:
+        if self.m_count < 2:
+            raise StatisticsError('variance requires at least two data points')
+        return _convert(self.m_sum_of_squared_deviations / (self.m_count - 1), self.m_type)
+
+    def pstdev(self) -> float:
+        if self.m_count < 1:
+            raise StatisticsError('pstdev requires at least one data point')
+        l_mss = self.m_sum_of_squared_deviations / self.m_count
+        return _float_sqrt_of_frac(l_mss.numerator, l_mss.denominator)
+
+    def stdev(self) -> float:
+        if self.m_count < 2:
+            raise StatisticsError('stdev requires at least two data points')
+        l_mss = self.m_sum_of_squared_deviations / (self.m_count - 1)
+        return _float_sqrt_of_frac(l_mss.numerator, l_mss.denominator)
+
+    def quantiles(self, n: int = 4) -> List[Number]:
+        """Cut points of statistics.quantiles(), 'exclusive' method."""
+        if n < 1:
+            raise StatisticsError('n must be at least 1')
+        l_length = self.m_count
+        if l_length < 2:
+            raise StatisticsError('must have at least two data points')
+        l_m = l_length + 1
+        l_result = []
+        for c_i in range(1, n):
+            l_j = c_i * l_m // n
+            l_j = 1 if l_j < 1 else l_length - 1 if l_j > l_length - 1 else l_j
+            l_delta = c_i * l_m - l_j * n
+            l_result.append((self[l_j - 1] * (n - l_delta) + self[l_j] * l_delta) / n)
+        return l_result
+
+    def _check_not_empty(self, p_message: str) -> None:
+        if not self.m_count:
+            raise StatisticsError(p_message)
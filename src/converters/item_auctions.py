@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""Compact columnar storage of the auctions of one item."""
+
+from array import array
+from typing import Dict, List, Union
+
+
+Number = Union[int, float]
+
+
+class ItemAuctions:
+    """
+    Auctions of one item, one column per field.
+
+    Only the fields the aggregation reads are kept: the unit prices, whose
+    int or float type is preserved, and the stack size. Seller, bidder,
+    quality, level and raw prices are not used by anything downstream.
+    """
+
+    __slots__ = ('m_buyout_units', 'm_min_bid_units', 'm_counts')
+
+    def __init__(self):
+        self.m_buyout_units: List[Number] = []
+        self.m_min_bid_units: List[Number] = []
+        self.m_counts = array('q')
+
+    def __len__(self) -> int:
+        return len(self.m_counts)
+
+    def add(self, p_auction: Dict) -> None:
+        """Add one auction as read from AHScanner.lua."""
+        self.m_buyout_units.append(p_auction["buyoutUnit"])
+        self.m_min_bid_units.append(p_auction["minBidUnit"])
+        self.m_counts.append(p_auction.get('count', 0))
+
+    def get_counts_by_prices(self) -> Dict[str, Dict]:
+        """
+        {"buyout": counts_by_prices, "minBid": counts_by_prices}, {} without auction.
+
+        Every auction counts in "minBid" at its minBidUnit, and in "buyout"
+        at its buyoutUnit unless it has none. Prices are in order of first
+        appearance, prices without item are left out.
+        """
+        if not self.m_counts:
+            return {}
+        l_buyouts = {}
+        l_min_bids = {}
+        for c_buyout_unit, c_min_bid_unit, c_count in zip(self.m_buyout_units, self.m_min_bid_units, self.m_counts):
+            if c_buyout_unit != 0:
+                self._add_count(l_buyouts, c_buyout_unit, c_count)
+            self._add_count(l_min_bids, c_min_bid_unit, c_count)
+        return {
+            "buyout": self._get_counts_by_prices(l_buyouts),
+            "minBid": self._get_counts_by_prices(l_min_bids),
+        }
+
+    @staticmethod
+    def _add_count(p_counts: Dict[Number, List[int]], p_price: Number, p_count: int) -> None:
+        l_counts = p_counts.get(p_price)
+        if l_counts is None:
+            p_counts[p_price] = [p_count, 1]
+        else:
+            l_counts[0] += p_count
+            l_counts[1] += 1
+
+    @staticmethod
+    def _get_counts_by_prices(p_counts: Dict[Number, List[int]]) -> Dict[Number, Dict]:
+        return {c_price: {"item_count": c_item_count, "auctions_count": c_auctions_count}
+                for c_price, (c_item_count, c_auctions_count) in p_counts.items() if c_item_count > 0}
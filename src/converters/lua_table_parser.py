@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""Streaming parser for SavedVariables Lua table literals."""
+
+import re
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+
+TABLE = object()
+
+_OPEN = 0
+_CLOSE = 1
+_VALUE = 2
+
+_LINE_RE = re.compile(r'''
+    \s*
+    (?:\[(?:"(?P<skey>(?:[^"\\]|\\.)*)"|(?P<nkey>-?\d+))\]\s*=\s*
+      |(?P<name>[A-Za-z_]\w*)\s*=\s*)?
+    (?:(?P<open>\{)(?P<empty>\s*\})?
+      |(?P<close>\})
+      |"(?P<str>(?:[^"\\]|\\.)*)"
+      |(?P<num>[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)
+      |(?P<bool>true|false)
+      |(?P<nil>nil))?
+    \s*[,;]?\s*(?:--.*)?\s*
+''', re.VERBOSE)
+
+# Fast path for the '["key"] = "string"|integer,' lines that make up most
+# of a SavedVariables file.
+_ENTRY_RE = re.compile(r'\s*\["([^"\\]*)"\] = (?:"([^"\\]*)"|(-?\d+)),\s*')
+
+# A whole one-level record, one '["key"] = value,' line per field, matched
+# at once. Records using any other syntax go through the line parser.
+_FIELD = r'[ \t]*\["[^"\\\n]*"\] = (?:"[^"\\\n]*"|-?\d+(?:\.\d+)?|true|false),[ \t]*\n'
+_RECORD_RE = re.compile(r'[ \t]*\{[ \t]*\n((?:' + _FIELD + r')*)[ \t]*\},?[ \t]*(?:-- \[\d+\])?[ \t]*\n')
+_FIELD_FORMAT = r'\["({})"\] = (?:"([^"\\\n]*)"|(-?\d+)|([^,\n]+)),'.format
+_FIELD_RE = re.compile(_FIELD_FORMAT(r'[^"\\\n]*'))
+_LITERALS = {'true': True, 'false': False}
+
+# Characters read at once, and kept ahead of a record match
+CHUNK_SIZE = 1 << 20
+RECORD_LOOKAHEAD = 1 << 16
+
+_ESCAPE_RE = re.compile(r'\\(\d{1,3}|.)', re.DOTALL)
+_ESCAPES = {
+    'n': '\n', 't': '\t', 'r': '\r', 'a': '\a', 'b': '\b',
+    'f': '\f', 'v': '\v', '\\': '\\', '"': '"', "'": "'", '\n': '\n',
+}
+
+
+def _unescape(p_value: str) -> str:
+    """Decode Lua string escapes."""
+    if '\\' not in p_value:
+        return p_value
+
+    def _replace(p_match):
+        l_escape = p_match.group(1)
+        if l_escape.isdigit():
+            return chr(int(l_escape))
+        return _ESCAPES.get(l_escape, l_escape)
+    return _ESCAPE_RE.sub(_replace, p_value)
+
+
+def _to_literal(p_value: str) -> Any:
+    """Convert a float or boolean literal matched by _FIELD_RE."""
+    return _LITERALS[p_value] if p_value in _LITERALS else float(p_value)
+
+
+def _to_number(p_value: str) -> Any:
+    """Convert a Lua number literal the way lupa does."""
+    try:
+        return int(p_value)
+    except ValueError:
+        return float(p_value)
+
+
+class LuaTableParser:
+    """
+    Parse the one-entry-per-line table literal written by WoW SavedVariables.
+
+    The file is read a chunk at a time and tables are only materialized
+    when asked for, so callers can walk huge tables without building them.
+    """
+
+    def __init__(self, p_file_path: Path):
+        """
+        Initialize parser.
+
+        Args:
+            p_file_path: Path to Lua file
+        """
+        self.m_file_path = p_file_path
+        self.m_file = None
+        self.m_buffer = ''
+        self.m_position = 0
+        self.m_eof = False
+        # Lines before the start of m_buffer
+        self.m_line_number = 0
+        self.m_depth = 0
+
+    def __enter__(self) -> 'LuaTableParser':
+        self.m_file = open(self.m_file_path, 'r', encoding='utf-8')
+        self.m_buffer = ''
+        self.m_position = 0
+        self.m_eof = False
+        self.m_line_number = 0
+        self.m_depth = 0
+        return self
+
+    def __exit__(self, *p_args) -> None:
+        self.m_file.close()
+        self.m_file = None
+
+    def open_global(self, p_global_var: str) -> None:
+        """Move to the opening line of 'p_global_var = {'."""
+        while True:
+            l_line = self._read_line()
+            if l_line is None:
+                raise ValueError(f"*** Error: {p_global_var} not found in Lua file")
+            l_key, l_kind, _ = l_line
+            if l_key == p_global_var and l_kind == _OPEN:
+                self.m_depth += 1
+                return
+            if l_kind == _OPEN:
+                self.m_depth += 1
+                self.skip_table()
+
+    def iter_entries(self) -> Iterator[Tuple[Any, Any]]:
+        """
+        Iterate over the entries of the table just opened.
+
+        Yields (key, value) pairs. Nested tables are yielded as TABLE and
+        are skipped if the caller does not consume them with
+        iter_entries(), read_table() or skip_table().
+        """
+        l_depth = self.m_depth
+        l_index = 0
+        while True:
+            l_key, l_kind, l_value = self._next_line()
+            if l_kind == _CLOSE:
+                self.m_depth -= 1
+                return
+            if l_key is None:
+                l_index += 1
+                l_key = l_index
+            if l_kind == _OPEN:
+                self.m_depth += 1
+                yield l_key, TABLE
+                if self.m_depth > l_depth:
+                    self.skip_table()
+            elif l_value is not None:
+                yield l_key, l_value
+
+    def iter_records(self, p_keys: Optional[Tuple[str, ...]] = None) -> Iterator[Dict]:
+        """
+        Iterate over the tables of the table just opened, materialized.
+
+        Values that are not tables are skipped. Same result as read_table()
+        on each TABLE of iter_entries(), one regex match per record.
+
+        Args:
+            p_keys: Only keep these fields of each record, None for all
+        """
+        l_match_record = _RECORD_RE.match
+        if p_keys is None:
+            l_find_fields = _FIELD_RE.findall
+        else:
+            l_find_fields = re.compile(_FIELD_FORMAT('|'.join(re.escape(c_key) for c_key in p_keys))).findall
+        while True:
+            if len(self.m_buffer) - self.m_position < RECORD_LOOKAHEAD and not self.m_eof:
+                self._fill()
+            l_match = l_match_record(self.m_buffer, self.m_position)
+            if l_match is not None:
+                self.m_position = l_match.end()
+                yield {c_key: int(c_integer) if c_integer else _to_literal(c_other) if c_other else c_string
+                       for c_key, c_string, c_integer, c_other in l_find_fields(l_match.group(1))}
+                continue
+            _, l_kind, _ = self._next_line()
+            if l_kind == _CLOSE:
+                self.m_depth -= 1
+                return
+            if l_kind == _OPEN:
+                self.m_depth += 1
+                l_table = self.read_table()
+                if p_keys is not None:
+                    l_table = {c_key: c_value for c_key, c_value in l_table.items() if c_key in p_keys}
+                yield l_table
+
+    def read_table(self) -> Dict:
+        """Materialize the table just opened."""
+        l_result = {}
+        l_index = 0
+        l_match_entry = _ENTRY_RE.fullmatch
+        while True:
+            l_line = self._read_raw_line()
+            if l_line is None:
+                break
+            l_match = l_match_entry(l_line)
+            if l_match is not None:
+                l_key, l_str, l_int = l_match.groups()
+                l_result[l_key] = int(l_int) if l_str is None else l_str
+                continue
+            l_parsed = self._parse_line(l_line)
+            if l_parsed is None:
+                continue
+            l_key, l_kind, l_value = l_parsed
+            if l_kind == _CLOSE:
+                self.m_depth -= 1
+                return l_result
+            if l_key is None:
+                l_index += 1
+                l_key = l_index
+            if l_kind == _OPEN:
+                self.m_depth += 1
+                l_value = self.read_table()
+            if l_value is not None:
+                l_result[l_key] = l_value
+        raise ValueError(f"*** Error: Unexpected end of file: {self.m_file_path}")
+
+    def skip_table(self) -> None:
+        """Skip the rest of the table just opened, only following its braces."""
+        l_depth = 1
+        while l_depth:
+            l_line = self._read_raw_line()
+            if l_line is None:
+                raise ValueError(f"*** Error: Unexpected end of file: {self.m_file_path}")
+            l_line = l_line.strip()
+            if l_line.startswith('}'):
+                l_depth -= 1
+            elif l_line.endswith('{'):
+                l_depth += 1
+        self.m_depth -= 1
+
+    def _next_line(self) -> Tuple[Any, int, Any]:
+        l_line = self._read_line()
+        if l_line is None:
+            raise ValueError(f"*** Error: Unexpected end of file: {self.m_file_path}")
+        return l_line
+
+    def _read_line(self) -> Optional[Tuple[Any, int, Any]]:
+        """Return (key, kind, value) for the next non empty line."""
+        while True:
+            l_line = self._read_raw_line()
+            if l_line is None:
+                return None
+            l_parsed = self._parse_line(l_line)
+            if l_parsed is not None:
+                return l_parsed
+
+    def _read_raw_line(self) -> Optional[str]:
+        """Next line of the file, None at its end."""
+        while True:
+            l_end = self.m_buffer.find('\n', self.m_position)
+            if l_end >= 0:
+                l_line = self.m_buffer[self.m_position:l_end + 1]
+                self.m_position = l_end + 1
+                return l_line
+            if self.m_eof:
+                if self.m_position == len(self.m_buffer):
+                    return None
+                l_line = self.m_buffer[self.m_position:]
+                self.m_position = len(self.m_buffer)
+                return l_line
+            self._fill()
+
+    def _fill(self) -> None:
+        """Drop the consumed part of the buffer and append the next chunk."""
+        self.m_line_number += self.m_buffer.count('\n', 0, self.m_position)
+        l_chunk = self.m_file.read(CHUNK_SIZE)
+        self.m_buffer = self.m_buffer[self.m_position:] + l_chunk
+        self.m_position = 0
+        self.m_eof = not l_chunk
+
+    def _get_line_number(self) -> int:
+        """Number of the last line read."""
+        return self.m_line_number + self.m_buffer.count('\n', 0, self.m_position)
+
+    def _parse_line(self, p_line: str) -> Optional[Tuple[Any, int, Any]]:
+        """Parse one line, None for blank and comment lines."""
+        l_line = p_line.strip()
+        if l_line == '{':
+            return None, _OPEN, None
+        if l_line == '},' or l_line.startswith('}, -- ['):
+            return None, _CLOSE, None
+        l_match = _LINE_RE.fullmatch(l_line)
+        if l_match is None:
+            raise ValueError(f"*** Error: Unsupported Lua syntax at "
+                             f"{self.m_file_path}:{self._get_line_number()}")
+        l_groups = l_match.groupdict()
+        l_key = l_groups['skey']
+        if l_key is not None:
+            l_key = _unescape(l_key)
+        elif l_groups['nkey'] is not None:
+            l_key = int(l_groups['nkey'])
+        else:
+            l_key = l_groups['name']
+
+        if l_groups['open'] is not None:
+            if l_groups['empty'] is not None:
+                return l_key, _VALUE, {}
+            return l_key, _OPEN, None
+        if l_groups['close'] is not None:
+            return l_key, _CLOSE, None
+        if l_groups['str'] is not None:
+            return l_key, _VALUE, _unescape(l_groups['str'])
+        if l_groups['num'] is not None:
+            return l_key, _VALUE, _to_number(l_groups['num'])
+        if l_groups['bool'] is not None:
+            return l_key, _VALUE, l_groups['bool'] == 'true'
+        if l_groups['nil'] is not None:
+            return l_key, _VALUE, None
+        if l_key is not None:
+            raise ValueError(f"*** Error: Missing value at "
+                             f"{self.m_file_path}:{self._get_line_number()}")
+        return None
@@ -5,21 +5,25 @@ from pathlib import Path
 from typing import Any, Optional
 
 from lupa import LuaRuntime
-import yaml
+
+import yaml_io
+from metrics import Metrics
 
 
 class LuaToYamlConverter:
     """Base class for converting Lua files to YAML."""
 
-    def __init__(self, p_file_path: Path, p_global_var: str):
+    def __init__(self, p_file_path: Path, p_global_var: str, p_metrics: Optional[Metrics] = None):
         """
         Initialize converter.
 
         Args:
             p_file_path: Path to Lua file
             p_global_var: Name of global variable to extract
+            p_metrics: Receives the conversion timings and counters
         """
         self.m_file_path = p_file_path
+        self.m_metrics = p_metrics or Metrics()
         self.m_global_var = p_global_var
         self.m_lua = None
         self.m_python_data = None
@@ -61,6 +65,19 @@ class LuaToYamlConverter:
             l_result[l_py_key] = l_py_val
         return l_result
 
+    def convert(self, p_output_path: Optional[Path] = None) -> bool:
+        """
+        Load the Lua file and save it as YAML.
+
+        Args:
+            p_output_path: Output path (default: same as input with .yaml)
+
+        Returns:
+            True if a file was written
+        """
+        self.load()
+        return self.save_yaml(p_output_path)
+
     def save_yaml(self, p_output_path: Optional[Path] = None) -> None:
         """
         Save data as YAML file.
@@ -73,6 +90,5 @@ class LuaToYamlConverter:
         if p_output_path is None:
             p_output_path = self.m_file_path.with_suffix('.yaml')
         p_output_path.parent.mkdir(parents=True, exist_ok=True)
-        with open(p_output_path, 'w', encoding='utf-8') as l_file:
-            yaml.dump(self.m_python_data, l_file, default_flow_style=False, allow_unicode=True)
+        yaml_io.dump_file(self.m_python_data, p_output_path, p_metrics=self.m_metrics)
         return True
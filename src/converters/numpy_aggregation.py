@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""Vectorized grouping of a realm's auctions, used when NumPy is installed."""
+
+from typing import Dict, Iterable, Iterator, Tuple
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+def is_available() -> bool:
+    return numpy is not None
+
+
+def group_realm(p_items: Iterable[Tuple[str, Iterator[Dict]]]) -> Dict[str, Dict[str, Dict]]:
+    """
+    Group the auctions of one realm by item, type and unit price.
+
+    Returns {item name: {"buyout": counts_by_prices, "minBid": counts_by_prices}}
+    where counts_by_prices is {price: {"item_count", "auctions_count"}} in
+    order of first appearance, as the pure-Python path builds it. Every
+    auction counts in "minBid" at its minBidUnit, and in "buyout" at its
+    buyoutUnit when it has one. Items without auction map to {}.
+
+    Args:
+        p_items: (item name, auctions) pairs of the realm
+    """
+    l_names = []
+    l_lengths = []
+    l_buyouts = []
+    l_min_bids = []
+    l_counts = []
+    for c_item_name, c_auctions in p_items:
+        l_auctions = list(c_auctions)
+        l_names.append(c_item_name)
+        l_lengths.append(len(l_auctions))
+        l_buyouts += [c_auction["buyoutUnit"] for c_auction in l_auctions]
+        l_min_bids += [c_auction["minBidUnit"] for c_auction in l_auctions]
+        l_counts += [c_auction.get('count', 0) for c_auction in l_auctions]
+
+    l_result = {c_name: {} for c_name in l_names}
+    if not l_buyouts:
+        return l_result
+
+    l_items = numpy.repeat(numpy.arange(len(l_names), dtype=numpy.int64), l_lengths)
+    l_buyouts_array, l_buyouts_float = _get_prices(l_buyouts)
+    l_min_bids_array, l_min_bids_float = _get_prices(l_min_bids)
+    l_counts_array = numpy.array(l_counts, dtype=numpy.int64)
+
+    # Every item with an auction has both types, even if one ends up empty
+    for c_item_index in numpy.unique(l_items).tolist():
+        l_result[l_names[c_item_index]] = {"buyout": {}, "minBid": {}}
+
+    l_has_buyout = l_buyouts_array != 0
+    for c_type, c_mask, c_prices, c_is_float in (
+            ("buyout", l_has_buyout, l_buyouts_array, l_buyouts_float),
+            ("minBid", numpy.ones(len(l_items), dtype=bool), l_min_bids_array, l_min_bids_float)):
+        l_indexes = numpy.flatnonzero(c_mask)
+        if not len(l_indexes):
+            continue
+        _group_type(l_result, l_names, c_type, l_indexes, l_items, c_prices, c_is_float, l_counts_array)
+    return l_result
+
+
+def _get_prices(p_prices: list) -> Tuple:
+    """Return the prices as floats, and which of them were floats rather than ints."""
+    l_prices = numpy.array(p_prices)
+    if l_prices.dtype.kind != 'f':
+        return l_prices.astype(numpy.float64), numpy.zeros(len(p_prices), dtype=bool)
+    # A dict keeps the first key inserted, 5 or 5.0, remember which one it was
+    return l_prices, numpy.array([isinstance(c_price, float) for c_price in p_prices], dtype=bool)
+
+
+def _group_type(p_result, p_names, p_type, p_indexes, p_items, p_prices, p_is_float, p_counts) -> None:
+    """Fill p_result[item][p_type] with the (item, price) groups of the auctions at p_indexes."""
+    # Stable sort on (item, price): the first index of each group is its first appearance
+    l_order = p_indexes[numpy.lexsort((p_prices[p_indexes], p_items[p_indexes]))]
+    l_items = p_items[l_order]
+    l_prices = p_prices[l_order]
+    l_new_group = numpy.empty(len(l_order), dtype=bool)
+    l_new_group[0] = True
+    l_new_group[1:] = (l_items[1:] != l_items[:-1]) | (l_prices[1:] != l_prices[:-1])
+    l_starts = numpy.flatnonzero(l_new_group)
+
+    l_item_counts = numpy.add.reduceat(p_counts[l_order], l_starts)
+    l_auctions_counts = numpy.diff(numpy.append(l_starts, len(l_order)))
+    l_first_indexes = l_order[l_starts]
+
+    # Groups without item are left out, then restore the order of first appearance
+    l_kept = numpy.flatnonzero(l_item_counts > 0)
+    l_kept = l_kept[numpy.argsort(l_first_indexes[l_kept], kind='stable')]
+    l_group_items = l_items[l_starts][l_kept].tolist()
+    l_group_prices = l_prices[l_starts][l_kept].tolist()
+    l_group_floats = p_is_float[l_first_indexes[l_kept]].tolist()
+    l_group_item_counts = l_item_counts[l_kept].tolist()
+    l_group_auctions_counts = l_auctions_counts[l_kept].tolist()
+    for c_item, c_price, c_is_float, c_item_count, c_auctions_count in zip(
+            l_group_items, l_group_prices, l_group_floats, l_group_item_counts, l_group_auctions_counts):
+        l_price = c_price if c_is_float else int(c_price)
+        p_result[p_names[c_item]][p_type][l_price] = {
+            "item_count": c_item_count,
+            "auctions_count": c_auctions_count,
+        }
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""Write a two level YAML mapping one value at a time."""
+
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+import yaml_io
+from metrics import Metrics
+
+
+class SectionedYamlWriter:
+    """
+    Write {section: {key: value}} exactly as yaml_io.dump() writes it, without
+    holding it.
+
+    Each value is dumped as soon as it is added, into a spill file next to
+    the output; only the position of its text is kept. finish() then copies
+    the texts in the sorted order yaml_io.dump() uses.
+    """
+
+    def __init__(self, p_output_path: Path, p_metrics: Optional[Metrics] = None):
+        """
+        Open the spill file.
+
+        Args:
+            p_output_path: YAML file written by finish()
+            p_metrics: Receives the dump time and bytes written
+        """
+        self.m_output_path = p_output_path
+        self.m_metrics = p_metrics or Metrics()
+        self.m_spill_path = p_output_path.with_name(p_output_path.name + '.part')
+        p_output_path.parent.mkdir(parents=True, exist_ok=True)
+        self.m_spill = open(self.m_spill_path, 'w+b')
+        # {section: {key: (offset, length)}}, a section seen again starts over as a dict would
+        self.m_index: Dict[Any, Dict[Any, Tuple[int, int]]] = {}
+        self.m_headers: Dict[Any, bytes] = {}
+
+    def __enter__(self) -> 'SectionedYamlWriter':
+        return self
+
+    def __exit__(self, *p_args) -> None:
+        self.close()
+
+    def start_section(self, p_section: Any) -> None:
+        self.m_index[p_section] = {}
+
+    def add(self, p_section: Any, p_key: Any, p_value: Any) -> None:
+        """Dump p_value as the p_key entry of p_section."""
+        with self.m_metrics.stage('yaml.dump'):
+            l_text = yaml_io.dump({p_section: {p_key: p_value}}).encode('utf-8')
+        # The section line is the same for all its keys, keep it apart
+        l_header_end = l_text.index(b'\n') + 1
+        self.m_headers[p_section] = l_text[:l_header_end]
+        l_offset = self.m_spill.seek(0, 2)
+        self.m_spill.write(l_text[l_header_end:])
+        self.m_index.setdefault(p_section, {})[p_key] = (l_offset, len(l_text) - l_header_end)
+
+    def finish(self) -> bool:
+        """Write the output file, False and nothing written if there is no section."""
+        if not self.m_index:
+            self.close()
+            return False
+        with self.m_metrics.stage('yaml.dump'), open(self.m_output_path, 'wb') as l_file:
+            for c_section in sorted(self.m_index):
+                l_keys = self.m_index[c_section]
+                if not l_keys:
+                    l_file.write(yaml_io.dump({c_section: {}}).encode('utf-8'))
+                    continue
+                l_file.write(self.m_headers[c_section])
+                for c_key in sorted(l_keys):
+                    l_offset, l_length = l_keys[c_key]
+                    self.m_spill.seek(l_offset)
+                    l_file.write(self.m_spill.read(l_length))
+            self.m_metrics.count('bytes_written', l_file.tell())
+        self.close()
+        return True
+
+    def close(self) -> None:
+        """Drop the spill file, also called when the conversion fails."""
+        if self.m_spill.closed:
+            return
+        self.m_spill.close()
+        self.m_spill_path.unlink(missing_ok=True)
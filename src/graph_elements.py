@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Elements of obsidian-graphs charts, serialized in bulk.
+https://github.com/DylanHojnoski/obsidian-graphs
+"""
+
+from typing import List, Sequence
+
+_format_segment = "{{type: segment, def: [[{}, {}], [{}, {}]]}}".format
+
+
+def to_strings(p_values: Sequence) -> List[str]:
+    """Format a coordinate column once, as an f-string would, to reuse it in several elements."""
+    return list(map(str, p_values))
+
+
+def get_segments(p_x0s: Sequence, p_y0s: Sequence, p_x1s: Sequence, p_y1s: Sequence) -> List[str]:
+    """One segment element per (x0, y0) - (x1, y1) of the coordinate columns."""
+    return list(map(_format_segment, p_x0s, p_y0s, p_x1s, p_y1s))
+
+
+def interleave(p_columns: Sequence[List[str]]) -> List[str]:
+    """[a0, b0, c0, a1, b1, c1, ...] of the columns [a, b, c] of equal length."""
+    l_result = [None] * (len(p_columns) * len(p_columns[0]))
+    for c_index, c_column in enumerate(p_columns):
+        l_result[c_index::len(p_columns)] = c_column
+    return l_result
+
+
+def get_step_segments(p_xs: List, p_ys: List) -> List[str]:
+    """
+    Staircase from (0, 0) through each (x, y): a horizontal segment to x
+    at the previous y, then a vertical one up to y.
+    """
+    l_xs = to_strings(p_xs)
+    l_ys = to_strings(p_ys)
+    l_previous_xs = ['0'] + l_xs[:-1]
+    l_previous_ys = ['0'] + l_ys[:-1]
+    return interleave([
+        get_segments(l_previous_xs, l_previous_ys, l_xs, l_previous_ys),
+        get_segments(l_xs, l_previous_ys, l_xs, l_ys),
+    ])
+
+
+def get_step_curve(p_xs: List, p_ys: List) -> str:
+    """
+    The staircase of get_step_segments() as one JSXGraph data curve, a
+    single element whatever the number of steps.
+    """
+    l_x_strings = to_strings(p_xs)
+    l_y_strings = to_strings(p_ys)
+    l_xs = ['0'] * (2 * len(p_xs) + 1)
+    l_ys = ['0'] * (2 * len(p_ys) + 1)
+    l_xs[1::2] = l_x_strings
+    l_xs[2::2] = l_x_strings
+    l_ys[2::2] = l_y_strings
+    l_ys[3::2] = l_y_strings[:-1]
+    return f"{{type: curve, def: [[{', '.join(l_xs)}], [{', '.join(l_ys)}]]}}"
+
+
+def get_mustache_segments(p_xs: List, p_delta: float, p_quartiles: List[List], p_mins: List, p_maxs: List) -> List[str]:
+    """
+    Nine segments per box plot centered on each x and p_delta wide:
+    min, max, q1, q2 and q3 lines, q1-q3 box sides, then the whiskers.
+    Points without quartiles are skipped.
+    """
+    l_kept = [c_index for c_index, c_quartiles in enumerate(p_quartiles) if c_quartiles]
+    if not l_kept:
+        return []
+    l_centers = [p_xs[c_index] for c_index in l_kept]
+    l_xs = to_strings(l_centers)
+    l_lefts = to_strings([c_x - p_delta / 2 for c_x in l_centers])
+    l_rights = to_strings([c_x + p_delta / 2 for c_x in l_centers])
+    l_mins = to_strings([p_mins[c_index] for c_index in l_kept])
+    l_maxs = to_strings([p_maxs[c_index] for c_index in l_kept])
+    l_q1s = to_strings([p_quartiles[c_index][0] for c_index in l_kept])
+    l_q2s = to_strings([p_quartiles[c_index][1] for c_index in l_kept])
+    l_q3s = to_strings([p_quartiles[c_index][2] for c_index in l_kept])
+    return interleave([
+        get_segments(l_lefts, l_mins, l_rights, l_mins),
+        get_segments(l_lefts, l_maxs, l_rights, l_maxs),
+        get_segments(l_lefts, l_q1s, l_rights, l_q1s),
+        get_segments(l_lefts, l_q2s, l_rights, l_q2s),
+        get_segments(l_lefts, l_q3s, l_rights, l_q3s),
+        get_segments(l_lefts, l_q1s, l_lefts, l_q3s),
+        get_segments(l_rights, l_q1s, l_rights, l_q3s),
+        get_segments(l_xs, l_mins, l_xs, l_q1s),
+        get_segments(l_xs, l_maxs, l_xs, l_q3s),
+    ])
@@ -1,28 +1,38 @@
 #!/usr/bin/env python3
 """Item database management."""
 
-from typing import Dict, Optional, Any
+from typing import Dict, Iterable, Optional, Any, Set, Tuple
 
 from pathlib import Path
-import yaml
+
+from metrics import Metrics
+from storage.storage_factory import create_storage
+
+
+# Names shared by several item IDs. Snapshots only carry the name, so its
+# auctions can not be told apart: get_by_name() and resolve_names() map it to
+# the first ID, as ingestion always did, and the other IDs are only kept
+MULTI_ID_NAMES = ("Adventurer's Cache",)
 
 
 class ItemDatabase:
     """Manage item database with efficient lookup by ID and name."""
 
-    def __init__(self, p_database_file: Path):
-        """Initialize empty database."""
+    def __init__(self, p_database_file: Path, p_metrics: Optional[Metrics] = None):
+        """Initialize empty database, timing its load in p_metrics when given."""
         self.m_filename = p_database_file
+        self.m_metrics = p_metrics or Metrics()
+        self.m_storage = create_storage(p_database_file, "items", self.m_metrics)
         self.m_items_by_id: Dict[str, str] = {}
         self.m_items_by_name: Dict[str, str] = {}
         self._load()
 
     def _load(self) -> None:
         """Load data from database file."""
-        if not self.m_filename.exists():
+        if not self.m_storage.exists():
             return
-        with open(self.m_filename, 'r', encoding='utf-8') as l_file:
-            l_data = yaml.safe_load(l_file) or {}
+        with self.m_metrics.stage('db.load'):
+            l_data = self.m_storage.load()
         self.m_items_by_id = {}
         self.m_items_by_name = {}
 
@@ -30,6 +40,9 @@ class ItemDatabase:
         for c_item_id, c_item_name in l_data.items():
             if not isinstance(c_item_name, str):
                 raise ValueError(f"*** Error: Item name must be a string: {c_item_name}")
+            if c_item_name in MULTI_ID_NAMES and c_item_id not in self.m_items_by_id:
+                self._add_multi_id_item(c_item_id, c_item_name)
+                continue
             # Check for collision: same item name with different ID
             if c_item_name not in self.m_items_by_name and c_item_id not in self.m_items_by_id:
                 self.m_items_by_name[c_item_name] = c_item_id
@@ -38,22 +51,21 @@ class ItemDatabase:
 
             if c_item_name in self.m_items_by_name:
                 l_existing_id = self.m_items_by_name[c_item_name]
-                if l_existing_id != c_item_id and "Adventurer's Cache" != c_item_name:
+                if l_existing_id != c_item_id:
                     raise ValueError(
                         f"*** Error: Collision detected: "
                         f"item '{c_item_name}' already exists with ID '{l_existing_id}', "
                         f"trying to add with ID '{c_item_id}'")
             if c_item_id in self.m_items_by_id:
                 l_existing_name = self.m_items_by_id[c_item_id]
-                if l_existing_name != c_item_name and "Adventurer's Cache" != c_item_id:
+                if l_existing_name != c_item_name:
                     raise ValueError(
                         f"*** Error: Collision detected: "
                         f"item ID '{c_item_id}' already exists with name '{l_existing_name}', "
                         f"trying to add with name '{c_item_name}'")
     def save(self) -> None:
         l_sorted_items = dict(sorted(self.m_items_by_id.items(), key=lambda x: int(x[0])))
-        with open(self.m_filename, 'w', encoding='utf-8') as l_file:
-            yaml.dump(l_sorted_items, l_file, default_flow_style=False, allow_unicode=True, sort_keys=False)
+        self.m_storage.save(l_sorted_items)
 
     def get_by_id(self, p_item_id: str) -> Optional[str]:
         return self.m_items_by_id.get(p_item_id)
@@ -61,18 +73,38 @@ class ItemDatabase:
         return self.m_items_by_id
     def get_by_name(self, p_item_name: str) -> Optional[str]:
         return self.m_items_by_name.get(p_item_name)
+    def resolve_names(self, p_item_names: Iterable[str]) -> Tuple[Dict[str, str], Set[str]]:
+        """
+        Resolve many names at once, a name of MULTI_ID_NAMES to its first ID.
+
+        Returns:
+            ({item name: item ID} in input order, set of unknown names)
+        """
+        l_items_by_name = self.m_items_by_name
+        l_ids = {}
+        l_unknown = set()
+        for c_item_name in p_item_names:
+            l_item_id = l_items_by_name.get(c_item_name)
+            if l_item_id:
+                l_ids[c_item_name] = l_item_id
+            else:
+                l_unknown.add(c_item_name)
+        return l_ids, l_unknown
 
     def add_item(self, p_item_id: str, p_item_name: str) -> None:
         if p_item_name not in self.m_items_by_name and p_item_id not in self.m_items_by_id:
             self.m_items_by_id[p_item_id] = p_item_name
             self.m_items_by_name[p_item_name] = p_item_id
             return
-        if "Adventurer's Cache" == p_item_name:
-            self.m_items_by_id[p_item_id] = p_item_name
-            self.m_items_by_name[p_item_name] = p_item_id
+        if p_item_name in MULTI_ID_NAMES and p_item_id not in self.m_items_by_id:
+            self._add_multi_id_item(p_item_id, p_item_name)
             return
         if p_item_name in self.m_items_by_name and p_item_id in self.m_items_by_id \
                 and self.m_items_by_name[p_item_name] == p_item_id and self.m_items_by_id[p_item_id] == p_item_name:
             return
         raise ValueError(f"*** Error: Inconsistent database: "
                          f"item ID '{p_item_id}' with name '{p_item_name}'")
+
+    def _add_multi_id_item(self, p_item_id: str, p_item_name: str) -> None:
+        self.m_items_by_id[p_item_id] = p_item_name
+        self.m_items_by_name.setdefault(p_item_name, p_item_id)
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""Per item time series of a database, pivoted in one pass."""
+
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+TIMESTAMP_FORMAT = '%Y_%m_%dT%H_%M_%S'
+
+
+@lru_cache(maxsize=None)
+def get_datetime(p_timestamp: str) -> datetime:
+    """Snapshot timestamp as a datetime, parsed once per snapshot."""
+    return datetime.strptime(p_timestamp, TIMESTAMP_FORMAT)
+
+
+@lru_cache(maxsize=None)
+def get_label(p_datetime: datetime, p_format: str) -> str:
+    """p_datetime formatted with p_format, formatted once per snapshot."""
+    return p_datetime.strftime(p_format)
+
+
+class ItemTimeSeries:
+    """
+    Pivot {realm: {timestamp: {item_id: value}}} into per item and realm
+    series of (datetime, value), each timestamp being parsed once.
+    """
+
+    def __init__(self, p_data_by_realm: Dict, p_get_items: Optional[Callable[[Any], Dict]] = None):
+        """
+        Build the index.
+
+        Args:
+            p_data_by_realm: {realm: {timestamp: snapshot}} as held by the databases
+            p_get_items: Return {item_id: value} of one snapshot, the snapshot itself if None
+        """
+        self.m_realms = list(p_data_by_realm)
+        self.m_series: Dict[str, Dict[str, List[Tuple[datetime, Any]]]] = {}
+        l_datetimes: Dict[str, datetime] = {}
+        for c_realm, c_timestamps in p_data_by_realm.items():
+            for c_timestamp, c_snapshot in c_timestamps.items():
+                l_datetime = l_datetimes.get(c_timestamp)
+                if l_datetime is None:
+                    l_datetime = datetime.strptime(c_timestamp, TIMESTAMP_FORMAT)
+                    l_datetimes[c_timestamp] = l_datetime
+                l_items = p_get_items(c_snapshot) if p_get_items else c_snapshot
+                for c_item_id, c_value in l_items.items():
+                    l_item_series = self.m_series.get(c_item_id)
+                    if l_item_series is None:
+                        l_item_series = self.m_series[c_item_id] = {}
+                    l_points = l_item_series.get(c_realm)
+                    if l_points is None:
+                        l_points = l_item_series[c_realm] = []
+                    l_points.append((l_datetime, c_value))
+
+    def get_realms(self) -> List[str]:
+        """Realms in database order, with or without data for a given item."""
+        return self.m_realms
+
+    def get_item_ids(self) -> List[str]:
+        return list(self.m_series)
+
+    def get_points(self, p_item_id: str, p_realm: str) -> List[Tuple[datetime, Any]]:
+        """(datetime, value) of p_item_id in p_realm, in snapshot order."""
+        return self.m_series.get(p_item_id, {}).get(p_realm, [])
+
+    def get_item_slice(self, p_item_id: str) -> List[Tuple[str, List[Tuple[datetime, Any]]]]:
+        """[(realm, points)] of p_item_id for every realm, all a page needs."""
+        return [(c_realm, self.get_points(p_item_id, c_realm)) for c_realm in self.m_realms]
+
+
+class ItemHistorySeries:
+    """
+    Same item slices as ItemTimeSeries, read from a lazy database one item
+    at a time through its index instead of pivoting the whole database.
+    """
+
+    def __init__(self, p_database: Any, p_get_value: Callable[[Any], Any]):
+        """
+        Args:
+            p_database: PriceDatabase or AuctionDatabase
+            p_get_value: Return the value of one snapshot of an item history, None to leave it out
+        """
+        self.m_database = p_database
+        self.m_get_value = p_get_value
+        self.m_realms = p_database.get_realms()
+
+    def get_realms(self) -> List[str]:
+        """Realms in database order, with or without data for a given item."""
+        return self.m_realms
+
+    def get_item_slice(self, p_item_id: str) -> List[Tuple[str, List[Tuple[datetime, Any]]]]:
+        """[(realm, points)] of p_item_id for every realm, all a page needs."""
+        l_history = self.m_database.get_item_history(p_item_id)
+        l_slice = []
+        for c_realm in self.m_realms:
+            l_points = []
+            for c_timestamp, c_data in l_history.get(c_realm, {}).items():
+                l_value = self.m_get_value(c_data)
+                if l_value is not None:
+                    l_points.append((get_datetime(c_timestamp), l_value))
+            l_slice.append((c_realm, l_points))
+        return l_slice
@@ -1,71 +1,141 @@
 #!/usr/bin/env python3
 """Main entry point for Lua to YAML converters."""
 
+import signal
+import sys
+from contextlib import contextmanager
 from pathlib import Path
+from typing import Iterator, Optional
 
 import typer
 
-from converters.ahscanner_converter import AHScannerConverter
+from converters.dailies_converter import DailiesConverter
 from item_database import ItemDatabase
 from price_database import PriceDatabase
 from auction_database import AuctionDatabase
 from managers.ahscanner_manager import AHScannerManager
 from obsidian_generator import ObsidianGenerator
 from ahscanner_obsidian_generator import AHScannerObsidianGenerator
+from pipeline import Pipeline, PipelineLock, PipelineLockedError
+from snapshot_watcher import SnapshotWatcher
+from storage.storage_factory import create_storage
+from unknown_item_report import UnknownItemReport
+import metrics
 
 app = typer.Typer(help="Lua to YAML converter")
 
+
+@app.callback()
+def main(ctx: typer.Context,
+         profile: Optional[Path] = typer.Option(None, "--profile", help="Print the stage timings and write the cProfile stats of each stage to this directory"),
+         metrics_file: Optional[Path] = typer.Option(None, "--metrics-file", help="Write stage timings, peak memory and counters of the run as JSON")):
+    """
+    Options shared by every command, given before its name.
+
+    Args:
+        profile: Directory receiving <stage>.prof files
+        metrics_file: JSON file of the run metrics
+    """
+    l_metrics = metrics.Metrics(profile)
+    # Passed by every command to what it builds
+    ctx.obj = l_metrics
+
+    def _report() -> None:
+        if profile is not None:
+            l_metrics.save_profiles()
+            l_metrics.print_summary()
+        if metrics_file is not None:
+            l_metrics.save(metrics_file, ctx.invoked_subcommand)
+            print(f"--- Metrics written to {metrics_file}")
+
+    ctx.call_on_close(_report)
+
+
+def get_gen_dailies_dir(p_dailies_dir: Path) -> Path:
+    """gen_dailies at the level of 'dailies' in p_dailies_dir, else next to p_dailies_dir."""
+    l_parts = p_dailies_dir.parts
+    if 'dailies' in l_parts:
+        l_dailies_index = l_parts.index('dailies')
+        l_base_parts = l_parts[:l_dailies_index]
+        return Path(*l_base_parts) / 'gen_dailies'
+    return p_dailies_dir.parent / 'gen_dailies'
+
+
+@contextmanager
+def acquire_lock(p_lock_file: Path) -> Iterator[PipelineLock]:
+    """Hold the pipeline lock of p_lock_file, exiting with an error if another process holds it."""
+    l_lock = PipelineLock(p_lock_file)
+    try:
+        l_lock.acquire()
+    except PipelineLockedError as l_error:
+        print("***", l_error, file=sys.stderr)
+        raise typer.Exit(1)
+    try:
+        yield l_lock
+    finally:
+        l_lock.release()
+
+
 @app.command()
-def update_item_db(item_database_file: Path = typer.Option(Path('datas/items.yaml'), help="Path to item database file"),
-                   price_database_file: Path = typer.Option(Path('datas/qnp.yaml'), help="Path to price and quantity database file"),
-                   auction_database_file: Path = typer.Option(Path('datas/auctions.yaml'), help="Path to auction database file"),
-                   dailies_directory: Path = typer.Option(Path('gen_dailies'), help="Directory containing generated dailies files")):
+def update_item_db(ctx: typer.Context,
+                   item_database_file: Path = typer.Option(Path('datas/items.yaml'), help="Path to item database file"),
+                   price_database_file: Path = typer.Option(Path('datas/qnp.col'), help="Path to price and quantity database file"),
+                   auction_database_file: Path = typer.Option(Path('datas/auctions.col'), help="Path to auction database file"),
+                   dailies_directory: Path = typer.Option(Path('gen_dailies'), help="Directory containing generated dailies files"),
+                   rebuild: bool = typer.Option(False, "--rebuild", help="Ingest every snapshot again and rewrite the databases"),
+                   compact_every: int = typer.Option(30, help="Compact the databases once they have this many appended segments, 0 for never"),
+                   jobs: int = typer.Option(1, "--jobs", "-j", help="Number of processes parsing snapshots, 0 for one per core"),
+                   unknown_items_file: Path = typer.Option(Path('datas/unknown_items.yaml'), help="Report of the item names missing from the item database")):
     """
     Update the item database.
 
+    Only snapshots not yet in the databases are ingested. With columnar
+    databases they are appended as a new segment instead of rewriting the
+    whole history.
+
     Args:
         item_database_file: Path to item database file
+        rebuild: Ingest all snapshots and rewrite the databases
+        compact_every: Segment count triggering a compaction
+        jobs: Number of worker processes
+        unknown_items_file: Report kept across runs
     """
     item_database_file.parent.mkdir(parents=True, exist_ok=True)
 
-    l_items_db = ItemDatabase(item_database_file)
-    l_prices_db = PriceDatabase(price_database_file)
-    l_auction_database = AuctionDatabase(auction_database_file)
-
-    l_items_added = 0
-    l_ahscanner_manager = AHScannerManager(dailies_directory, l_items_db)
-    l_ahscanner_manager.load_all()
-    l_items = l_ahscanner_manager.get_all_qnp_by_name()
-    for c_realm, c_prices in l_items.items():
-        l_prices_db.add_realm(c_realm)
-        for c_timestamp, c_prices in c_prices.items():
-            l_prices_db.add_timestamp(c_realm, c_timestamp)
-            l_prices_db.add_source(c_realm, c_timestamp, 'ahs')
-            l_prices_db.add_source(c_realm, c_timestamp, 'ahs_all')
-            for c_item_id, c_qnp in c_prices.items():
-                l_prices_db.add_qnp(c_item_id, c_qnp["all"], c_realm, c_timestamp, "ahs_all")
-                l_prices_db.add_qnp(c_item_id, c_qnp["filtered"], c_realm, c_timestamp, "ahs")
-                l_items_added += 1
+    l_items_db = ItemDatabase(item_database_file, ctx.obj)
+    l_prices_db = PriceDatabase(price_database_file, not rebuild, p_metrics=ctx.obj)
+    l_auction_database = AuctionDatabase(auction_database_file, not rebuild, p_metrics=ctx.obj)
+
+    l_known_timestamps = set()
+    if not rebuild:
+        l_known_timestamps = l_prices_db.get_timestamps() & l_auction_database.get_timestamps()
+
+    l_ahscanner_manager = AHScannerManager(dailies_directory, l_items_db, ctx.obj)
+    l_ahscanner_manager.find_files(l_known_timestamps)
+    print(f"--- {len(l_known_timestamps)} snapshot(s) already ingested, "
+          f"{len(l_ahscanner_manager.get_files())} new")
+    l_unknown_report = UnknownItemReport(unknown_items_file, rebuild, ctx.obj)
+    l_items_added = l_ahscanner_manager.ingest(l_prices_db, l_auction_database, jobs, l_unknown_report)
     print(f"--- Added {l_items_added} ahs prices to price database")
+    l_unknown_report.forget_known(l_items_db)
+    l_unknown_report.save()
+    if l_unknown_report.get_names():
+        print(f"=== Warning: {l_unknown_report.get_summary()}, see {unknown_items_file}")
     l_prices_db.save()
-
-    l_auctions = l_ahscanner_manager.get_all_auctions_by_name()
-    for c_realm, c_auctions in l_auctions.items():
-        l_auction_database.add_realm(c_realm)
-        for c_timestamp, c_auction_data in c_auctions.items():
-            l_auction_database.add_timestamp(c_realm, c_timestamp)
-            for c_item_name, c_auction_data in c_auction_data.items():
-                l_item_id = l_items_db.get_by_name(c_item_name)
-                if not l_item_id:
-                    print(f"=== Warning: Item '{c_item_name}' not found in items database")
-                    continue
-                l_auction_database.add_item_auction_data(l_item_id, c_auction_data, c_realm, c_timestamp)
     l_auction_database.save()
 
+    for c_database in (l_prices_db, l_auction_database):
+        if compact_every > 0 and c_database.get_segment_count() >= compact_every:
+            print(f"--- Compacting {c_database.m_filename} ({c_database.get_segment_count()} segments)")
+            c_database.compact()
+
     print("--- Done.")
 
 @app.command()
-def convert(dailies_dir: Path = typer.Argument(Path('dailies'), help="Directory containing subdirectories with Lua files")):
+def convert(ctx: typer.Context,
+            dailies_dir: Path = typer.Argument(Path('dailies'), help="Directory containing subdirectories with Lua files"),
+            jobs: int = typer.Option(1, "--jobs", "-j", help="Number of snapshots converted in parallel, 0 for one per core"),
+            force: bool = typer.Option(False, "--force", help="Convert all snapshots, even those already up to date")):
     """
     Convert Lua files to YAML.
 
@@ -74,51 +144,31 @@ def convert(dailies_dir: Path = typer.Argument(Path('dailies'), help="Directory
 
     Args:
         dailies_dir: Directory containing subdirectories with Lua files
+        jobs: Number of worker processes
+        force: Ignore the conversion manifest
     """
     if not dailies_dir.is_dir():
         print(f"*** Error: Not a directory: {dailies_dir}")
         raise typer.Exit(1)
 
-    # Find 'dailies' in the path and create gen_dailies at the same level
-    l_parts = dailies_dir.parts
-    if 'dailies' in l_parts:
-        l_dailies_index = l_parts.index('dailies')
-        l_base_parts = l_parts[:l_dailies_index]
-        l_output_base = Path(*l_base_parts) / 'gen_dailies'
-    else:
-        # Fallback: create gen_dailies next to the directory
-        l_output_base = dailies_dir.parent / 'gen_dailies'
+    l_output_base = get_gen_dailies_dir(dailies_dir)
     l_output_base.mkdir(parents=True, exist_ok=True)
 
-    l_files_to_convert = [
-        ('AHScanner.lua', AHScannerConverter),
-    ]
-
-    l_total_converted = 0
-    l_subdirs = [c_path for c_path in dailies_dir.iterdir() if c_path.is_dir()]
-    for c_subdir in l_subdirs:
-        l_output_dir = l_output_base / c_subdir.name
-        l_converted_count = 0
-        for l_filename, l_converter_class in l_files_to_convert:
-            l_file_path = c_subdir / l_filename
-            #print("---", l_file_path)
-            if not l_file_path.exists():
-                print(f"=== Warning: {l_filename} in {c_subdir.name} (not found)")
-                continue
-
-            l_converter = l_converter_class(l_file_path)
-            l_converter.load()
-            l_output_path = l_output_dir / l_filename.replace('.lua', '.yaml')
-            if l_converter.save_yaml(l_output_path):
-                l_converted_count += 1
-        l_total_converted += l_converted_count
-    print(f"--- Total: {l_total_converted} file(s) converted")
+    l_dailies_converter = DailiesConverter(dailies_dir, l_output_base, jobs, force, ctx.obj)
+    l_dailies_converter.convert_all()
+    print(f"--- Total: {l_dailies_converter.get_converted_count()} file(s) converted")
+    if l_dailies_converter.get_failed():
+        raise typer.Exit(1)
 
 
 @app.command()
-def obsidian(item_database_file: Path = typer.Option(Path('datas/items.yaml'), help="Path to item database file"),
-             price_database_file: Path = typer.Option(Path('datas/qnp.yaml'), help="Path to price and quantity database file"),
-             output_dir: Path = typer.Option(Path('obsidian'), help="Output directory for Obsidian files")):
+def obsidian(ctx: typer.Context,
+             item_database_file: Path = typer.Option(Path('datas/items.yaml'), help="Path to item database file"),
+             price_database_file: Path = typer.Option(Path('datas/qnp.col'), help="Path to price and quantity database file"),
+             output_dir: Path = typer.Option(Path('obsidian'), help="Output directory for Obsidian files"),
+             jobs: int = typer.Option(1, "--jobs", "-j", help="Number of processes rendering pages, 0 for one per core"),
+             max_points: int = typer.Option(0, "--max-points", min=0, help="Maximum number of points per chart, 0 for one per snapshot"),
+             recent_days: int = typer.Option(14, "--recent-days", help="Days of history kept at full resolution with --max-points")):
     """
     Generate Obsidian markdown files from item and price databases.
 
@@ -126,21 +176,33 @@ def obsidian(item_database_file: Path = typer.Option(Path('datas/items.yaml'), h
         item_database_file: Path to item database file
         price_database_file: Path to price database file
         output_dir: Output directory for Obsidian files
+        jobs: Number of worker processes
+        max_points: Downsample the charts to this many points
+        recent_days: Days of history not downsampled
     """
-    l_items_db = ItemDatabase(item_database_file)
-    l_prices_db = PriceDatabase(price_database_file)
+    l_items_db = ItemDatabase(item_database_file, ctx.obj)
+    # An SQLite database is queried one item at a time instead of being loaded
+    l_prices_db = PriceDatabase(price_database_file, p_lazy=True, p_metrics=ctx.obj)
 
-    l_generator = ObsidianGenerator(l_items_db, l_prices_db, output_dir)
+    l_generator = ObsidianGenerator(l_items_db, l_prices_db, output_dir, jobs, max_points, recent_days, ctx.obj)
     l_generated_count = l_generator.generate()
+    l_prices_db.close()
 
     print(f"--- Generated {l_generated_count} item files in {output_dir / 'items'}")
     print(f"--- Generated index file: {output_dir / 'Item Index.md'}")
+    print(f"--- Pages: {l_generator.m_writer.get_summary()}, see {l_generator.m_writer.m_changes_file}")
 
 
 @app.command()
-def obsidian_auctions(item_database_file: Path = typer.Option(Path('datas/items.yaml'), help="Path to item database file"),
-                      auction_database_file: Path = typer.Option(Path('datas/auctions.yaml'), help="Path to auction database file"),
-                      output_dir: Path = typer.Option(Path('obsidian/auctions'), help="Output directory for Obsidian auction files")):
+def obsidian_auctions(ctx: typer.Context,
+                      item_database_file: Path = typer.Option(Path('datas/items.yaml'), help="Path to item database file"),
+                      auction_database_file: Path = typer.Option(Path('datas/auctions.col'), help="Path to auction database file"),
+                      output_dir: Path = typer.Option(Path('obsidian/auctions'), help="Output directory for Obsidian auction files"),
+                      force: bool = typer.Option(False, "--force", help="Render the auction pages of already written snapshots again"),
+                      jobs: int = typer.Option(1, "--jobs", "-j", help="Number of processes rendering pages, 0 for one per core"),
+                      polyline: bool = typer.Option(False, "--polyline", help="Draw each price chart as one curve instead of a segment per step"),
+                      max_points: int = typer.Option(0, "--max-points", min=0, help="Maximum number of points per stats chart, 0 for one per snapshot"),
+                      recent_days: int = typer.Option(14, "--recent-days", help="Days of history kept at full resolution with --max-points")):
     """
     Generate Obsidian markdown files from AHScanner auction files.
 
@@ -148,14 +210,160 @@ def obsidian_auctions(item_database_file: Path = typer.Option(Path('datas/items.
         item_database_file: Path to item database file
         auction_database_file: Path to auction database file
         output_dir: Output directory for Obsidian auction files
+        force: Render the per-snapshot pages again
+        jobs: Number of worker processes
+        polyline: Draw price charts as one curve element
+        max_points: Downsample the stats charts to this many points
+        recent_days: Days of history not downsampled
     """
-    l_items_db = ItemDatabase(item_database_file)
-    l_auction_database = AuctionDatabase(auction_database_file)
-    l_generator = AHScannerObsidianGenerator(l_items_db, l_auction_database, output_dir)
+    l_items_db = ItemDatabase(item_database_file, ctx.obj)
+    l_auction_database = AuctionDatabase(auction_database_file, p_lazy=True, p_metrics=ctx.obj)
+    l_generator = AHScannerObsidianGenerator(l_items_db, l_auction_database, output_dir, force, jobs, polyline,
+                                             max_points, recent_days, ctx.obj)
     l_generated_count = l_generator.generate()
+    l_auction_database.close()
 
     print(f"--- Generated {l_generated_count} auction files in {output_dir}")
     print(f"--- Generated index file: {output_dir / 'Auction Index.md'}")
+    print(f"--- Pages: {l_generator.m_writer.get_summary()}, see {l_generator.m_writer.m_changes_file}")
+
+
+@app.command()
+def pipeline(ctx: typer.Context,
+             dailies_dir: Path = typer.Argument(Path('dailies'), help="Directory containing subdirectories with Lua files"),
+             item_database_file: Path = typer.Option(Path('datas/items.yaml'), help="Path to item database file"),
+             price_database_file: Path = typer.Option(Path('datas/qnp.col'), help="Path to price and quantity database file"),
+             auction_database_file: Path = typer.Option(Path('datas/auctions.col'), help="Path to auction database file"),
+             output_dir: Path = typer.Option(Path('obsidian'), help="Output directory for Obsidian files, auction pages go to its auctions subdirectory"),
+             rebuild: bool = typer.Option(False, "--rebuild", help="Ingest every snapshot again and rewrite the databases"),
+             write_gen_dailies: bool = typer.Option(False, "--write-gen-dailies", help="Also write the AHScanner.yaml of converted snapshots to gen_dailies"),
+             jobs: int = typer.Option(1, "--jobs", "-j", help="Number of processes converting snapshots and rendering pages, 0 for one per core"),
+             unknown_items_file: Path = typer.Option(Path('datas/unknown_items.yaml'), help="Report of the item names missing from the item database"),
+             force: bool = typer.Option(False, "--force", help="Render the auction pages of already written snapshots again"),
+             polyline: bool = typer.Option(False, "--polyline", help="Draw each price chart as one curve instead of a segment per step"),
+             max_points: int = typer.Option(0, "--max-points", min=0, help="Maximum number of points per chart, 0 for one per snapshot"),
+             recent_days: int = typer.Option(14, "--recent-days", help="Days of history kept at full resolution with --max-points"),
+             lock_file: Path = typer.Option(Path('datas/pipeline.lock'), help="Lock file preventing concurrent pipeline and watch runs")):
+    """
+    Run convert, update-item-db, obsidian and obsidian-auctions in one process.
+
+    New snapshots are converted in memory and ingested straight into the
+    databases, which are then handed to the generators: gen_dailies is
+    only written with --write-gen-dailies and no database is read back.
+
+    Args:
+        dailies_dir: Directory containing subdirectories with Lua files
+        output_dir: Item pages, auction pages going to output_dir/auctions
+        rebuild: Ingest all snapshots and rewrite the databases
+        write_gen_dailies: Keep the intermediate YAML files
+        jobs: Number of worker processes
+    """
+    if not dailies_dir.is_dir():
+        print(f"*** Error: Not a directory: {dailies_dir}")
+        raise typer.Exit(1)
+    item_database_file.parent.mkdir(parents=True, exist_ok=True)
+
+    with acquire_lock(lock_file):
+        l_pipeline = Pipeline(dailies_dir, item_database_file, price_database_file, auction_database_file,
+                              unknown_items_file, rebuild, jobs,
+                              get_gen_dailies_dir(dailies_dir) if write_gen_dailies else None, ctx.obj)
+        l_items_added = l_pipeline.ingest(l_pipeline.get_new_subdirs())
+        print(f"--- {len(l_pipeline.get_ingested())} new snapshot(s)")
+        if l_pipeline.get_empty():
+            print(f"=== Warning: {len(l_pipeline.get_empty())} snapshot(s) without any realm skipped")
+        print(f"--- Added {l_items_added} ahs prices to price database")
+        if l_pipeline.m_unknown_report.get_names():
+            print(f"=== Warning: {l_pipeline.m_unknown_report.get_summary()}, see {unknown_items_file}")
+        l_pipeline.save()
+
+        l_generator, l_auctions_generator = l_pipeline.generate(output_dir, force, polyline, max_points, recent_days)
+    print(f"--- Item pages: {l_generator.m_writer.get_summary()}, see {l_generator.m_writer.m_changes_file}")
+    print(f"--- Auction pages: {l_auctions_generator.m_writer.get_summary()}, see {l_auctions_generator.m_writer.m_changes_file}")
+    for c_name in l_pipeline.get_failed():
+        print("***", f"Failed: {c_name}", file=sys.stderr)
+    if l_pipeline.get_failed():
+        raise typer.Exit(1)
+
+
+@app.command()
+def watch(ctx: typer.Context,
+          dailies_dir: Path = typer.Argument(Path('dailies'), help="Directory receiving the snapshot subdirectories"),
+          item_database_file: Path = typer.Option(Path('datas/items.yaml'), help="Path to item database file"),
+          price_database_file: Path = typer.Option(Path('datas/qnp.col'), help="Path to price and quantity database file"),
+          auction_database_file: Path = typer.Option(Path('datas/auctions.col'), help="Path to auction database file"),
+          output_dir: Path = typer.Option(Path('obsidian'), help="Output directory for Obsidian files, auction pages go to its auctions subdirectory"),
+          write_gen_dailies: bool = typer.Option(False, "--write-gen-dailies", help="Also write the AHScanner.yaml of converted snapshots to gen_dailies"),
+          jobs: int = typer.Option(1, "--jobs", "-j", help="Number of processes converting snapshots and rendering pages, 0 for one per core"),
+          unknown_items_file: Path = typer.Option(Path('datas/unknown_items.yaml'), help="Report of the item names missing from the item database"),
+          polyline: bool = typer.Option(False, "--polyline", help="Draw each price chart as one curve instead of a segment per step"),
+          max_points: int = typer.Option(0, "--max-points", min=0, help="Maximum number of points per chart, 0 for one per snapshot"),
+          recent_days: int = typer.Option(14, "--recent-days", help="Days of history kept at full resolution with --max-points"),
+          interval: float = typer.Option(5.0, help="Seconds between two polls of the dailies directory"),
+          debounce: float = typer.Option(10.0, help="Seconds a Lua file must stay unmodified before being ingested"),
+          lock_file: Path = typer.Option(Path('datas/pipeline.lock'), help="Lock file preventing concurrent pipeline and watch runs")):
+    """
+    Keep the databases in memory and run each new snapshot through the pipeline.
+
+    Polls dailies_dir for snapshot directories missing from the databases.
+    Once its Lua file is fully copied, a snapshot is converted, ingested,
+    the databases are saved and the pages of its items are rendered again.
+    Stops on Ctrl-C or SIGTERM.
+
+    Args:
+        dailies_dir: Directory receiving the snapshot subdirectories
+        interval: Seconds between polls
+        debounce: Seconds without modification before reading a Lua file
+        lock_file: Held while watching
+    """
+    if not dailies_dir.is_dir():
+        print(f"*** Error: Not a directory: {dailies_dir}")
+        raise typer.Exit(1)
+    item_database_file.parent.mkdir(parents=True, exist_ok=True)
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    with acquire_lock(lock_file):
+        try:
+            l_pipeline = Pipeline(dailies_dir, item_database_file, price_database_file, auction_database_file,
+                                  unknown_items_file, False, jobs,
+                                  get_gen_dailies_dir(dailies_dir) if write_gen_dailies else None, ctx.obj)
+            SnapshotWatcher(l_pipeline, output_dir, interval, debounce, False, polyline,
+                            max_points, recent_days).run()
+        except KeyboardInterrupt:
+            print("--- Stopped.")
+
+
+@app.command()
+def convert_db(ctx: typer.Context,
+               kind: str = typer.Argument(..., help="Database kind: items, prices or auctions"),
+               source_file: Path = typer.Argument(..., help="Database file to read"),
+               destination_file: Path = typer.Argument(..., help="Database file to write")):
+    """
+    Copy an item, price or auction database between storage formats.
+
+    The format of each file follows its suffix: '.col' for columnar,
+    '.dcol' for delta encoded columnar auctions, '.sqlite' or '.db' for
+    SQLite, YAML otherwise.
+
+    Args:
+        kind: Database kind, items, prices or auctions
+        source_file: Database file to read
+        destination_file: Database file to write
+    """
+    l_database_classes = {'items': ItemDatabase, 'prices': PriceDatabase, 'auctions': AuctionDatabase}
+    if kind not in l_database_classes:
+        print(f"*** Error: Unknown database kind '{kind}', expected items, prices or auctions")
+        raise typer.Exit(1)
+    # A columnar database may only exist as appended segments
+    if not create_storage(source_file, kind, ctx.obj).exists():
+        print(f"*** Error: File not found: {source_file}")
+        raise typer.Exit(1)
+    l_database = l_database_classes[kind](source_file, p_metrics=ctx.obj)
+    if kind == 'items':
+        l_database.m_storage = create_storage(destination_file, kind, ctx.obj)
+        l_database.save()
+    else:
+        l_data = l_database.m_prices_by_realm if kind == 'prices' else l_database.m_auctions_by_realm
+        create_storage(destination_file, kind, ctx.obj).save(l_data)
+    print(f"--- Copied {kind} database {source_file} to {destination_file}")
 
 
 if __name__ == '__main__':
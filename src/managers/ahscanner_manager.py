@@ -2,81 +2,164 @@
 """Manage AHScanner YAML files."""
 
 from pathlib import Path
-from typing import Dict, List, Any, Optional
-import yaml
+from typing import Dict, List, Any, Iterable, Iterator, Optional, Tuple
 
 from .base_manager import BaseManager
 from item_database import ItemDatabase
+from price_database import PriceDatabase
+from auction_database import AuctionDatabase
+from unknown_item_report import UnknownItemReport
+from metrics import Metrics
 
 
 class AHScannerManager(BaseManager):
     """Manage AHScanner YAML files from gen_dailies directory."""
 
-    def __init__(self, p_dailies_directory: Path, p_items_db: Optional[ItemDatabase] = None):
-        """Initialize manager."""
-        super().__init__(p_dailies_directory, 'AHScanner.yaml')
+    def __init__(self, p_dailies_directory: Path, p_items_db: Optional[ItemDatabase] = None,
+                 p_metrics: Optional[Metrics] = None):
+        """Initialize manager, timing parsing and ingestion in p_metrics when given."""
+        super().__init__(p_dailies_directory, 'AHScanner.yaml', p_metrics)
         self.m_items_db = p_items_db
 
     def get_items_by_id(self) -> Dict[str, str]:
         """AHScanner doesn't contain item IDs, only names."""
         return {}
 
-    def get_all_auctions_by_name(self) -> Dict[str, Dict[str, Dict[str, Dict]]]:
-        """Get all prices by realm and timestamp."""
-        l_result = {}
-        for c_file, c_data in self.m_data.items():
+    def iter_snapshots(self, p_jobs: int = 1) -> Iterator[Tuple[str, str, Dict[str, Dict]]]:
+        """
+        Yield (timestamp, realm, {item name: auction data}) one snapshot at a time.
+
+        Uses the data of load_all() if called, else parses the files found
+        by find_files() as they are consumed.
+
+        Args:
+            p_jobs: Number of worker processes parsing files, 0 for one per core
+        """
+        l_files = self.m_data.items() if self.m_data else self.iter_files(p_jobs)
+        for c_file, c_data in l_files:
             l_timestamp = c_file.parent.stem
             for c_realm, c_items in c_data.items():
-                if c_realm not in l_result:
-                    l_result[c_realm] = {}
-                if l_timestamp not in l_result[c_realm]:
-                    l_result[c_realm][l_timestamp] = {}
-                l_result[c_realm][l_timestamp] = c_items
+                yield l_timestamp, c_realm, c_items
+
+    def get_all_auctions_by_name(self, p_jobs: int = 1) -> Dict[str, Dict[str, Dict[str, Dict]]]:
+        """Get all auctions by realm and timestamp."""
+        l_result = {}
+        for l_timestamp, c_realm, c_items in self.iter_snapshots(p_jobs):
+            if c_realm not in l_result:
+                l_result[c_realm] = {}
+            l_result[c_realm][l_timestamp] = c_items
         return l_result
 
-    def get_all_qnp_by_name(self):
+    def get_all_qnp_by_name(self, p_jobs: int = 1):
         """Get all prices by realm and timestamp."""
         l_result = {}
-        for c_file, c_data in self.m_data.items():
-            l_timestamp = c_file.parent.stem
-            for c_realm, c_items in c_data.items():
-                if c_realm not in l_result:
-                    l_result[c_realm] = {}
-                if l_timestamp not in l_result[c_realm]:
-                    l_result[c_realm][l_timestamp] = {}
-                for c_item_name, c_item_data in c_items.items():
-                    l_item_id = self.m_items_db.get_by_name(c_item_name)
-                    if not l_item_id:
-                        print(f"=== Warning: Item '{c_item_name}' not found in items database")
-                        continue
-                    l_result[c_realm][l_timestamp][l_item_id] = {
-                        "all": {},
-                        "filtered": {}
-                    }
-
-                    if "all" in c_item_data["buyout"] \
-                          and "mean" in c_item_data["buyout"]["all"] \
-                          and "all" in c_item_data["minBid"] \
-                          and "mean" in c_item_data["minBid"]["all"]:
-                       l_buyout = int(c_item_data["buyout"]["all"]["mean"])
-                       l_min_bid = int(c_item_data["minBid"]["all"]["mean"])
-                       l_count = c_item_data["buyout"]["all"]["count"]
-                       l_result[c_realm][l_timestamp][l_item_id]["all"] = {
-                           "q": l_count,
-                           "p": l_buyout,
-                           "m": l_min_bid
-                       }
-
-                    if "all" in c_item_data["buyout"] \
-                          and "mean" in c_item_data["buyout"]["filtered"] \
-                          and "filtered" in c_item_data["minBid"] \
-                          and "mean" in c_item_data["minBid"]["filtered"]:
-                        l_buyout = int(c_item_data["buyout"]["filtered"]["mean"])
-                        l_min_bid = int(c_item_data["minBid"]["filtered"]["mean"])
-                        l_count = c_item_data["buyout"]["filtered"]["count"]
-                        l_result[c_realm][l_timestamp][l_item_id]["filtered"] = {
-                            "q": l_count,
-                            "p": l_buyout,
-                            "m": l_min_bid
-                        }
+        for l_timestamp, c_realm, c_items in self.iter_snapshots(p_jobs):
+            if c_realm not in l_result:
+                l_result[c_realm] = {}
+            if l_timestamp not in l_result[c_realm]:
+                l_result[c_realm][l_timestamp] = {}
+            l_ids, l_unknown = self.m_items_db.resolve_names(c_items)
+            for c_item_name in sorted(l_unknown):
+                print(f"=== Warning: Item '{c_item_name}' not found in items database")
+            for c_item_name, l_item_id in l_ids.items():
+                l_result[c_realm][l_timestamp][l_item_id] = self._get_qnp(c_items[c_item_name])
         return l_result
+
+    def ingest(self, p_prices_db: PriceDatabase, p_auction_db: AuctionDatabase, p_jobs: int = 1,
+               p_unknown_report: Optional[UnknownItemReport] = None) -> int:
+        """
+        Add every snapshot to both databases in one pass.
+
+        The item names of each snapshot are resolved in bulk, and each
+        snapshot is added to each database with one batch per source.
+        Unknown names go to p_unknown_report, or are printed once per run
+        without report.
+
+        Args:
+            p_prices_db: Receives the qnp of sources 'ahs' (filtered) and 'ahs_all'
+            p_auction_db: Receives the auction data
+            p_jobs: Number of worker processes parsing files, 0 for one per core
+            p_unknown_report: Records the names missing from the item database
+
+        Returns:
+            Number of items added to the price database
+        """
+        return self.ingest_snapshots(self.iter_snapshots(p_jobs), p_prices_db, p_auction_db, p_unknown_report)
+
+    def ingest_snapshots(self, p_snapshots: Iterable[Tuple[str, str, Dict[str, Dict]]],
+                         p_prices_db: PriceDatabase, p_auction_db: AuctionDatabase,
+                         p_unknown_report: Optional[UnknownItemReport] = None) -> int:
+        """
+        ingest() of (timestamp, realm, {item name: auction data}) snapshots
+        coming from anywhere, such as a converter still in memory.
+
+        Returns:
+            Number of items added to the price database
+        """
+        with self.m_metrics.stage('ingest'):
+            return self._ingest_snapshots(p_snapshots, p_prices_db, p_auction_db, p_unknown_report)
+
+    def _ingest_snapshots(self, p_snapshots, p_prices_db, p_auction_db, p_unknown_report) -> int:
+        l_metrics = self.m_metrics
+        l_items_added = 0
+        l_warned = set()
+        for l_timestamp, c_realm, c_items in p_snapshots:
+            l_ids, l_unknown = self.m_items_db.resolve_names(c_items)
+            l_metrics.count('warnings', len(l_unknown))
+            if p_unknown_report is not None:
+                p_unknown_report.add(sorted(l_unknown), l_timestamp)
+            else:
+                for c_item_name in sorted(l_unknown - l_warned):
+                    print(f"=== Warning: Item '{c_item_name}' not found in items database")
+                l_warned |= l_unknown
+            l_filtered_by_item = {}
+            l_all_by_item = {}
+            l_auction_data_by_item = {}
+            for c_item_name, l_item_id in l_ids.items():
+                l_item_data = c_items[c_item_name]
+                l_qnp = self._get_qnp(l_item_data)
+                l_filtered_by_item[l_item_id] = l_qnp["filtered"]
+                l_all_by_item[l_item_id] = l_qnp["all"]
+                l_auction_data_by_item[l_item_id] = l_item_data
+            p_prices_db.add_qnp_batch(c_realm, l_timestamp, 'ahs', l_filtered_by_item)
+            p_prices_db.add_qnp_batch(c_realm, l_timestamp, 'ahs_all', l_all_by_item)
+            p_auction_db.add_auction_data_batch(c_realm, l_timestamp, l_auction_data_by_item)
+            l_items_added += len(l_all_by_item)
+            l_metrics.count('snapshots_ingested')
+            l_metrics.count('items_ingested', len(l_all_by_item))
+        return l_items_added
+
+    @staticmethod
+    def _get_qnp(p_item_data: Dict) -> Dict[str, Dict]:
+        """{"all": qnp, "filtered": qnp} of one item, qnp being {} without stats."""
+        l_qnp = {
+            "all": {},
+            "filtered": {}
+        }
+
+        if "all" in p_item_data["buyout"] \
+              and "mean" in p_item_data["buyout"]["all"] \
+              and "all" in p_item_data["minBid"] \
+              and "mean" in p_item_data["minBid"]["all"]:
+            l_buyout = int(p_item_data["buyout"]["all"]["mean"])
+            l_min_bid = int(p_item_data["minBid"]["all"]["mean"])
+            l_count = p_item_data["buyout"]["all"]["count"]
+            l_qnp["all"] = {
+                "q": l_count,
+                "p": l_buyout,
+                "m": l_min_bid
+            }
+
+        if "all" in p_item_data["buyout"] \
+              and "mean" in p_item_data["buyout"]["filtered"] \
+              and "filtered" in p_item_data["minBid"] \
+              and "mean" in p_item_data["minBid"]["filtered"]:
+            l_buyout = int(p_item_data["buyout"]["filtered"]["mean"])
+            l_min_bid = int(p_item_data["minBid"]["filtered"]["mean"])
+            l_count = p_item_data["buyout"]["filtered"]["count"]
+            l_qnp["filtered"] = {
+                "q": l_count,
+                "p": l_buyout,
+                "m": l_min_bid
+            }
+        return l_qnp
@@ -1,37 +1,108 @@
 #!/usr/bin/env python3
 """Base class for YAML file managers."""
 
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Any
-
-import yaml
+from typing import Callable, Dict, List, Any, Iterator, Optional, Sequence, Set, Tuple
 
 from item_database import ItemDatabase
+from metrics import Metrics
+import yaml_io
+
+
+def load_file(p_file: Path) -> Tuple[Dict[str, Any], Dict]:
+    """(data, metrics) of one YAML file, module level so that it can be sent to a process pool."""
+    l_metrics = Metrics()
+    return yaml_io.load_file(p_file, l_metrics) or {}, l_metrics.get_data()
+
+
+def iter_ordered(p_function: Callable, p_arguments: Sequence, p_jobs: int = 1) -> Iterator[Tuple[Any, Any]]:
+    """
+    Yield (argument, p_function(argument)) for every argument, in order.
+
+    With more than one job, calls run ahead in a process pool, at most two
+    per job waiting to be consumed.
+
+    Args:
+        p_function: Module level function, sent to the workers
+        p_arguments: Argument of each call
+        p_jobs: Number of worker processes, 0 for one per core
+    """
+    l_jobs = p_jobs if p_jobs > 0 else (os.cpu_count() or 1)
+    if l_jobs == 1 or len(p_arguments) < 2:
+        for c_argument in p_arguments:
+            yield c_argument, p_function(c_argument)
+        return
+
+    with ProcessPoolExecutor(max_workers=min(l_jobs, len(p_arguments))) as l_pool:
+        l_pending = deque()
+        for c_argument in p_arguments:
+            l_pending.append((c_argument, l_pool.submit(p_function, c_argument)))
+            if len(l_pending) > 2 * l_jobs:
+                l_argument, l_future = l_pending.popleft()
+                yield l_argument, l_future.result()
+        while l_pending:
+            l_argument, l_future = l_pending.popleft()
+            yield l_argument, l_future.result()
 
 
 class BaseManager:
     """Base class for managing YAML files from gen_dailies directory."""
 
-    def __init__(self, p_dailies_directory: Path, p_filename_pattern: str):
+    def __init__(self, p_dailies_directory: Path, p_filename_pattern: str, p_metrics: Optional[Metrics] = None):
         """
         Initialize manager.
 
         Args:
             p_dailies_directory: Directory containing generated dailies files
             p_filename_pattern: Filename pattern to search for (e.g., 'TradeSkillMaster_Accounting.yaml')
+            p_metrics: Receives the parsing times, worker ones included
         """
         self.m_dailies_directory = p_dailies_directory
+        self.m_metrics = p_metrics or Metrics()
         self.m_filename_pattern = p_filename_pattern
         self.m_files: List[Path] = []
         self.m_data: Dict[Path, Dict[str, Any]] = {}
 
-    def load_all(self) -> None:
-        """Load all matching YAML files."""
+    def find_files(self, p_excluded_timestamps: Optional[Set[str]] = None) -> List[Path]:
+        """
+        List the matching YAML files without loading them.
+
+        Args:
+            p_excluded_timestamps: Snapshot directory names to leave out
+        """
         self.m_files = list(self.m_dailies_directory.rglob(self.m_filename_pattern))
+        if p_excluded_timestamps:
+            self.m_files = [c_file for c_file in self.m_files if c_file.parent.stem not in p_excluded_timestamps]
         self.m_data = {}
-        for c_file in self.m_files:
-            with open(c_file, 'r', encoding='utf-8') as l_file:
-                self.m_data[c_file] = yaml.safe_load(l_file) or {}
+        return self.get_files()
+
+    def load_all(self, p_excluded_timestamps: Optional[Set[str]] = None, p_jobs: int = 1) -> None:
+        """
+        Load all matching YAML files.
+
+        Args:
+            p_excluded_timestamps: Snapshot directory names to leave out
+            p_jobs: Number of worker processes parsing files, 0 for one per core
+        """
+        self.find_files(p_excluded_timestamps)
+        self.m_data = dict(self.iter_files(p_jobs))
+
+    def iter_files(self, p_jobs: int = 1) -> Iterator[Tuple[Path, Dict[str, Any]]]:
+        """
+        Yield (file, data) of the files found by find_files(), in order, parsing them lazily.
+
+        With more than one job, files are parsed ahead in a process pool,
+        at most two per job waiting to be consumed.
+
+        Args:
+            p_jobs: Number of worker processes, 0 for one per core
+        """
+        for c_file, (c_data, c_metrics) in iter_ordered(load_file, self.m_files, p_jobs):
+            self.m_metrics.merge(c_metrics)
+            yield c_file, c_data
 
     def get_files(self) -> List[Path]:
         return self.m_files.copy()
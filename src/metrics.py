@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""Stage timings, peak memory and counters of one command run."""
+
+import cProfile
+import json
+import resource
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+
+def get_peak_rss_mib(p_who: int = resource.RUSAGE_SELF) -> float:
+    """Peak resident memory of this process (or of its finished children) in MiB."""
+    l_max_rss = resource.getrusage(p_who).ru_maxrss
+    # Bytes on macOS, KiB elsewhere
+    return l_max_rss / (1024 * 1024) if sys.platform == 'darwin' else l_max_rss / 1024
+
+
+class Metrics:
+    """
+    Seconds, CPU seconds, calls and peak RSS per named stage, plus counters.
+
+    One instance per command run, created by the CLI and passed to what it
+    builds; a task sent to a worker collects in its own instance, returned
+    with its result and merged by the caller.
+
+    Stages nest: an outer stage includes the time of the inner ones. With
+    a profile directory, every outermost stage also runs under cProfile,
+    its calls accumulated in <profile dir>/<stage>.prof.
+    """
+
+    def __init__(self, p_profile_dir: Optional[Path] = None):
+        self.m_stages: Dict[str, Dict[str, float]] = {}
+        self.m_counters: Dict[str, int] = {}
+        self.m_profile_dir = p_profile_dir
+        self.m_profilers: Dict[str, cProfile.Profile] = {}
+        self.m_depth = 0
+        self.m_start = time.perf_counter()
+        self.m_started_at = datetime.now(timezone.utc).isoformat(timespec='seconds')
+
+    def __getstate__(self) -> Dict:
+        """A copy sent to a worker along with its owner collects apart, without profiling."""
+        l_state = self.__dict__.copy()
+        l_state['m_profile_dir'] = None
+        l_state['m_profilers'] = {}
+        return l_state
+
+    @contextmanager
+    def stage(self, p_name: str) -> Iterator[None]:
+        """Time the block as one call of stage p_name."""
+        l_profiler = None
+        if self.m_profile_dir is not None and self.m_depth == 0:
+            l_profiler = self.m_profilers.setdefault(p_name, cProfile.Profile())
+            l_profiler.enable()
+        self.m_depth += 1
+        l_start = time.perf_counter()
+        l_cpu_start = time.process_time()
+        try:
+            yield
+        finally:
+            self.add_time(p_name, time.perf_counter() - l_start, time.process_time() - l_cpu_start)
+            self.m_depth -= 1
+            if l_profiler is not None:
+                l_profiler.disable()
+
+    def add_time(self, p_name: str, p_seconds: float, p_cpu_seconds: float = 0.0, p_calls: int = 1) -> None:
+        l_stage = self.m_stages.setdefault(p_name, {"seconds": 0.0, "cpu_seconds": 0.0, "calls": 0, "peak_rss_mib": 0.0})
+        l_stage["seconds"] += p_seconds
+        l_stage["cpu_seconds"] += p_cpu_seconds
+        l_stage["calls"] += p_calls
+        l_stage["peak_rss_mib"] = max(l_stage["peak_rss_mib"], get_peak_rss_mib())
+
+    def get_time(self, p_name: str) -> Tuple[float, float]:
+        """(seconds, CPU seconds) spent in stage p_name so far, zeros if it never ran."""
+        l_stage = self.m_stages.get(p_name)
+        return (l_stage["seconds"], l_stage["cpu_seconds"]) if l_stage else (0.0, 0.0)
+
+    def count(self, p_name: str, p_value: int = 1) -> None:
+        self.m_counters[p_name] = self.m_counters.get(p_name, 0) + p_value
+
+    def merge(self, p_data: Dict[str, Any]) -> None:
+        """Add the stages and counters of get_data() from another Metrics, such as a worker's."""
+        for c_name, c_stage in p_data["stages"].items():
+            self.add_time(c_name, c_stage["seconds"], c_stage["cpu_seconds"], c_stage["calls"])
+            self.m_stages[c_name]["peak_rss_mib"] = max(self.m_stages[c_name]["peak_rss_mib"], c_stage["peak_rss_mib"])
+        for c_name, c_value in p_data["counters"].items():
+            self.count(c_name, c_value)
+
+    def get_data(self) -> Dict[str, Any]:
+        return {
+            "started_at": self.m_started_at,
+            "seconds": time.perf_counter() - self.m_start,
+            "peak_rss_mib": get_peak_rss_mib(),
+            "children_peak_rss_mib": get_peak_rss_mib(resource.RUSAGE_CHILDREN),
+            "stages": self.m_stages,
+            "counters": self.m_counters,
+        }
+
+    def save(self, p_filename: Path, p_command: str) -> None:
+        """Write get_data() as JSON, with the command name."""
+        p_filename.parent.mkdir(parents=True, exist_ok=True)
+        with open(p_filename, 'w', encoding='utf-8') as l_file:
+            json.dump({"command": p_command, **self.get_data()}, l_file, indent=2, sort_keys=True)
+            l_file.write('\n')
+
+    def save_profiles(self) -> None:
+        """Write the cProfile stats of each profiled stage."""
+        self.m_profile_dir.mkdir(parents=True, exist_ok=True)
+        for c_name, c_profiler in self.m_profilers.items():
+            c_profiler.dump_stats(self.m_profile_dir / f"{c_name}.prof")
+
+    def print_summary(self) -> None:
+        l_data = self.get_data()
+        print(f"--- {l_data['seconds']:.2f}s, peak RSS {l_data['peak_rss_mib']:.1f} MiB "
+              f"(children {l_data['children_peak_rss_mib']:.1f} MiB)")
+        for c_name, c_stage in sorted(self.m_stages.items(), key=lambda c_stage: -c_stage[1]["seconds"]):
+            print(f"---   {c_name:<28} {c_stage['seconds']:9.3f}s {c_stage['cpu_seconds']:9.3f}s cpu "
+                  f"{c_stage['calls']:8} call(s) {c_stage['peak_rss_mib']:8.1f} MiB")
+        for c_name, c_value in sorted(self.m_counters.items()):
+            print(f"---   {c_name:<28} {c_value}")
+
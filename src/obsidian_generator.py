@@ -2,19 +2,35 @@
 """Obsidian markdown generator."""
 
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Optional, Set, Tuple
 from datetime import datetime
 
 from item_database import ItemDatabase
 from price_database import PriceDatabase
+from metrics import Metrics
+from item_time_series import ItemHistorySeries, ItemTimeSeries, get_label
+from page_renderer import render_pages
+from time_series_downsampling import downsample, rounded_mean_of
+from vault_writer import VaultWriter
 
 
 class ObsidianGenerator:
     """Generate Obsidian markdown files from item and price databases."""
 
-    def __init__(self, p_items_db: ItemDatabase, p_prices_db: PriceDatabase, p_output_dir: Path):
-        """Initialize generator."""
+    def __init__(self, p_items_db: ItemDatabase, p_prices_db: PriceDatabase, p_output_dir: Path,
+                 p_jobs: int = 1, p_max_points: int = 0, p_recent_days: int = 14,
+                 p_metrics: Optional[Metrics] = None):
+        """
+        Initialize generator.
+
+        Args:
+            p_jobs: Number of processes rendering the item pages, 0 for one per core
+            p_max_points: Maximum number of points of a chart, 0 for one per snapshot
+            p_recent_days: Days of history kept at full resolution when charts are downsampled
+            p_metrics: Receives the generation time and the pages written
+        """
         self.m_items_db = p_items_db
+        self.m_metrics = p_metrics or Metrics()
         self.m_prices_db = p_prices_db
         self.m_output_dir = p_output_dir
         self.m_items_dir = p_output_dir / 'items'
@@ -23,72 +39,84 @@ class ObsidianGenerator:
         self.m_quantity_chart_template = self._load_template('quantity_chart.md')
         self.m_details_template = self._load_template('details.md')
         self.m_index_template = self._load_template('index.md')
-
-    def generate(self) -> int:
-        """Generate all Obsidian markdown files."""
+        self.m_series = None
+        self.m_writer = None
+        self.m_jobs = p_jobs
+        self.m_max_points = p_max_points
+        self.m_recent_days = p_recent_days
+
+    def __getstate__(self) -> Dict:
+        """Sent to the rendering workers: templates only, pages get their data slice."""
+        l_state = self.__dict__.copy()
+        for c_name in ('m_items_db', 'm_prices_db', 'm_series', 'm_writer', 'm_metrics'):
+            l_state[c_name] = None
+        return l_state
+
+    def generate(self, p_item_ids: Optional[Set[str]] = None) -> int:
+        """
+        Generate all Obsidian markdown files, only rewriting changed ones.
+
+        Args:
+            p_item_ids: Only render the pages of these items, keeping the others already written, None for all
+        """
+        with self.m_metrics.stage('obsidian.items'):
+            return self._generate(p_item_ids)
+
+    def _generate(self, p_item_ids: Optional[Set[str]]) -> int:
         self.m_items_dir.mkdir(parents=True, exist_ok=True)
+        self.m_writer = VaultWriter(self.m_output_dir, self.m_metrics)
+        if self.m_prices_db.is_lazy():
+            self.m_series = ItemHistorySeries(self.m_prices_db, lambda p_sources: p_sources.get('ahs'))
+        else:
+            self.m_series = ItemTimeSeries(self.m_prices_db.m_prices_by_realm,
+                                           lambda p_sources: p_sources.get('ahs', {}))
 
         l_all_items = self.m_items_db.get_all_by_id()
         l_index_items = []
         l_generated_count = 0
 
+        l_rendered_items = []
         for c_item_id, c_item_name in sorted(l_all_items.items()):
             l_item_filename = f"{c_item_name} - {c_item_id}.md"
-            l_item_file = self.m_items_dir / l_item_filename
-
-            l_markdown = self._generate_item_markdown(c_item_id, c_item_name)
+            l_page = f"{self.m_items_dir.name}/{l_item_filename}"
+            if p_item_ids is not None and c_item_id not in p_item_ids and self.m_writer.has(l_page):
+                self.m_writer.keep(l_page)
+                l_item_filename_no_ext = l_item_filename.replace('.md', '')
+                l_index_items.append(f"- [[{l_item_filename_no_ext}|items/{l_item_filename_no_ext}]]")
+                l_generated_count += 1
+                continue
+            l_rendered_items.append((c_item_id, c_item_name))
+        # Slices are read as pages are rendered, a lazy database is never held whole
+        l_tasks = ((c_item_id, c_item_name, self.m_series.get_item_slice(c_item_id))
+                   for c_item_id, c_item_name in l_rendered_items)
+        l_pages = render_pages(self, '_generate_item_markdown', l_tasks, self.m_jobs, len(l_rendered_items))
+        for (c_item_id, c_item_name), l_markdown in zip(l_rendered_items, l_pages):
+            l_item_filename = f"{c_item_name} - {c_item_id}.md"
             if l_markdown:
-                with open(l_item_file, 'w', encoding='utf-8') as l_file:
-                    l_file.write(l_markdown)
+                self.m_writer.write(f"{self.m_items_dir.name}/{l_item_filename}", l_markdown)
                 l_item_filename_no_ext = l_item_filename.replace('.md', '')
                 l_index_items.append(f"- [[{l_item_filename_no_ext}|items/{l_item_filename_no_ext}]]")
                 l_generated_count += 1
 
         self._generate_index(l_index_items)
+        self.m_writer.finish()
         return l_generated_count
 
-    def _generate_item_markdown(self, p_item_id: str, p_item_name: str) -> str:
-        """Generate markdown content for a single item."""
-        l_prices_data = self.m_prices_db.m_prices_by_realm
-
-        for c_realm, c_timestamps in l_prices_data.items():
-            l_dates = []
-            l_ahs_prices = []
-            l_ahs_min_bid_values = []
-            l_ahs_quantities = []
-            l_table_rows = []
-            for c_timestamp, c_sources in c_timestamps.items():
-                l_timestamp_obj = datetime.strptime(c_timestamp, '%Y_%m_%dT%H_%M_%S')
-                l_date_str = l_timestamp_obj.strftime('%Y-%m-%d %H:%M:%S')
-                l_date_short = l_timestamp_obj.strftime('%Y-%m-%d %H:%M')
-
-                l_ahs_item = c_sources.get('ahs', {}).get(p_item_id)
-                if not l_ahs_item: # keep only item with ahs data
-                    continue
-                l_ahs_price = None
-                l_ahs_min_bid_value = None
-                l_ahs_quantity = None
-
-                if l_ahs_item:
-                    l_ahs_price = l_ahs_item.get('p')
-                    l_ahs_min_bid_value = l_ahs_item.get('m')
-                    l_ahs_quantity = l_ahs_item.get('q')
-
-                if l_ahs_price is not None:
-                    if l_date_str not in l_dates:
-                        l_dates.append(l_date_str)
-                        l_ahs_prices.append(None)
-                        l_ahs_min_bid_values.append(None)
-                        l_ahs_quantities.append(None)
-                    l_index = l_dates.index(l_date_str)
-                    if l_ahs_price is not None:
-                        l_ahs_prices[l_index] = l_ahs_price
-                        l_ahs_min_bid_values[l_index] = l_ahs_min_bid_value
-                        l_ahs_quantities[l_index] = l_ahs_quantity
-                        l_table_rows.append((l_date_short, l_ahs_price, l_ahs_quantity or 0, 'ahs'))
-
-            if not l_dates:
+    def _generate_item_markdown(self, p_item_id: str, p_item_name: str,
+                                p_item_slice: List[Tuple[str, List[Tuple[datetime, Dict]]]]) -> str:
+        """Generate markdown content for a single item from its [(realm, ahs points)]."""
+        l_markdown = ""
+        for c_realm, c_points in p_item_slice:
+            l_times, l_ahs_prices, l_ahs_min_bid_values, l_ahs_quantities, l_table_rows = \
+                self._get_realm_slots(c_points)
+            if not l_times:
                 return ""
+            if self.m_max_points:
+                # Charts only, the details table keeps every snapshot
+                l_times, (l_ahs_prices, l_ahs_min_bid_values, l_ahs_quantities) = downsample(
+                    l_times, [l_ahs_prices, l_ahs_min_bid_values, l_ahs_quantities], self.m_max_points,
+                    [rounded_mean_of, rounded_mean_of, rounded_mean_of], p_recent_days=self.m_recent_days)
+            l_dates = [get_label(c_time, '%Y-%m-%d %H:%M:%S') for c_time in l_times]
 
             l_price_chart_content = self._generate_price_chart_content(l_dates, l_ahs_prices, l_ahs_min_bid_values)
             l_quantity_chart_content = self._generate_quantity_chart_content(l_dates, l_ahs_quantities)
@@ -109,6 +137,42 @@ class ObsidianGenerator:
 
         return l_markdown
 
+    def _get_realm_slots(self, p_points: List[Tuple[datetime, Dict]]) -> Tuple[List, List, List, List, List]:
+        """
+        Lay the ahs points of one item and realm out in date slots shared by
+        the price chart, the quantity chart and the details table.
+
+        Returns:
+            (slot datetimes, prices, min bids, quantities, table rows)
+        """
+        l_slots: Dict[str, int] = {}
+        l_times = []
+        l_ahs_prices = []
+        l_ahs_min_bid_values = []
+        l_ahs_quantities = []
+        l_table_rows = []
+        for c_time, c_ahs_item in p_points:
+            if not c_ahs_item: # keep only item with ahs data
+                continue
+            l_ahs_price = c_ahs_item.get('p')
+            if l_ahs_price is None:
+                continue
+            l_date_str = get_label(c_time, '%Y-%m-%d %H:%M:%S')
+            l_index = l_slots.get(l_date_str)
+            if l_index is None:
+                l_index = l_slots[l_date_str] = len(l_times)
+                l_times.append(c_time)
+                l_ahs_prices.append(None)
+                l_ahs_min_bid_values.append(None)
+                l_ahs_quantities.append(None)
+            l_ahs_quantity = c_ahs_item.get('q')
+            l_ahs_prices[l_index] = l_ahs_price
+            l_ahs_min_bid_values[l_index] = c_ahs_item.get('m')
+            l_ahs_quantities[l_index] = l_ahs_quantity
+            l_table_rows.append((get_label(c_time, '%Y-%m-%d %H:%M'),
+                                 l_ahs_price, l_ahs_quantity or 0, 'ahs'))
+        return l_times, l_ahs_prices, l_ahs_min_bid_values, l_ahs_quantities, l_table_rows
+
     def _load_template(self, p_filename: str) -> str:
         """Load template from file."""
         l_template_path = self.m_templates_dir / p_filename
@@ -148,8 +212,5 @@ class ObsidianGenerator:
 
     def _generate_index(self, p_index_items: List[str]) -> None:
         """Generate Item Index.md file."""
-        l_index_file = self.m_output_dir / 'Item Index.md'
         l_index_content = self.m_index_template + '\n'.join(sorted(p_index_items)) + '\n'
-
-        with open(l_index_file, 'w', encoding='utf-8') as l_file:
-            l_file.write(l_index_content)
+        self.m_writer.write('Item Index.md', l_index_content)
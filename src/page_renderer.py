@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""Render Obsidian pages in a process pool."""
+
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Any, Iterable, Iterator, List, Optional, Tuple
+
+
+_g_renderer = None
+
+
+def _init_worker(p_renderer: Any) -> None:
+    global _g_renderer
+    _g_renderer = p_renderer
+
+
+def _render_chunk(p_method_name: str, p_tasks: List[Tuple]) -> List[str]:
+    l_method = getattr(_g_renderer, p_method_name)
+    return [l_method(*c_args) for c_args in p_tasks]
+
+
+def get_job_count(p_jobs: int) -> int:
+    """Number of worker processes for p_jobs, 0 meaning one per core."""
+    return p_jobs if p_jobs > 0 else (os.cpu_count() or 1)
+
+
+def render_pages(p_renderer: Any, p_method_name: str, p_tasks: Iterable[Tuple], p_jobs: int,
+                 p_count: Optional[int] = None) -> Iterator[str]:
+    """
+    Yield p_renderer.<p_method_name>(*task) for every task, in task order.
+
+    With more than one job, p_renderer is sent once to each worker and the
+    tasks, which should only carry the data of their page, are sent in
+    chunks. Tasks are taken as the pages are rendered, so an iterator of
+    tasks never holds more than a few chunks of page data.
+
+    Args:
+        p_renderer: Generator holding the templates, pickled without its databases
+        p_method_name: Name of the rendering method
+        p_tasks: Arguments of each call, a list or an iterator
+        p_jobs: Number of worker processes, 0 for one per core
+        p_count: Number of tasks, needed when p_tasks is an iterator
+    """
+    l_count = len(p_tasks) if p_count is None else p_count
+    l_jobs = get_job_count(p_jobs)
+    if l_jobs == 1 or l_count < 2:
+        l_method = getattr(p_renderer, p_method_name)
+        for c_args in p_tasks:
+            yield l_method(*c_args)
+        return
+
+    l_chunk_size = max(1, l_count // (l_jobs * 4))
+    l_tasks = iter(p_tasks)
+    with ProcessPoolExecutor(max_workers=min(l_jobs, -(-l_count // l_chunk_size)),
+                             initializer=_init_worker, initargs=(p_renderer,)) as l_pool:
+        l_pending = deque()
+        while True:
+            l_chunk = list(islice(l_tasks, l_chunk_size))
+            if l_chunk:
+                l_pending.append(l_pool.submit(_render_chunk, p_method_name, l_chunk))
+            # Keep every worker busy without reading all the tasks ahead
+            while l_pending and (len(l_pending) > l_jobs * 2 or not l_chunk):
+                yield from l_pending.popleft().result()
+            if not l_chunk:
+                return
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""Convert, ingest and generate the vault in a single process."""
+
+import fcntl
+import os
+import sys
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from converters.ahscanner_converter import AHScannerConverter
+from converters.conversion_manifest import ConversionManifest
+from converters.dailies_converter import add_parse_time
+from item_database import ItemDatabase
+from price_database import PriceDatabase
+from auction_database import AuctionDatabase
+from managers.ahscanner_manager import AHScannerManager
+from managers.base_manager import iter_ordered
+from obsidian_generator import ObsidianGenerator
+from ahscanner_obsidian_generator import AHScannerObsidianGenerator
+from unknown_item_report import UnknownItemReport
+import metrics
+import yaml_io
+
+
+LUA_FILENAME = 'AHScanner.lua'
+
+
+def load_snapshot(p_subdir: Path) -> Tuple[Dict, Optional[str], Dict]:
+    """
+    (data, error, metrics) of the AHScanner.lua of one snapshot directory,
+    the data being what convert writes to AHScanner.yaml. Module level so
+    that it can be sent to a process pool.
+    """
+    l_metrics = metrics.Metrics()
+    with l_metrics.stage('convert.snapshot'):
+        l_data, l_error = _load_snapshot(p_subdir, l_metrics)
+    add_parse_time(l_metrics)
+    return l_data, l_error, l_metrics.get_data()
+
+
+def _load_snapshot(p_subdir: Path, p_metrics: metrics.Metrics) -> Tuple[Dict, Optional[str]]:
+    l_file_path = p_subdir / LUA_FILENAME
+    if not l_file_path.exists():
+        print(f"=== Warning: {LUA_FILENAME} in {p_subdir.name} (not found)")
+        p_metrics.count('warnings')
+        return {}, None
+    try:
+        l_converter = AHScannerConverter(l_file_path, p_metrics=p_metrics)
+        l_converter.load()
+    except Exception as l_error:
+        return {}, str(l_error)
+    # Databases and pages keep insertion order, use the one of a YAML round trip
+    return _sort_keys(l_converter.m_python_data or {}), None
+
+
+def _sort_keys(p_value: Any) -> Any:
+    """p_value with the keys of every nested dict sorted, as yaml_io.dump() writes them."""
+    if isinstance(p_value, dict):
+        return {c_key: _sort_keys(p_value[c_key]) for c_key in sorted(p_value)}
+    return p_value
+
+
+class PipelineLockedError(Exception):
+    """Raised when another process holds the pipeline lock."""
+
+
+class PipelineLock:
+    """
+    Exclusive lock on a file held while a pipeline writes the databases and
+    the vault, so that two runs never interleave. Released when the process
+    exits, even killed.
+    """
+
+    def __init__(self, p_filename: Path):
+        self.m_filename = p_filename
+        self.m_file = None
+
+    def __enter__(self) -> 'PipelineLock':
+        self.acquire()
+        return self
+
+    def __exit__(self, *p_args) -> None:
+        self.release()
+
+    def acquire(self) -> None:
+        """Take the lock, raising PipelineLockedError if another process holds it."""
+        self.m_filename.parent.mkdir(parents=True, exist_ok=True)
+        self.m_file = open(self.m_filename, 'a+', encoding='utf-8')
+        try:
+            fcntl.flock(self.m_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            self.m_file.seek(0)
+            l_owner = self.m_file.read().strip() or '?'
+            self.m_file.close()
+            self.m_file = None
+            raise PipelineLockedError(f"{self.m_filename} is locked by process {l_owner}")
+        self.m_file.truncate(0)
+        self.m_file.write(f"{os.getpid()}\n")
+        self.m_file.flush()
+
+    def release(self) -> None:
+        if self.m_file is not None:
+            self.m_file.truncate(0)
+            fcntl.flock(self.m_file, fcntl.LOCK_UN)
+            self.m_file.close()
+            self.m_file = None
+
+
+class Pipeline:
+    """
+    Hold the item, price and auction databases in memory, ingest snapshots
+    converted in memory and hand the databases to the Obsidian generators,
+    without the YAML round trips of the separate commands.
+    """
+
+    def __init__(self, p_dailies_dir: Path, p_item_database_file: Path, p_price_database_file: Path,
+                 p_auction_database_file: Path, p_unknown_items_file: Path, p_rebuild: bool = False,
+                 p_jobs: int = 1, p_gen_dailies_dir: Optional[Path] = None,
+                 p_metrics: Optional[metrics.Metrics] = None):
+        """
+        Load the databases.
+
+        Args:
+            p_dailies_dir: Directory containing one subdirectory per snapshot
+            p_rebuild: Ingest every snapshot again instead of the new ones
+            p_jobs: Number of processes converting snapshots and rendering pages, 0 for one per core
+            p_gen_dailies_dir: Also write the AHScanner.yaml of converted snapshots there, None for never
+            p_metrics: Receives the metrics of every stage, worker ones included
+        """
+        self.m_dailies_dir = p_dailies_dir
+        self.m_metrics = p_metrics or metrics.Metrics()
+        self.m_jobs = p_jobs
+        self.m_gen_dailies_dir = p_gen_dailies_dir
+        self.m_items_db = ItemDatabase(p_item_database_file, self.m_metrics)
+        self.m_prices_db = PriceDatabase(p_price_database_file, p_metrics=self.m_metrics)
+        self.m_auction_database = AuctionDatabase(p_auction_database_file, p_metrics=self.m_metrics)
+        if p_rebuild:
+            self.m_prices_db.m_prices_by_realm = {}
+            self.m_auction_database.m_auctions_by_realm = {}
+        self.m_unknown_report = UnknownItemReport(p_unknown_items_file, p_rebuild, self.m_metrics)
+        self.m_manager = AHScannerManager(p_dailies_dir, self.m_items_db, self.m_metrics)
+        self.m_failed: List[str] = []
+        self.m_ingested: List[str] = []
+        self.m_empty: List[str] = []
+
+    def get_new_subdirs(self) -> List[Path]:
+        """Snapshot directories not in the databases yet, '_' prefixed ones are ignored."""
+        l_known_timestamps = self.m_prices_db.get_timestamps() & self.m_auction_database.get_timestamps()
+        return sorted(c_path for c_path in self.m_dailies_dir.iterdir()
+                      if c_path.is_dir() and not c_path.name.startswith('_')
+                      and c_path.name not in l_known_timestamps)
+
+    def ingest(self, p_subdirs: List[Path]) -> int:
+        """
+        Convert the snapshots of p_subdirs in memory and add them to the databases.
+
+        Returns:
+            Number of items added to the price database
+        """
+        l_items_added = self.m_manager.ingest_snapshots(
+            self._iter_snapshots(p_subdirs), self.m_prices_db, self.m_auction_database, self.m_unknown_report)
+        self.m_unknown_report.forget_known(self.m_items_db)
+        return l_items_added
+
+    def get_item_ids(self, p_timestamps: List[str]) -> Set[str]:
+        """IDs of the items of the snapshots p_timestamps, in any realm."""
+        l_timestamps = set(p_timestamps)
+        return {c_item_id for c_snapshots in self.m_auction_database.m_auctions_by_realm.values()
+                for c_timestamp, c_items in c_snapshots.items() if c_timestamp in l_timestamps
+                for c_item_id in c_items}
+
+    def save(self) -> None:
+        """Write the databases and the unknown item report."""
+        self.m_unknown_report.save()
+        self.m_prices_db.save()
+        self.m_auction_database.save()
+
+    def generate(self, p_output_dir: Path, p_force: bool = False, p_polyline: bool = False,
+                 p_max_points: int = 0, p_recent_days: int = 14,
+                 p_item_ids: Optional[Set[str]] = None) -> Tuple[ObsidianGenerator, AHScannerObsidianGenerator]:
+        """
+        Generate the item pages in p_output_dir and the auction pages in p_output_dir/auctions.
+
+        Args:
+            p_force: Render the per-snapshot auction pages again
+            p_polyline: Draw price charts as one curve element
+            p_max_points: Downsample the charts to this many points, 0 for one per snapshot
+            p_recent_days: Days of history not downsampled
+            p_item_ids: Only render the item pages of these items, None for all
+        """
+        l_generator = ObsidianGenerator(self.m_items_db, self.m_prices_db, p_output_dir,
+                                        self.m_jobs, p_max_points, p_recent_days, self.m_metrics)
+        l_generator.generate(p_item_ids)
+        l_auctions_generator = AHScannerObsidianGenerator(self.m_items_db, self.m_auction_database,
+                                                          p_output_dir / 'auctions', p_force, self.m_jobs,
+                                                          p_polyline, p_max_points, p_recent_days, self.m_metrics)
+        l_auctions_generator.generate(p_item_ids)
+        return l_generator, l_auctions_generator
+
+    def get_failed(self) -> List[str]:
+        return self.m_failed.copy()
+
+    def get_ingested(self) -> List[str]:
+        """Timestamps of the snapshots converted and ingested so far."""
+        return self.m_ingested.copy()
+
+    def get_empty(self) -> List[str]:
+        """Timestamps of the snapshots converted without any realm, never in the databases."""
+        return self.m_empty.copy()
+
+    def _iter_snapshots(self, p_subdirs: List[Path]) -> Iterator[Tuple[str, str, Dict[str, Dict]]]:
+        """Yield (timestamp, realm, items) of each snapshot as it is converted."""
+        l_manifest = ConversionManifest(self.m_gen_dailies_dir, self.m_metrics) if self.m_gen_dailies_dir else None
+        l_metrics = self.m_metrics
+        for c_index, (c_subdir, (c_data, c_error, c_metrics)) in enumerate(iter_ordered(load_snapshot, p_subdirs, self.m_jobs)):
+            l_progress = f"[{c_index + 1}/{len(p_subdirs)}]"
+            l_metrics.merge(c_metrics)
+            if c_error:
+                l_metrics.count('errors')
+                print("***", f"{l_progress} {c_subdir.name} failed: {c_error}", file=sys.stderr)
+                self.m_failed.append(c_subdir.name)
+                continue
+            if not c_data:
+                l_metrics.count('warnings')
+                print(f"=== Warning: {l_progress} {c_subdir.name} has no realm, skipped")
+                self.m_empty.append(c_subdir.name)
+                continue
+            print(f"--- {l_progress} {c_subdir.name} converted")
+            self.m_ingested.append(c_subdir.name)
+            if l_manifest is not None:
+                self._write_gen_daily(l_manifest, c_subdir, c_data)
+            for c_realm, c_items in c_data.items():
+                yield c_subdir.name, c_realm, c_items
+        if l_manifest is not None:
+            l_manifest.save()
+
+    def _write_gen_daily(self, p_manifest: ConversionManifest, p_subdir: Path, p_data: Dict) -> None:
+        """Write the AHScanner.yaml convert would have written, and record it in the manifest."""
+        l_key = f"{p_subdir.name}/{LUA_FILENAME}"
+        l_output_path = self.m_gen_dailies_dir / p_subdir.name / LUA_FILENAME.replace('.lua', '.yaml')
+        p_manifest.is_up_to_date(l_key, p_subdir / LUA_FILENAME, l_output_path, AHScannerConverter.VERSION)
+        l_output_path.parent.mkdir(parents=True, exist_ok=True)
+        yaml_io.dump_file(p_data, l_output_path, p_metrics=self.m_metrics)
+        p_manifest.record(l_key)
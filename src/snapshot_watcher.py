@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""Run new snapshot directories of dailies through a resident pipeline."""
+
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from pipeline import LUA_FILENAME, Pipeline
+
+
+class SnapshotWatcher:
+    """
+    Poll dailies for snapshot directories missing from the databases, and
+    convert, ingest and render them with a pipeline whose databases stay
+    in memory between batches.
+
+    A snapshot is taken once its AHScanner.lua was left untouched for
+    p_debounce seconds and kept its size since the previous poll, so that
+    a copy in progress is never read. A snapshot that failed or had no
+    realm is retried only when its file changes.
+    """
+
+    def __init__(self, p_pipeline: Pipeline, p_output_dir: Path, p_interval: float = 5.0,
+                 p_debounce: float = 10.0, p_force: bool = False, p_polyline: bool = False,
+                 p_max_points: int = 0, p_recent_days: int = 14):
+        """
+        Initialize watcher.
+
+        Args:
+            p_pipeline: Pipeline holding the databases
+            p_output_dir: Item pages, auction pages going to p_output_dir/auctions
+            p_interval: Seconds between two polls
+            p_debounce: Seconds a Lua file must stay unmodified before being read
+            p_force, p_polyline, p_max_points, p_recent_days: Options of Pipeline.generate()
+        """
+        self.m_pipeline = p_pipeline
+        self.m_output_dir = p_output_dir
+        self.m_interval = p_interval
+        self.m_debounce = p_debounce
+        self.m_generate_options = (p_force, p_polyline, p_max_points, p_recent_days)
+        self.m_signatures: Dict[str, Tuple[int, int]] = {}
+        self.m_failed: Dict[str, Tuple[int, int]] = {}
+        self.m_empty: Dict[str, Tuple[int, int]] = {}
+        self.m_batch_count = 0
+
+    def poll(self) -> List[Path]:
+        """Snapshot directories ready to be ingested, by name."""
+        l_now = time.time()
+        l_ready = []
+        for c_subdir in self.m_pipeline.get_new_subdirs():
+            try:
+                l_stat = (c_subdir / LUA_FILENAME).stat()
+            except FileNotFoundError:
+                continue
+            l_signature = (l_stat.st_size, l_stat.st_mtime_ns)
+            if l_signature in (self.m_failed.get(c_subdir.name), self.m_empty.get(c_subdir.name)):
+                continue
+            l_previous = self.m_signatures.get(c_subdir.name, l_signature)
+            self.m_signatures[c_subdir.name] = l_signature
+            if l_previous == l_signature and l_now - l_stat.st_mtime >= self.m_debounce:
+                l_ready.append(c_subdir)
+        return l_ready
+
+    def process(self, p_subdirs: List[Path]) -> int:
+        """
+        Ingest p_subdirs, save the databases and render the pages of the
+        items they contain, every page for the first batch.
+
+        Returns:
+            Number of snapshots ingested
+        """
+        l_start = time.perf_counter()
+        l_ingested_count = len(self.m_pipeline.get_ingested())
+        l_failed_count = len(self.m_pipeline.get_failed())
+        l_empty_count = len(self.m_pipeline.get_empty())
+        self.m_pipeline.ingest(p_subdirs)
+        for c_name in self.m_pipeline.get_failed()[l_failed_count:]:
+            self.m_failed[c_name] = self.m_signatures.get(c_name)
+        for c_name in self.m_pipeline.get_empty()[l_empty_count:]:
+            self.m_empty[c_name] = self.m_signatures.get(c_name)
+        l_timestamps = self.m_pipeline.get_ingested()[l_ingested_count:]
+        for c_subdir in p_subdirs:
+            self.m_signatures.pop(c_subdir.name, None)
+        if not l_timestamps:
+            return 0
+
+        self.m_pipeline.save()
+        l_item_ids = self.m_pipeline.get_item_ids(l_timestamps) if self.m_batch_count else None
+        l_generator, l_auctions_generator = self.m_pipeline.generate(
+            self.m_output_dir, *self.m_generate_options, p_item_ids=l_item_ids)
+        self.m_batch_count += 1
+        print(f"--- {len(l_timestamps)} snapshot(s) in {time.perf_counter() - l_start:.2f}s, "
+              f"item pages: {l_generator.m_writer.get_summary()}, "
+              f"auction pages: {l_auctions_generator.m_writer.get_summary()}")
+        return len(l_timestamps)
+
+    def run(self) -> None:
+        """Poll and process until interrupted."""
+        print(f"--- Watching {self.m_pipeline.m_dailies_dir} every {self.m_interval:g}s")
+        while True:
+            l_ready = self.poll()
+            if l_ready:
+                self.process(l_ready)
+            time.sleep(self.m_interval)
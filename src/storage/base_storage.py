@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""Base class for database storage backends."""
+
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Set, Tuple
+
+from metrics import Metrics
+
+
+class BaseStorage(ABC):
+    """
+    Load and save the nested dict of a database. Subclasses must implement
+    exists(), load() and save(); append() and get_timestamps() when they set
+    SUPPORTS_APPEND, get_timestamps(), get_realms(), get_snapshot_keys(),
+    get_snapshot() and get_item_history() when they set SUPPORTS_QUERIES.
+    """
+
+    SUPPORTS_APPEND = False
+    SUPPORTS_QUERIES = False
+
+    def __init__(self, p_filename: Path, p_metrics: Optional[Metrics] = None):
+        """
+        Initialize storage.
+
+        Args:
+            p_filename: Path of the database file
+            p_metrics: Receives the bytes written, None to discard them
+        """
+        self.m_filename = p_filename
+        self.m_metrics = p_metrics or Metrics()
+
+    @abstractmethod
+    def exists(self) -> bool:
+        """Tell whether the database was saved at least once."""
+
+    @abstractmethod
+    def load(self) -> Dict:
+        """The whole database, {} if it does not exist."""
+
+    @abstractmethod
+    def save(self, p_data: Dict) -> None:
+        """Replace the database with p_data."""
+
+    def append(self, p_data: Dict) -> None:
+        """Add new realm/timestamp subtrees without rewriting the database."""
+        raise NotImplementedError
+
+    def get_timestamps(self) -> Set[str]:
+        """Timestamps held by the database, for storages supporting append()."""
+        raise NotImplementedError
+
+    def get_segment_count(self) -> int:
+        return 0
+
+    def close(self) -> None:
+        """Release what the queries keep open."""
+
+    def get_realms(self) -> List[str]:
+        """Realms of the database in key order, for storages supporting queries."""
+        raise NotImplementedError
+
+    def get_snapshot_keys(self) -> List[Tuple[str, str]]:
+        """(realm, timestamp) of every snapshot in key order, for storages supporting queries."""
+        raise NotImplementedError
+
+    def get_snapshot(self, p_realm: str, p_timestamp: str) -> Dict:
+        """Stored data of one snapshot, for storages supporting queries."""
+        raise NotImplementedError
+
+    def get_item_history(self, p_item_id: str) -> Dict:
+        """Stored data of one item, for storages supporting queries."""
+        raise NotImplementedError
+
+
+def iter_leaves(p_data: Dict, p_depth: int, p_empty_paths: List[List[str]],
+                p_path: Tuple = ()) -> Iterator[Tuple[Tuple, Any]]:
+    """
+    Yield (key path, leaf) for every value p_depth levels down, in sorted
+    key order. Empty dicts met on the way are added to p_empty_paths.
+    """
+    if not isinstance(p_data, dict):
+        raise ValueError(f"*** Error: Expected a mapping at {'/'.join(p_path) or 'root'}")
+    if not p_data and p_path:
+        p_empty_paths.append(list(p_path))
+    for c_key in sorted(p_data):
+        l_path = p_path + (c_key,)
+        if len(l_path) == p_depth:
+            yield l_path, p_data[c_key]
+        else:
+            yield from iter_leaves(p_data[c_key], p_depth, p_empty_paths, l_path)
+
+
+def build_nested(p_paths: Sequence[Tuple], p_leaves: Sequence[Any], p_empty_paths: List[List[str]]) -> Dict:
+    """Inverse of iter_leaves() for rows stored in sorted key order."""
+    l_result = {}
+    l_last_path = None
+    l_parent = None
+    for c_path, c_leaf in zip(p_paths, p_leaves):
+        if l_last_path is None or c_path[:-1] != l_last_path[:-1]:
+            l_parent = l_result
+            for c_key in c_path[:-1]:
+                l_parent = l_parent.setdefault(c_key, {})
+        l_parent[c_path[-1]] = c_leaf
+        l_last_path = c_path
+    for c_path in p_empty_paths:
+        l_parent = l_result
+        for c_key in c_path[:-1]:
+            l_parent = l_parent.setdefault(c_key, {})
+        l_parent[c_path[-1]] = {}
+        for c_key in list(sorted(l_parent)):
+            l_parent[c_key] = l_parent.pop(c_key)
+    return l_result
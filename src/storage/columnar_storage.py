@@ -0,0 +1,653 @@
+#!/usr/bin/env python3
+"""Columnar binary storage backend."""
+
+import json
+import math
+import mmap
+import os
+import sys
+import zlib
+from abc import abstractmethod
+from array import array
+from itertools import groupby
+from operator import itemgetter
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+from metrics import Metrics
+
+from .base_storage import BaseStorage, iter_leaves, build_nested
+
+
+MAGIC = b'AHSCOL01'
+_ALIGN = 8
+_LITTLE_ENDIAN = sys.byteorder == 'little'
+
+
+def _align(p_offset: int) -> int:
+    return (p_offset + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+class ColumnarFile:
+    """
+    File of named tables made of typed columns.
+
+    Layout: magic, header size (uint64), JSON header, then every column as a
+    raw little-endian array aligned on 8 bytes. The header gives the row
+    count of each table, the typecode and data offset of each column and
+    the string dictionary of dictionary-encoded columns. Columns are read
+    through a read-only mmap without copying the file, except the ones
+    written compressed, which have their zlib stream size in the header.
+    """
+
+    def __init__(self, p_filename: Path):
+        """Open p_filename for reading."""
+        self.m_filename = p_filename
+        self.m_file = open(p_filename, 'rb')
+        self.m_map = mmap.mmap(self.m_file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.m_map[:len(MAGIC)] != MAGIC:
+            self.close()
+            raise ValueError(f"*** Error: Not a columnar database: {p_filename}")
+        l_header_start = len(MAGIC) + 8
+        l_header_size = int.from_bytes(self.m_map[len(MAGIC):l_header_start], 'little')
+        self.m_header = json.loads(self.m_map[l_header_start:l_header_start + l_header_size].decode('utf-8'))
+        self.m_data_start = _align(l_header_start + l_header_size)
+
+    def __enter__(self) -> 'ColumnarFile':
+        return self
+
+    def __exit__(self, *p_args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self.m_map is not None:
+            self.m_map.close()
+            self.m_map = None
+        self.m_file.close()
+
+    def get_meta(self) -> Dict:
+        return self.m_header["meta"]
+
+    def get_row_count(self, p_table: str) -> int:
+        return self.m_header["tables"][p_table]["rows"]
+
+    def read_column(self, p_table: str, p_column: str) -> List:
+        """Return the values of one column, decoded if dictionary-encoded."""
+        l_table = self.m_header["tables"][p_table]
+        l_info = l_table["columns"][p_column]
+        l_item_size = array(l_info["type"]).itemsize
+        l_start = self.m_data_start + l_info["offset"]
+        l_end = l_start + l_info.get("size", l_table["rows"] * l_item_size)
+        with memoryview(self.m_map)[l_start:l_end] as l_bytes:
+            if "size" in l_info:
+                l_array = array(l_info["type"], zlib.decompress(l_bytes))
+                if not _LITTLE_ENDIAN:
+                    l_array.byteswap()
+                l_values = l_array.tolist()
+            elif _LITTLE_ENDIAN:
+                with l_bytes.cast(l_info["type"]) as l_view:
+                    l_values = l_view.tolist()
+            else:
+                l_array = array(l_info["type"], l_bytes.tobytes())
+                l_array.byteswap()
+                l_values = l_array.tolist()
+        l_dictionary = l_info.get("dictionary")
+        if l_dictionary is not None:
+            return [l_dictionary[c_code] for c_code in l_values]
+        return l_values
+
+    @staticmethod
+    def write(p_filename: Path, p_tables: Dict[str, Dict[str, Any]], p_meta: Dict,
+              p_compress: bool = False) -> int:
+        """
+        Write p_tables atomically, return the size of the file.
+
+        Args:
+            p_filename: Output file
+            p_tables: {table: {column: array or (codes array, dictionary)}}
+            p_meta: JSON-serializable metadata stored in the header
+            p_compress: zlib-compress every column, which then loses the zero-copy read
+        """
+        l_header = {"meta": p_meta, "tables": {}}
+        l_blocks = []
+        l_offset = 0
+        for c_table, c_columns in p_tables.items():
+            l_rows = None
+            l_columns = {}
+            for c_name, c_column in c_columns.items():
+                l_dictionary = None
+                if isinstance(c_column, tuple):
+                    c_column, l_dictionary = c_column
+                if l_rows is None:
+                    l_rows = len(c_column)
+                elif len(c_column) != l_rows:
+                    raise ValueError(f"*** Error: Column '{c_table}.{c_name}' has {len(c_column)} rows, "
+                                     f"expected {l_rows}")
+                l_columns[c_name] = {"type": c_column.typecode, "offset": l_offset}
+                if l_dictionary is not None:
+                    l_columns[c_name]["dictionary"] = l_dictionary
+                if not _LITTLE_ENDIAN:
+                    c_column = array(c_column.typecode, c_column)
+                    c_column.byteswap()
+                l_size = len(c_column) * c_column.itemsize
+                if p_compress:
+                    c_column = zlib.compress(c_column.tobytes(), 9)
+                    l_size = l_columns[c_name]["size"] = len(c_column)
+                l_blocks.append((l_offset, c_column))
+                l_offset = _align(l_offset + l_size)
+            l_header["tables"][c_table] = {"rows": l_rows or 0, "columns": l_columns}
+
+        l_header_bytes = json.dumps(l_header, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        l_data_start = _align(len(MAGIC) + 8 + len(l_header_bytes))
+        p_filename.parent.mkdir(parents=True, exist_ok=True)
+        l_tmp_filename = p_filename.with_name(p_filename.name + '.tmp')
+        with open(l_tmp_filename, 'wb') as l_file:
+            l_file.write(MAGIC)
+            l_file.write(len(l_header_bytes).to_bytes(8, 'little'))
+            l_file.write(l_header_bytes)
+            for c_offset, c_column in l_blocks:
+                l_file.write(b'\0' * (l_data_start + c_offset - l_file.tell()))
+                if isinstance(c_column, bytes):
+                    l_file.write(c_column)
+                else:
+                    c_column.tofile(l_file)
+            l_size = l_file.tell()
+        os.replace(l_tmp_filename, p_filename)
+        return l_size
+
+
+class KeyColumns:
+    """Dictionary-encoded string key columns, filled row by row."""
+
+    def __init__(self, p_names: Sequence[str]):
+        self.m_names = tuple(p_names)
+        self.m_codes = {c_name: array('I') for c_name in self.m_names}
+        self.m_dictionaries: Dict[str, Dict[str, int]] = {c_name: {} for c_name in self.m_names}
+
+    def append(self, p_keys: Sequence[str]) -> None:
+        for c_name, c_key in zip(self.m_names, p_keys):
+            if not isinstance(c_key, str):
+                raise ValueError(f"*** Error: Key '{c_name}' must be a string: {c_key!r}")
+            l_dictionary = self.m_dictionaries[c_name]
+            l_code = l_dictionary.get(c_key)
+            if l_code is None:
+                l_code = l_dictionary[c_key] = len(l_dictionary)
+            self.m_codes[c_name].append(l_code)
+
+    def get_columns(self) -> Dict[str, Tuple[array, List[str]]]:
+        return {c_name: (self.m_codes[c_name], list(self.m_dictionaries[c_name]))
+                for c_name in self.m_names}
+
+    def read(self, p_file: ColumnarFile, p_table: str) -> List[Tuple[str, ...]]:
+        return list(zip(*(p_file.read_column(p_table, c_name) for c_name in self.m_names)))
+
+
+class FieldColumns:
+    """
+    Flat numeric records stored as one float64 column per field, plus a
+    presence mask and an int mask so that ints and missing fields survive
+    the round trip. Fixed-size lists are stored as one column per item.
+    """
+
+    def __init__(self, p_prefix: str, p_scalars: Sequence[str], p_lists: Optional[Dict[str, int]] = None):
+        self.m_prefix = p_prefix
+        self.m_lists = p_lists or {}
+        self.m_fields = sorted(list(p_scalars) + list(self.m_lists))
+        if len(self.m_fields) > 64:
+            raise ValueError("*** Error: At most 64 fields per record")
+        self.m_columns: Dict[str, array] = {}
+        for c_field in self.m_fields:
+            for c_column in self._get_column_names(c_field):
+                self.m_columns[c_column] = array('d')
+        self.m_has_mask = array('Q')
+        self.m_int_mask = array('Q')
+
+    def append(self, p_record: Dict) -> None:
+        l_unknown = set(p_record) - set(self.m_fields)
+        if l_unknown:
+            raise ValueError(f"*** Error: Unsupported field(s) {sorted(l_unknown)} in {self.m_prefix or 'record'}")
+        l_has_mask = 0
+        l_int_mask = 0
+        for c_bit, c_field in enumerate(self.m_fields):
+            l_value = p_record.get(c_field)
+            l_names = self._get_column_names(c_field)
+            if l_value is None:
+                for c_name in l_names:
+                    self.m_columns[c_name].append(math.nan)
+                continue
+            l_values = l_value if c_field in self.m_lists else [l_value]
+            if len(l_values) != len(l_names):
+                raise ValueError(f"*** Error: Field '{c_field}' must have {len(l_names)} values: {l_value}")
+            l_has_mask |= 1 << c_bit
+            if all(type(c_value) is int for c_value in l_values):
+                l_int_mask |= 1 << c_bit
+            for c_name, c_value in zip(l_names, l_values):
+                self.m_columns[c_name].append(c_value)
+        self.m_has_mask.append(l_has_mask)
+        self.m_int_mask.append(l_int_mask)
+
+    def get_columns(self) -> Dict[str, array]:
+        l_columns = {f"{self.m_prefix}has": self.m_has_mask, f"{self.m_prefix}int": self.m_int_mask}
+        for c_name, c_column in self.m_columns.items():
+            l_columns[f"{self.m_prefix}{c_name}"] = c_column
+        return l_columns
+
+    def read(self, p_file: ColumnarFile, p_table: str) -> List[Dict]:
+        return self.decode({c_name: p_file.read_column(p_table, c_name) for c_name in self.get_columns()})
+
+    def decode(self, p_columns: Dict[str, Sequence]) -> List[Dict]:
+        """Records of the columns named as in get_columns()."""
+        l_has_masks = p_columns[f"{self.m_prefix}has"]
+        l_int_masks = p_columns[f"{self.m_prefix}int"]
+        l_fields = []
+        for c_bit, c_field in enumerate(self.m_fields):
+            l_columns = [p_columns[f"{self.m_prefix}{c_name}"] for c_name in self._get_column_names(c_field)]
+            l_fields.append((1 << c_bit, c_field, c_field in self.m_lists, l_columns))
+
+        l_records = []
+        for c_row, (c_has_mask, c_int_mask) in enumerate(zip(l_has_masks, l_int_masks)):
+            l_record = {}
+            for c_bit, c_field, c_is_list, c_columns in l_fields:
+                if not c_has_mask & c_bit:
+                    continue
+                if c_int_mask & c_bit:
+                    l_values = [int(c_column[c_row]) for c_column in c_columns]
+                else:
+                    l_values = [c_column[c_row] for c_column in c_columns]
+                l_record[c_field] = l_values if c_is_list else l_values[0]
+            l_records.append(l_record)
+        return l_records
+
+    def _get_column_names(self, p_field: str) -> List[str]:
+        if p_field in self.m_lists:
+            return [f"{p_field}.{c_index}" for c_index in range(self.m_lists[p_field])]
+        return [p_field]
+
+
+class ColumnarStorage(BaseStorage):
+    """
+    Base class of the columnar layouts.
+
+    A database is a base file plus append-only segments in
+    '<file>.segments/'. Each segment holds whole realm/timestamp subtrees
+    that replace the ones of the base when loading. save() rewrites the
+    base and drops the segments, which is how segments get compacted.
+    """
+
+    SUFFIX = '.col'
+    KIND = None
+    # Set by layouts whose rows depend on the previous ones, checked on read
+    ENCODING = None
+    SUPPORTS_APPEND = True
+
+    def __init__(self, p_filename: Path, p_metrics: Optional[Metrics] = None):
+        super().__init__(p_filename, p_metrics)
+        self.m_segments_dir = p_filename.with_name(p_filename.name + '.segments')
+
+    def exists(self) -> bool:
+        return self.m_filename.exists() or bool(self.get_segment_files())
+
+    def get_segment_files(self) -> List[Path]:
+        if not self.m_segments_dir.is_dir():
+            return []
+        return sorted(self.m_segments_dir.glob(f'*{self.SUFFIX}'))
+
+    def get_segment_count(self) -> int:
+        return len(self.get_segment_files())
+
+    def load(self) -> Dict:
+        l_data = {}
+        if self.m_filename.exists():
+            l_data = self._read_file(self.m_filename)
+        l_segment_files = self.get_segment_files()
+        for c_segment_file in l_segment_files:
+            for c_realm, c_timestamps in self._read_file(c_segment_file).items():
+                l_data.setdefault(c_realm, {}).update(c_timestamps)
+        if l_segment_files:
+            l_data = {c_realm: dict(sorted(l_data[c_realm].items())) for c_realm in sorted(l_data)}
+        return l_data
+
+    def save(self, p_data: Dict) -> None:
+        self._write(self.m_filename, p_data)
+        for c_segment_file in self.get_segment_files():
+            c_segment_file.unlink()
+        if self.m_segments_dir.is_dir():
+            self.m_segments_dir.rmdir()
+
+    def append(self, p_data: Dict) -> None:
+        """Write the realm/timestamp subtrees of p_data as a new segment."""
+        if not p_data:
+            return
+        l_segment_files = self.get_segment_files()
+        l_number = int(l_segment_files[-1].stem) + 1 if l_segment_files else 1
+        self.m_segments_dir.mkdir(parents=True, exist_ok=True)
+        self._write(self.m_segments_dir / f"{l_number:06d}{self.SUFFIX}", p_data)
+
+    def get_timestamps(self) -> Set[str]:
+        """Timestamps held by the base and the segments, from file headers only."""
+        l_timestamps = set()
+        l_files = ([self.m_filename] if self.m_filename.exists() else []) + self.get_segment_files()
+        for c_file in l_files:
+            with ColumnarFile(c_file) as l_file:
+                l_timestamps.update(l_file.get_meta().get("timestamps", []))
+        return l_timestamps
+
+    def _read_file(self, p_filename: Path) -> Dict:
+        with ColumnarFile(p_filename) as l_file:
+            l_kind = l_file.get_meta().get("kind")
+            if l_kind != self.KIND:
+                raise ValueError(f"*** Error: {p_filename} holds {l_kind} data, expected {self.KIND}")
+            l_encoding = l_file.get_meta().get("encoding")
+            if l_encoding != self.ENCODING:
+                raise ValueError(f"*** Error: {p_filename} is {l_encoding or 'plain'} encoded, "
+                                 f"expected {self.ENCODING or 'plain'}")
+            return self._read(l_file)
+
+    def _get_meta(self, p_data: Dict, p_empty_paths: List[List[str]]) -> Dict:
+        l_timestamps = sorted({c_timestamp for c_timestamps in p_data.values() for c_timestamp in c_timestamps})
+        l_meta = {"kind": self.KIND, "timestamps": l_timestamps, "empty_paths": p_empty_paths}
+        if self.ENCODING is not None:
+            l_meta["encoding"] = self.ENCODING
+        return l_meta
+
+    @abstractmethod
+    def _read(self, p_file: ColumnarFile) -> Dict:
+        """Nested dict of one base or segment file."""
+
+    @abstractmethod
+    def _write(self, p_filename: Path, p_data: Dict) -> None:
+        """Write p_data as one base or segment file."""
+
+
+class PriceColumnarStorage(ColumnarStorage):
+    """Price database: one row per realm, timestamp, source and item."""
+
+    KIND = "prices"
+    KEYS = ("realm", "timestamp", "source", "item_id")
+    FIELDS = ("m", "p", "q")
+
+    def _write(self, p_filename: Path, p_data: Dict) -> None:
+        l_keys = KeyColumns(self.KEYS)
+        l_fields = FieldColumns("", self.FIELDS)
+        l_empty_paths = []
+        for c_path, c_qnp in iter_leaves(p_data, len(self.KEYS), l_empty_paths):
+            l_keys.append(c_path)
+            l_fields.append(c_qnp)
+        self.m_metrics.count('bytes_written', ColumnarFile.write(
+            p_filename, {"qnp": {**l_keys.get_columns(), **l_fields.get_columns()}},
+            self._get_meta(p_data, l_empty_paths)))
+
+    def _read(self, p_file: ColumnarFile) -> Dict:
+        l_paths = KeyColumns(self.KEYS).read(p_file, "qnp")
+        l_qnps = FieldColumns("", self.FIELDS).read(p_file, "qnp")
+        return build_nested(l_paths, l_qnps, p_file.get_meta()["empty_paths"])
+
+
+STATS_SCALARS = (
+    "count", "min", "max", "mean", "median", "harmonic_mean", "median_grouped",
+    "median_high", "median_low", "mode", "pstdev", "stdev", "pvariance", "variance",
+)
+STATS_LISTS = {"deciles": 9, "quartiles": 3}
+
+
+class AuctionColumnarStorage(ColumnarStorage):
+    """
+    Auction database: a 'leaves' table with one row per realm, timestamp,
+    item and auction type holding the 'all' and 'filtered' stats, and a
+    'counts' table with one row per price of each counts_by_prices.
+    """
+
+    KIND = "auctions"
+    KEYS = ("realm", "timestamp", "item_id", "type")
+    SCOPES = ("all", "filtered")
+    HAS_ALL = 1
+    HAS_FILTERED = 2
+    HAS_COUNTS = 4
+    LOWER = 1
+    UPPER = 2
+    COUNTS_COLUMNS = ("leaf", "price", "price_is_int", "item_count", "auctions_count", "outlier")
+
+    def _write(self, p_filename: Path, p_data: Dict) -> None:
+        l_keys = KeyColumns(self.KEYS)
+        l_stats = {c_scope: FieldColumns(f"{c_scope}.", STATS_SCALARS, STATS_LISTS) for c_scope in self.SCOPES}
+        l_flags = array('B')
+        l_counts = self._get_counts_columns()
+        l_empty_paths = []
+        for c_leaf_index, (c_path, c_leaf) in enumerate(iter_leaves(p_data, len(self.KEYS), l_empty_paths)):
+            l_unknown = set(c_leaf) - {"all", "filtered", "counts_by_prices"}
+            if l_unknown:
+                raise ValueError(f"*** Error: Unsupported key(s) {sorted(l_unknown)} at {'/'.join(c_path)}")
+            l_keys.append(c_path)
+            l_flag = 0
+            for c_scope, c_bit in (("all", self.HAS_ALL), ("filtered", self.HAS_FILTERED)):
+                if c_scope in c_leaf:
+                    l_flag |= c_bit
+                l_stats[c_scope].append(c_leaf.get(c_scope) or {})
+            if "counts_by_prices" in c_leaf:
+                l_flag |= self.HAS_COUNTS
+                self._append_counts(l_counts, c_leaf_index, c_leaf["counts_by_prices"], c_path)
+            l_flags.append(l_flag)
+
+        l_leaves = {**l_keys.get_columns(), "flags": l_flags}
+        for c_scope in self.SCOPES:
+            l_leaves.update(l_stats[c_scope].get_columns())
+        self.m_metrics.count('bytes_written', ColumnarFile.write(
+            p_filename, {"leaves": l_leaves, "counts": l_counts}, self._get_meta(p_data, l_empty_paths)))
+
+    def _append_counts(self, p_counts: Dict[str, array], p_leaf_index: int, p_counts_by_prices: Dict,
+                       p_path: Tuple) -> None:
+        for c_price in sorted(p_counts_by_prices):
+            self._append_count(p_counts, p_leaf_index, c_price, p_counts_by_prices[c_price], p_path)
+
+    def _append_count(self, p_counts: Dict[str, array], p_leaf_index: int, p_price: Any, p_entry: Dict,
+                      p_path: Tuple) -> None:
+        l_unknown = set(p_entry) - {"item_count", "auctions_count", "lower", "upper"}
+        if l_unknown:
+            raise ValueError(f"*** Error: Unsupported key(s) {sorted(l_unknown)} "
+                             f"at {'/'.join(p_path)}/{p_price}")
+        p_counts["leaf"].append(p_leaf_index)
+        p_counts["price"].append(p_price)
+        p_counts["price_is_int"].append(type(p_price) is int)
+        p_counts["item_count"].append(p_entry["item_count"])
+        p_counts["auctions_count"].append(p_entry["auctions_count"])
+        p_counts["outlier"].append(self.LOWER if p_entry.get("lower") else
+                                   self.UPPER if p_entry.get("upper") else 0)
+
+    @staticmethod
+    def _get_counts_columns() -> Dict[str, array]:
+        return {
+            "leaf": array('I'),
+            "price": array('d'),
+            "price_is_int": array('B'),
+            "item_count": array('q'),
+            "auctions_count": array('q'),
+            "outlier": array('B'),
+        }
+
+    def _read(self, p_file: ColumnarFile) -> Dict:
+        l_paths = KeyColumns(self.KEYS).read(p_file, "leaves")
+        l_flags = p_file.read_column("leaves", "flags")
+        l_stats = {c_scope: FieldColumns(f"{c_scope}.", STATS_SCALARS, STATS_LISTS).read(p_file, "leaves")
+                   for c_scope in self.SCOPES}
+        l_leaves = []
+        for c_index, c_flag in enumerate(l_flags):
+            l_leaf = {}
+            if c_flag & self.HAS_ALL:
+                l_leaf["all"] = l_stats["all"][c_index]
+            if c_flag & self.HAS_COUNTS:
+                l_leaf["counts_by_prices"] = {}
+            if c_flag & self.HAS_FILTERED:
+                l_leaf["filtered"] = l_stats["filtered"][c_index]
+            l_leaves.append(l_leaf)
+
+        l_columns = [p_file.read_column("counts", c_name) for c_name in self.COUNTS_COLUMNS]
+        for c_leaf, c_price, c_is_int, c_item_count, c_auctions_count, c_outlier in zip(*l_columns):
+            l_entry = {"auctions_count": c_auctions_count, "item_count": c_item_count}
+            if c_outlier == self.LOWER:
+                l_entry["lower"] = True
+            elif c_outlier == self.UPPER:
+                l_entry["upper"] = True
+            l_leaves[c_leaf]["counts_by_prices"][int(c_price) if c_is_int else c_price] = l_entry
+        return build_nested(l_paths, l_leaves, p_file.get_meta()["empty_paths"])
+
+
+class AuctionDeltaColumnarStorage(AuctionColumnarStorage):
+    """
+    Auction database keeping each leaf as its difference from the previous
+    snapshot of the same realm, item and type, consecutive scans sharing
+    most of their prices and stats.
+
+    The first leaf of a series in each file is stored against an empty
+    leaf, so that the base file and every segment read on their own. The
+    'stats' table has one row per leaf holding the bits of each value xored
+    with the previous ones, and the 'counts' table one row per price added,
+    changed or removed holding the item and auction count differences, a
+    price going down to no auction being removed. Unchanged values come out
+    as zeros, which the zlib-compressed columns mostly drop.
+    """
+
+    SUFFIX = '.dcol'
+    ENCODING = "delta-zlib"
+
+    def _write(self, p_filename: Path, p_data: Dict) -> None:
+        l_keys = KeyColumns(self.KEYS)
+        l_stats = {c_scope: FieldColumns(f"{c_scope}.", STATS_SCALARS, STATS_LISTS) for c_scope in self.SCOPES}
+        l_flags = array('B')
+        l_counts = self._get_counts_columns()
+        l_empty_paths = []
+        l_leaves = list(iter_leaves(p_data, len(self.KEYS), l_empty_paths))
+        l_previous_rows = _get_previous_rows([c_path for c_path, _ in l_leaves])
+        for c_leaf_index, ((c_path, c_leaf), c_previous_row) in enumerate(zip(l_leaves, l_previous_rows)):
+            l_unknown = set(c_leaf) - {"all", "filtered", "counts_by_prices"}
+            if l_unknown:
+                raise ValueError(f"*** Error: Unsupported key(s) {sorted(l_unknown)} at {'/'.join(c_path)}")
+            l_keys.append(c_path)
+            l_previous_leaf = l_leaves[c_previous_row][1] if c_previous_row >= 0 else {}
+            l_flag = 0
+            for c_scope, c_bit in (("all", self.HAS_ALL), ("filtered", self.HAS_FILTERED)):
+                if c_scope in c_leaf:
+                    l_flag |= c_bit
+                l_stats[c_scope].append(c_leaf.get(c_scope) or {})
+            if "counts_by_prices" in c_leaf:
+                l_flag |= self.HAS_COUNTS
+                self._append_changes(l_counts, c_leaf_index, c_leaf["counts_by_prices"],
+                                     l_previous_leaf.get("counts_by_prices", {}), c_path)
+            l_flags.append(l_flag)
+
+        l_stats_columns = {}
+        for c_scope in self.SCOPES:
+            for c_name, c_column in l_stats[c_scope].get_columns().items():
+                l_stats_columns[c_name] = _xor_previous(c_column, l_previous_rows)
+        self.m_metrics.count('bytes_written', ColumnarFile.write(
+            p_filename, {"leaves": {**l_keys.get_columns(), "flags": l_flags},
+                         "stats": l_stats_columns, "counts": l_counts},
+            self._get_meta(p_data, l_empty_paths), p_compress=True))
+
+    def _append_changes(self, p_counts: Dict[str, array], p_leaf_index: int, p_counts_by_prices: Dict,
+                        p_previous_counts: Dict, p_path: Tuple) -> None:
+        """Rows turning p_previous_counts into p_counts_by_prices, in price order."""
+        # 1000 and 1000.0 are the same dict key, a price changing type is removed and added back
+        l_types = {c_price: type(c_price) for c_price in p_counts_by_prices}
+        l_previous_types = {c_price: type(c_price) for c_price in p_previous_counts}
+        for c_price in sorted(l_types.keys() | l_previous_types.keys()):
+            l_type = l_types.get(c_price)
+            l_previous_entry = {}
+            if c_price in l_previous_types:
+                l_previous_entry = p_previous_counts[c_price]
+                if l_previous_types[c_price] is not l_type:
+                    self._append_count(p_counts, p_leaf_index, l_previous_types[c_price](c_price),
+                                       _get_count_delta({}, l_previous_entry), p_path)
+                    l_previous_entry = {}
+            if l_type is None:
+                continue
+            l_entry = p_counts_by_prices[c_price]
+            if l_entry == l_previous_entry:
+                continue
+            if not l_entry.get("auctions_count", 0) > 0:
+                raise ValueError(f"*** Error: No auction at {'/'.join(p_path)}/{c_price}")
+            self._append_count(p_counts, p_leaf_index, l_type(c_price), _get_count_delta(l_entry, l_previous_entry),
+                               p_path)
+
+    def _read(self, p_file: ColumnarFile) -> Dict:
+        l_paths = KeyColumns(self.KEYS).read(p_file, "leaves")
+        l_flags = p_file.read_column("leaves", "flags")
+        l_previous_rows = _get_previous_rows(l_paths)
+        l_stats = {}
+        for c_scope in self.SCOPES:
+            l_fields = FieldColumns(f"{c_scope}.", STATS_SCALARS, STATS_LISTS)
+            l_stats[c_scope] = l_fields.decode({
+                c_name: _unxor_previous(p_file.read_column("stats", c_name), l_previous_rows, c_column.typecode)
+                for c_name, c_column in l_fields.get_columns().items()})
+        # Rows are in leaf order, one group per leaf having rows
+        l_groups = groupby(zip(*(p_file.read_column("counts", c_name) for c_name in self.COUNTS_COLUMNS)),
+                           key=itemgetter(0))
+        l_group = next(l_groups, None)
+        l_leaves = []
+        for c_index, (c_flag, c_previous_row) in enumerate(zip(l_flags, l_previous_rows)):
+            # Same key order as the plain layout and the converter
+            l_leaf = {}
+            if c_flag & self.HAS_ALL:
+                l_leaf["all"] = l_stats["all"][c_index]
+            if c_flag & self.HAS_COUNTS:
+                l_previous_counts = l_leaves[c_previous_row].get("counts_by_prices", {}) if c_previous_row >= 0 else {}
+                l_counts = dict(zip(l_previous_counts, map(dict, l_previous_counts.values())))
+                l_added = False
+                if l_group is not None and l_group[0] == c_index:
+                    for _, c_price, c_is_int, c_item_count, c_auctions_count, c_outlier in l_group[1]:
+                        if c_is_int:
+                            c_price = int(c_price)
+                        l_entry = l_counts.get(c_price)
+                        if l_entry is None:
+                            l_added = True
+                            l_entry = {"auctions_count": 0, "item_count": 0}
+                        l_entry = {"auctions_count": l_entry["auctions_count"] + c_auctions_count,
+                                   "item_count": l_entry["item_count"] + c_item_count}
+                        if not l_entry["auctions_count"]:
+                            del l_counts[c_price]
+                            continue
+                        if c_outlier == self.LOWER:
+                            l_entry["lower"] = True
+                        elif c_outlier == self.UPPER:
+                            l_entry["upper"] = True
+                        l_counts[c_price] = l_entry
+                    l_group = next(l_groups, None)
+                # Rows come in price order, the histogram only needs sorting when adding prices
+                l_leaf["counts_by_prices"] = dict(sorted(l_counts.items())) if l_added else l_counts
+            if c_flag & self.HAS_FILTERED:
+                l_leaf["filtered"] = l_stats["filtered"][c_index]
+            l_leaves.append(l_leaf)
+        return build_nested(l_paths, l_leaves, p_file.get_meta()["empty_paths"])
+
+
+def _get_previous_rows(p_paths: Sequence[Tuple]) -> array:
+    """Row of the previous leaf of the same realm, item and type for each leaf, -1 for the first one."""
+    l_last_rows: Dict[Tuple, int] = {}
+    l_previous_rows = array('q')
+    for c_row, c_path in enumerate(p_paths):
+        l_series = (c_path[0],) + tuple(c_path[2:])
+        l_previous_rows.append(l_last_rows.get(l_series, -1))
+        l_last_rows[l_series] = c_row
+    return l_previous_rows
+
+
+def _get_count_delta(p_entry: Dict, p_previous_entry: Dict) -> Dict:
+    """p_entry with its counts as differences from p_previous_entry, empty entries meaning none."""
+    return {**p_entry,
+            "item_count": p_entry.get("item_count", 0) - p_previous_entry.get("item_count", 0),
+            "auctions_count": p_entry.get("auctions_count", 0) - p_previous_entry.get("auctions_count", 0)}
+
+
+def _xor_previous(p_column: array, p_previous_rows: Sequence[int]) -> array:
+    """Bits of each value xored with the ones of its previous row."""
+    l_bits = array('Q', p_column.tobytes())
+    return array('Q', (c_bits ^ l_bits[c_previous_row] if c_previous_row >= 0 else c_bits
+                       for c_bits, c_previous_row in zip(l_bits, p_previous_rows)))
+
+
+def _unxor_previous(p_bits: List[int], p_previous_rows: Sequence[int], p_typecode: str) -> List:
+    """Values of typecode p_typecode back from _xor_previous()."""
+    l_bits = array('Q', p_bits)
+    for c_row, c_previous_row in enumerate(p_previous_rows):
+        if c_previous_row >= 0:
+            l_bits[c_row] ^= l_bits[c_previous_row]
+    return array(p_typecode, l_bits.tobytes()).tolist()
@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+"""SQLite storage backend."""
+
+import json
+import sqlite3
+from abc import abstractmethod
+from contextlib import closing
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from metrics import Metrics
+
+from .base_storage import BaseStorage, iter_leaves, build_nested
+
+
+_COMMON_SCHEMA = """
+CREATE TABLE IF NOT EXISTS timestamps (
+    realm TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    PRIMARY KEY (realm, timestamp)
+);
+CREATE TABLE IF NOT EXISTS empty_paths (
+    realm TEXT NOT NULL,
+    timestamp TEXT,
+    path TEXT PRIMARY KEY
+);
+"""
+
+
+class SqliteStorage(BaseStorage):
+    """
+    Base class of the SQLite layouts.
+
+    Rows are keyed by realm and timestamp so that append() can replace
+    whole realm/timestamp subtrees in one transaction, and indexed by
+    (realm, item_id, timestamp) so that one item's history is an index
+    lookup.
+    """
+
+    SUFFIXES = ('.sqlite', '.db')
+    SUPPORTS_APPEND = True
+    SUPPORTS_QUERIES = True
+    KIND = None
+    KEYS: Tuple[str, ...] = ()
+    SCHEMA = ""
+
+    def __init__(self, p_filename: Path, p_metrics: Optional[Metrics] = None):
+        super().__init__(p_filename, p_metrics)
+        # Kept open between the queries of a lazy database
+        self.m_reader = None
+
+    def exists(self) -> bool:
+        return self.m_filename.exists()
+
+    def close(self) -> None:
+        if self.m_reader is not None:
+            self.m_reader.close()
+            self.m_reader = None
+
+    def load(self) -> Dict:
+        if not self.exists():
+            return {}
+        with closing(self._connect()) as l_connection:
+            l_paths, l_leaves = self._read_leaves(l_connection, "", ())
+            l_empty_paths = [json.loads(c_path) for c_path, in
+                             l_connection.execute("SELECT path FROM empty_paths ORDER BY path")]
+        return build_nested(l_paths, l_leaves, l_empty_paths)
+
+    def save(self, p_data: Dict) -> None:
+        with closing(self._connect()) as l_connection:
+            with l_connection:
+                self._clear(l_connection)
+                self._insert(l_connection, p_data)
+
+    def append(self, p_data: Dict) -> None:
+        """Insert the realm/timestamp subtrees of p_data, replacing stored ones."""
+        if not p_data:
+            return
+        with closing(self._connect()) as l_connection:
+            with l_connection:
+                for c_realm, c_timestamps in p_data.items():
+                    for c_timestamp in c_timestamps:
+                        self._delete_timestamp(l_connection, c_realm, c_timestamp)
+                    l_connection.execute("DELETE FROM empty_paths WHERE realm = ? AND timestamp IS NULL",
+                                         (c_realm,))
+                self._insert(l_connection, p_data)
+
+    def get_timestamps(self) -> Set[str]:
+        if not self.exists():
+            return set()
+        with closing(self._connect()) as l_connection:
+            return {c_timestamp for c_timestamp, in
+                    l_connection.execute("SELECT DISTINCT timestamp FROM timestamps")}
+
+    def get_realms(self) -> List[str]:
+        if not self.exists():
+            return []
+        return [c_realm for c_realm, in self._get_reader().execute(
+            "SELECT realm FROM timestamps UNION SELECT realm FROM empty_paths ORDER BY realm")]
+
+    def get_snapshot_keys(self) -> List[Tuple[str, str]]:
+        if not self.exists():
+            return []
+        return list(self._get_reader().execute("SELECT realm, timestamp FROM timestamps ORDER BY realm, timestamp"))
+
+    def get_snapshot(self, p_realm: str, p_timestamp: str) -> Dict:
+        """Data of one snapshot, with the realm and timestamp levels removed."""
+        if not self.exists():
+            return {}
+        l_connection = self._get_reader()
+        l_paths, l_leaves = self._read_leaves(l_connection, "realm = ? AND timestamp = ?", (p_realm, p_timestamp))
+        l_empty_paths = [json.loads(c_path)[2:] for c_path, in l_connection.execute(
+            "SELECT path FROM empty_paths WHERE realm = ? AND timestamp = ? ORDER BY path", (p_realm, p_timestamp))]
+        return build_nested([c_path[2:] for c_path in l_paths], l_leaves,
+                            [c_path for c_path in l_empty_paths if c_path])
+
+    def get_item_history(self, p_item_id: str) -> Dict:
+        """
+        Data of one item, with the item_id level removed, read through the
+        (realm, item_id, timestamp) index one realm at a time.
+        """
+        if not self.exists():
+            return {}
+        l_item_index = self.KEYS.index("item_id")
+        l_paths = []
+        l_leaves = []
+        l_connection = self._get_reader()
+        l_realms = [c_realm for c_realm, in
+                    l_connection.execute("SELECT DISTINCT realm FROM timestamps ORDER BY realm")]
+        for c_realm in l_realms:
+            l_realm_paths, l_realm_leaves = self._read_leaves(
+                l_connection, "realm = ? AND item_id = ?", (c_realm, p_item_id), True)
+            l_paths.extend(c_path[:l_item_index] + c_path[l_item_index + 1:] for c_path in l_realm_paths)
+            l_leaves.extend(l_realm_leaves)
+        return build_nested(l_paths, l_leaves, [])
+
+    def _connect(self) -> sqlite3.Connection:
+        self.m_filename.parent.mkdir(parents=True, exist_ok=True)
+        l_connection = sqlite3.connect(self.m_filename)
+        l_connection.executescript(_COMMON_SCHEMA + self.SCHEMA)
+        return l_connection
+
+    def _get_reader(self) -> sqlite3.Connection:
+        if self.m_reader is None:
+            self.m_reader = self._connect()
+        return self.m_reader
+
+    def _get_tables(self) -> List[str]:
+        """Tables holding realm and timestamp columns."""
+        return ["timestamps", "empty_paths"]
+
+    def _clear(self, p_connection: sqlite3.Connection) -> None:
+        for c_table in self._get_tables():
+            p_connection.execute(f"DELETE FROM {c_table}")
+
+    def _insert(self, p_connection: sqlite3.Connection, p_data: Dict) -> None:
+        l_empty_paths = []
+        l_leaves = list(iter_leaves(p_data, len(self.KEYS), l_empty_paths))
+        p_connection.executemany(
+            "INSERT INTO timestamps (realm, timestamp) VALUES (?, ?)",
+            [(c_realm, c_timestamp) for c_realm, c_timestamps in p_data.items() for c_timestamp in c_timestamps])
+        p_connection.executemany(
+            "INSERT INTO empty_paths (realm, timestamp, path) VALUES (?, ?, ?)",
+            [(c_path[0], c_path[1] if len(c_path) > 1 else None, json.dumps(c_path, ensure_ascii=False))
+             for c_path in l_empty_paths])
+        self._insert_leaves(p_connection, l_leaves)
+
+    def _delete_timestamp(self, p_connection: sqlite3.Connection, p_realm: str, p_timestamp: str) -> None:
+        for c_table in self._get_tables():
+            p_connection.execute(f"DELETE FROM {c_table} WHERE realm = ? AND timestamp = ?",
+                                 (p_realm, p_timestamp))
+
+    @abstractmethod
+    def _read_leaves(self, p_connection: sqlite3.Connection, p_where: str,
+                     p_parameters: Tuple, p_by_item: bool = False) -> Tuple[List[Tuple], List]:
+        """
+        (key paths, leaves) of the rows matching p_where, in key order.
+
+        With p_by_item, read through the (realm, item_id, timestamp) index,
+        which SQLite would otherwise skip to avoid sorting.
+        """
+
+    @abstractmethod
+    def _insert_leaves(self, p_connection: sqlite3.Connection, p_leaves: List[Tuple[Tuple, Dict]]) -> None:
+        """Insert (key path, leaf) rows."""
+
+
+class PriceSqliteStorage(SqliteStorage):
+    """Price database: one row per realm, timestamp, source and item."""
+
+    KIND = "prices"
+    KEYS = ("realm", "timestamp", "source", "item_id")
+    FIELDS = ("m", "p", "q")
+    SCHEMA = """
+CREATE TABLE IF NOT EXISTS prices (
+    realm TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    source TEXT NOT NULL,
+    item_id TEXT NOT NULL,
+    q, p, m,
+    PRIMARY KEY (realm, timestamp, source, item_id)
+);
+CREATE INDEX IF NOT EXISTS prices_by_item ON prices (realm, item_id, timestamp);
+"""
+
+    def _get_tables(self) -> List[str]:
+        return super()._get_tables() + ["prices"]
+
+    def _insert_leaves(self, p_connection: sqlite3.Connection, p_leaves: List[Tuple[Tuple, Dict]]) -> None:
+        l_rows = []
+        for c_path, c_qnp in p_leaves:
+            l_unknown = set(c_qnp) - set(self.FIELDS)
+            if l_unknown:
+                raise ValueError(f"*** Error: Unsupported field(s) {sorted(l_unknown)} at {'/'.join(c_path)}")
+            l_rows.append(c_path + (c_qnp.get("q"), c_qnp.get("p"), c_qnp.get("m")))
+        p_connection.executemany(
+            "INSERT INTO prices (realm, timestamp, source, item_id, q, p, m) VALUES (?, ?, ?, ?, ?, ?, ?)", l_rows)
+
+    def _read_leaves(self, p_connection: sqlite3.Connection, p_where: str,
+                     p_parameters: Tuple, p_by_item: bool = False) -> Tuple[List[Tuple], List]:
+        l_paths = []
+        l_leaves = []
+        l_query = "SELECT realm, timestamp, source, item_id, m, p, q FROM prices"
+        if p_by_item:
+            l_query += " INDEXED BY prices_by_item"
+        if p_where:
+            l_query += f" WHERE {p_where}"
+        for c_row in p_connection.execute(l_query + " ORDER BY realm, timestamp, source, item_id", p_parameters):
+            l_paths.append(c_row[:4])
+            l_leaves.append({c_name: c_value for c_name, c_value in zip(self.FIELDS, c_row[4:])
+                             if c_value is not None})
+        return l_paths, l_leaves
+
+
+class AuctionSqliteStorage(SqliteStorage):
+    """
+    Auction database: one row per realm, timestamp, item and auction type
+    with the 'all' and 'filtered' stats as JSON, and one row per price of
+    each counts_by_prices.
+    """
+
+    KIND = "auctions"
+    KEYS = ("realm", "timestamp", "item_id", "type")
+    LOWER = 1
+    UPPER = 2
+    SCHEMA = """
+CREATE TABLE IF NOT EXISTS auction_leaves (
+    id INTEGER PRIMARY KEY,
+    realm TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    item_id TEXT NOT NULL,
+    type TEXT NOT NULL,
+    all_stats TEXT,
+    filtered_stats TEXT,
+    has_counts INTEGER NOT NULL,
+    UNIQUE (realm, timestamp, item_id, type)
+);
+CREATE INDEX IF NOT EXISTS auction_leaves_by_item ON auction_leaves (realm, item_id, timestamp);
+CREATE TABLE IF NOT EXISTS auction_counts (
+    leaf_id INTEGER NOT NULL REFERENCES auction_leaves (id),
+    price NOT NULL,
+    item_count INTEGER NOT NULL,
+    auctions_count INTEGER NOT NULL,
+    outlier INTEGER NOT NULL,
+    PRIMARY KEY (leaf_id, price)
+) WITHOUT ROWID;
+"""
+
+    def _get_tables(self) -> List[str]:
+        return super()._get_tables() + ["auction_leaves"]
+
+    def _clear(self, p_connection: sqlite3.Connection) -> None:
+        p_connection.execute("DELETE FROM auction_counts")
+        super()._clear(p_connection)
+
+    def _delete_timestamp(self, p_connection: sqlite3.Connection, p_realm: str, p_timestamp: str) -> None:
+        p_connection.execute(
+            "DELETE FROM auction_counts WHERE leaf_id IN "
+            "(SELECT id FROM auction_leaves WHERE realm = ? AND timestamp = ?)", (p_realm, p_timestamp))
+        super()._delete_timestamp(p_connection, p_realm, p_timestamp)
+
+    def _insert_leaves(self, p_connection: sqlite3.Connection, p_leaves: List[Tuple[Tuple, Dict]]) -> None:
+        l_counts = []
+        for c_path, c_leaf in p_leaves:
+            l_unknown = set(c_leaf) - {"all", "filtered", "counts_by_prices"}
+            if l_unknown:
+                raise ValueError(f"*** Error: Unsupported key(s) {sorted(l_unknown)} at {'/'.join(c_path)}")
+            l_cursor = p_connection.execute(
+                "INSERT INTO auction_leaves (realm, timestamp, item_id, type, all_stats, filtered_stats, has_counts) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                c_path + (self._dump_stats(c_leaf.get("all")), self._dump_stats(c_leaf.get("filtered")),
+                          "counts_by_prices" in c_leaf))
+            for c_price, c_entry in c_leaf.get("counts_by_prices", {}).items():
+                l_counts.append((l_cursor.lastrowid, c_price, c_entry["item_count"], c_entry["auctions_count"],
+                                 self.LOWER if c_entry.get("lower") else self.UPPER if c_entry.get("upper") else 0))
+        p_connection.executemany(
+            "INSERT INTO auction_counts (leaf_id, price, item_count, auctions_count, outlier) VALUES (?, ?, ?, ?, ?)",
+            l_counts)
+
+    def _read_leaves(self, p_connection: sqlite3.Connection, p_where: str,
+                     p_parameters: Tuple, p_by_item: bool = False) -> Tuple[List[Tuple], List]:
+        l_where = f" WHERE {p_where}" if p_where else ""
+        l_leaves_table = "auction_leaves INDEXED BY auction_leaves_by_item" if p_by_item else "auction_leaves"
+        l_paths = []
+        l_leaves = []
+        l_leaves_by_id = {}
+        for c_row in p_connection.execute(
+                "SELECT id, realm, timestamp, item_id, type, all_stats, filtered_stats, has_counts "
+                f"FROM {l_leaves_table}{l_where} ORDER BY realm, timestamp, item_id, type", p_parameters):
+            l_leaf = {}
+            if c_row[5] is not None:
+                l_leaf["all"] = json.loads(c_row[5])
+            if c_row[7]:
+                l_leaf["counts_by_prices"] = {}
+            if c_row[6] is not None:
+                l_leaf["filtered"] = json.loads(c_row[6])
+            l_paths.append(c_row[1:5])
+            l_leaves.append(l_leaf)
+            l_leaves_by_id[c_row[0]] = l_leaf
+
+        for c_leaf_id, c_price, c_item_count, c_auctions_count, c_outlier in p_connection.execute(
+                "SELECT c.leaf_id, c.price, c.item_count, c.auctions_count, c.outlier "
+                f"FROM auction_counts c JOIN {l_leaves_table} ON auction_leaves.id = c.leaf_id{l_where} "
+                "ORDER BY c.leaf_id, c.price", p_parameters):
+            l_entry = {"auctions_count": c_auctions_count, "item_count": c_item_count}
+            if c_outlier == self.LOWER:
+                l_entry["lower"] = True
+            elif c_outlier == self.UPPER:
+                l_entry["upper"] = True
+            l_leaves_by_id[c_leaf_id]["counts_by_prices"][c_price] = l_entry
+        return l_paths, l_leaves
+
+    def _dump_stats(self, p_stats: Dict):
+        if p_stats is None:
+            return None
+        return json.dumps(p_stats, sort_keys=True)
+
+
+class ItemSqliteStorage(BaseStorage):
+    """Item database: item_id -> item_name, indexed on both columns."""
+
+    KIND = "items"
+    SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    item_id TEXT PRIMARY KEY,
+    item_name TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS items_by_name ON items (item_name);
+"""
+
+    def exists(self) -> bool:
+        return self.m_filename.exists()
+
+    def load(self) -> Dict:
+        if not self.exists():
+            return {}
+        with closing(self._connect()) as l_connection:
+            return dict(l_connection.execute(
+                "SELECT item_id, item_name FROM items ORDER BY CAST(item_id AS INTEGER), item_id"))
+
+    def save(self, p_data: Dict) -> None:
+        with closing(self._connect()) as l_connection:
+            with l_connection:
+                l_connection.execute("DELETE FROM items")
+                l_connection.executemany("INSERT INTO items (item_id, item_name) VALUES (?, ?)",
+                                         list(p_data.items()))
+
+    def _connect(self) -> sqlite3.Connection:
+        self.m_filename.parent.mkdir(parents=True, exist_ok=True)
+        l_connection = sqlite3.connect(self.m_filename)
+        l_connection.executescript(self.SCHEMA)
+        return l_connection
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""Pick the storage backend of a database file from its suffix."""
+
+from pathlib import Path
+from typing import Optional
+
+from metrics import Metrics
+
+from .base_storage import BaseStorage
+from .columnar_storage import ColumnarStorage, PriceColumnarStorage, AuctionColumnarStorage, AuctionDeltaColumnarStorage
+from .sqlite_storage import SqliteStorage, PriceSqliteStorage, AuctionSqliteStorage, ItemSqliteStorage
+from .yaml_storage import YamlStorage
+
+
+KINDS = ("items", "prices", "auctions")
+
+_COLUMNAR_LAYOUTS = {
+    PriceColumnarStorage.KIND: PriceColumnarStorage,
+    AuctionColumnarStorage.KIND: AuctionColumnarStorage,
+}
+
+_SQLITE_LAYOUTS = {
+    ItemSqliteStorage.KIND: ItemSqliteStorage,
+    PriceSqliteStorage.KIND: PriceSqliteStorage,
+    AuctionSqliteStorage.KIND: AuctionSqliteStorage,
+}
+
+
+def create_storage(p_filename: Path, p_kind: str, p_metrics: Optional[Metrics] = None) -> BaseStorage:
+    """
+    Return the storage for p_filename.
+
+    Args:
+        p_filename: Database file, '.col' for columnar, '.dcol' for delta
+            encoded columnar auctions, '.sqlite' or '.db' for SQLite, YAML otherwise
+        p_kind: Database layout, 'items', 'prices' or 'auctions'
+        p_metrics: Receives the timings and bytes written of the storage
+    """
+    if p_kind not in KINDS:
+        raise ValueError(f"*** Error: Unknown database kind '{p_kind}'")
+    if p_filename.suffix == ColumnarStorage.SUFFIX:
+        if p_kind not in _COLUMNAR_LAYOUTS:
+            raise ValueError(f"*** Error: No columnar layout for '{p_kind}' database")
+        return _COLUMNAR_LAYOUTS[p_kind](p_filename, p_metrics)
+    if p_filename.suffix == AuctionDeltaColumnarStorage.SUFFIX:
+        if p_kind != AuctionDeltaColumnarStorage.KIND:
+            raise ValueError(f"*** Error: No delta encoded layout for '{p_kind}' database")
+        return AuctionDeltaColumnarStorage(p_filename, p_metrics)
+    if p_filename.suffix in SqliteStorage.SUFFIXES:
+        return _SQLITE_LAYOUTS[p_kind](p_filename, p_metrics)
+    # Items are saved in id order by ItemDatabase, keep it
+    return YamlStorage(p_filename, p_kind != "items", p_metrics)
@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""YAML storage backend."""
+
+from pathlib import Path
+from typing import Dict, Optional
+
+import yaml_io
+from metrics import Metrics
+
+from .base_storage import BaseStorage
+
+
+class YamlStorage(BaseStorage):
+    """Store a database as one YAML document."""
+
+    def __init__(self, p_filename: Path, p_sort_keys: bool = True, p_metrics: Optional[Metrics] = None):
+        """
+        Initialize storage.
+
+        Args:
+            p_filename: Path of the YAML file
+            p_sort_keys: Sort mapping keys on save, else keep insertion order
+            p_metrics: Times the YAML load and dump, None to discard them
+        """
+        super().__init__(p_filename, p_metrics)
+        self.m_sort_keys = p_sort_keys
+
+    def exists(self) -> bool:
+        return self.m_filename.exists()
+
+    def load(self) -> Dict:
+        if not self.exists():
+            return {}
+        return yaml_io.load_file(self.m_filename, self.m_metrics) or {}
+
+    def save(self, p_data: Dict) -> None:
+        yaml_io.dump_file(p_data, self.m_filename, self.m_sort_keys, self.m_metrics)
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""Reduce long chart series: old points bucketed by day then week, then LTTB."""
+
+from datetime import datetime, timedelta
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+
+Aggregator = Callable[[List[Any]], Any]
+
+
+def mean_of(p_values: List) -> Any:
+    """Mean of the values that are not None, None if there is none."""
+    l_values = [c_value for c_value in p_values if c_value is not None]
+    return sum(l_values) / len(l_values) if l_values else None
+
+
+def rounded_mean_of(p_values: List) -> Any:
+    """mean_of() rounded to the unit, for prices in copper and item counts."""
+    l_mean = mean_of(p_values)
+    return None if l_mean is None else round(l_mean)
+
+
+def min_of(p_values: List) -> Any:
+    l_values = [c_value for c_value in p_values if c_value is not None]
+    return min(l_values) if l_values else None
+
+
+def max_of(p_values: List) -> Any:
+    l_values = [c_value for c_value in p_values if c_value is not None]
+    return max(l_values) if l_values else None
+
+
+def mean_of_lists(p_values: List[List]) -> List:
+    """Element-wise mean of the non empty lists, such as quartiles, rounded to the copper."""
+    l_lists = [c_value for c_value in p_values if c_value]
+    if not l_lists:
+        return []
+    return [round(sum(c_items) / len(l_lists)) for c_items in zip(*l_lists)]
+
+
+def _get_day(p_time: datetime) -> datetime:
+    return p_time.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _get_week(p_time: datetime) -> datetime:
+    return _get_day(p_time) - timedelta(days=p_time.weekday())
+
+
+def bucket(p_times: List[datetime], p_columns: List[List], p_get_bucket: Callable[[datetime], datetime],
+           p_aggregators: Sequence[Aggregator]) -> Tuple[List[datetime], List[List]]:
+    """
+    Merge the points falling in the same bucket, dated at the bucket start.
+
+    Args:
+        p_times: Point times in increasing order
+        p_columns: One value list per series, aligned on p_times
+        p_get_bucket: Start of the bucket of a time
+        p_aggregators: Merge the values of one bucket, one per column
+    """
+    l_times = []
+    l_groups: List[List[int]] = []
+    for c_index, c_time in enumerate(p_times):
+        l_bucket = p_get_bucket(c_time)
+        if l_times and l_times[-1] == l_bucket:
+            l_groups[-1].append(c_index)
+        else:
+            l_times.append(l_bucket)
+            l_groups.append([c_index])
+    l_columns = [[c_aggregator([c_column[c_index] for c_index in c_group]) for c_group in l_groups]
+                 for c_column, c_aggregator in zip(p_columns, p_aggregators)]
+    return l_times, l_columns
+
+
+def lttb(p_xs: Sequence[float], p_ys: Sequence[Optional[float]], p_threshold: int) -> List[int]:
+    """
+    Largest-Triangle-Three-Buckets: indexes of p_threshold points keeping
+    the visual shape of (p_xs, p_ys), first and last always kept. None
+    values count as 0.
+    """
+    l_count = len(p_xs)
+    if p_threshold >= l_count:
+        return list(range(l_count))
+    if p_threshold < 3:
+        return [0, l_count - 1][:p_threshold]
+    l_ys = [0 if c_y is None else c_y for c_y in p_ys]
+    l_kept = [0]
+    l_every = (l_count - 2) / (p_threshold - 2)
+    l_a = 0
+    for c_bucket in range(p_threshold - 2):
+        # Average of the next bucket, the third point of the triangles
+        l_next_start = int((c_bucket + 1) * l_every) + 1
+        l_next_end = min(int((c_bucket + 2) * l_every) + 1, l_count)
+        l_next_length = l_next_end - l_next_start
+        l_average_x = sum(p_xs[l_next_start:l_next_end]) / l_next_length
+        l_average_y = sum(l_ys[l_next_start:l_next_end]) / l_next_length
+
+        l_start = int(c_bucket * l_every) + 1
+        l_end = int((c_bucket + 1) * l_every) + 1
+        l_max_area = -1.0
+        l_next_a = l_start
+        for c_index in range(l_start, l_end):
+            l_area = abs((p_xs[l_a] - l_average_x) * (l_ys[c_index] - l_ys[l_a])
+                         - (p_xs[l_a] - p_xs[c_index]) * (l_average_y - l_ys[l_a]))
+            if l_area > l_max_area:
+                l_max_area = l_area
+                l_next_a = c_index
+        l_kept.append(l_next_a)
+        l_a = l_next_a
+    l_kept.append(l_count - 1)
+    return l_kept
+
+
+def downsample(p_times: List[datetime], p_columns: List[List], p_max_points: int,
+               p_aggregators: Sequence[Aggregator], p_primary: int = 0,
+               p_recent_days: int = 14) -> Tuple[List[datetime], List[List]]:
+    """
+    Reduce a series to at most p_max_points points.
+
+    The last p_recent_days are kept at full resolution, as long as they
+    fit in what older points leave of the budget. Older points get what
+    the recent ones do not need, at most half of the budget when both
+    need more: merged by day, then by week if still too many, then
+    reduced with LTTB on the p_primary column. Recent points beyond
+    their share are reduced with LTTB too.
+
+    Args:
+        p_times: Point times in increasing order
+        p_columns: One value list per series, aligned on p_times
+        p_max_points: Maximum number of points, 0 to keep them all
+        p_aggregators: Merge the values of one bucket, one per column
+        p_primary: Column whose shape LTTB preserves
+        p_recent_days: Days before the last point kept at full resolution
+    """
+    if not p_max_points or len(p_times) <= p_max_points:
+        return p_times, p_columns
+    l_cutoff = p_times[-1] - timedelta(days=p_recent_days)
+    l_split = next((c_index for c_index, c_time in enumerate(p_times) if c_time >= l_cutoff), len(p_times))
+    l_recent_times = p_times[l_split:]
+    l_recent_columns = [c_column[l_split:] for c_column in p_columns]
+
+    l_old_budget = p_max_points - min(len(l_recent_times), p_max_points // 2)
+    l_old_times = p_times[:l_split]
+    l_old_columns = [c_column[:l_split] for c_column in p_columns]
+    for c_get_bucket in (_get_day, _get_week):
+        if len(l_old_times) <= l_old_budget:
+            break
+        l_old_times, l_old_columns = bucket(l_old_times, l_old_columns, c_get_bucket, p_aggregators)
+    if len(l_old_times) > l_old_budget:
+        l_old_times, l_old_columns = _reduce(l_old_times, l_old_columns, l_old_budget, p_primary)
+
+    l_recent_budget = p_max_points - len(l_old_times)
+    if len(l_recent_times) > l_recent_budget:
+        l_recent_times, l_recent_columns = _reduce(l_recent_times, l_recent_columns, l_recent_budget, p_primary)
+    return l_old_times + l_recent_times, [c_old + c_recent for c_old, c_recent in zip(l_old_columns, l_recent_columns)]
+
+
+def _reduce(p_times: List[datetime], p_columns: List[List], p_count: int, p_primary: int) -> Tuple[List[datetime], List[List]]:
+    """Keep the p_count points LTTB selects on the p_primary column."""
+    l_kept = lttb([c_time.timestamp() for c_time in p_times], p_columns[p_primary], p_count)
+    return [p_times[c_index] for c_index in l_kept], [[c_column[c_index] for c_index in l_kept] for c_column in p_columns]
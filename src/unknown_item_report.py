@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""Persistent report of the item names missing from the item database."""
+
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from item_database import ItemDatabase
+from metrics import Metrics
+import yaml_io
+
+
+class UnknownItemReport:
+    """
+    Item names seen in snapshots but not in the item database, kept across
+    runs as {name: {count, first_seen, last_seen}} in a YAML file.
+    """
+
+    def __init__(self, p_filename: Path, p_reset: bool = False, p_metrics: Optional[Metrics] = None):
+        """
+        Load the report, empty if the file does not exist.
+
+        Args:
+            p_filename: YAML file of the report
+            p_reset: Start empty, when every snapshot is ingested again
+            p_metrics: Times the report load and save
+        """
+        self.m_filename = p_filename
+        self.m_metrics = p_metrics or Metrics()
+        self.m_names: Dict[str, Dict] = {}
+        if p_filename.exists() and not p_reset:
+            self.m_names = yaml_io.load_file(p_filename, self.m_metrics) or {}
+        self.m_new_names: List[str] = []
+        self.m_seen_count = 0
+
+    def add(self, p_item_names: Iterable[str], p_timestamp: str) -> None:
+        """Record the unknown names of the snapshot p_timestamp."""
+        for c_item_name in p_item_names:
+            self.m_seen_count += 1
+            l_entry = self.m_names.get(c_item_name)
+            if l_entry is None:
+                self.m_names[c_item_name] = {"count": 1, "first_seen": p_timestamp, "last_seen": p_timestamp}
+                self.m_new_names.append(c_item_name)
+                continue
+            l_entry["count"] += 1
+            l_entry["first_seen"] = min(l_entry["first_seen"], p_timestamp)
+            l_entry["last_seen"] = max(l_entry["last_seen"], p_timestamp)
+
+    def forget_known(self, p_items_db: ItemDatabase) -> int:
+        """Drop the names the item database now knows, return how many."""
+        l_known, _ = p_items_db.resolve_names(self.m_names)
+        for c_item_name in l_known:
+            del self.m_names[c_item_name]
+        return len(l_known)
+
+    def get_names(self) -> Dict[str, Dict]:
+        return self.m_names
+
+    def get_new_names(self) -> List[str]:
+        """Names first recorded by this run, in order of appearance."""
+        return self.m_new_names.copy()
+
+    def get_summary(self) -> str:
+        return (f"{len(self.m_new_names)} new unknown item name(s), "
+                f"{len(self.m_names)} in report, {self.m_seen_count} occurrence(s) this run")
+
+    def save(self) -> None:
+        if not self.m_names and not self.m_filename.exists():
+            return
+        self.m_filename.parent.mkdir(parents=True, exist_ok=True)
+        yaml_io.dump_file(self.m_names, self.m_filename, p_metrics=self.m_metrics)
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""Write Obsidian pages only when their content changed."""
+
+import hashlib
+from pathlib import Path
+from typing import Dict, Optional, Set
+
+import yaml_io
+from metrics import Metrics
+
+
+ADDED = 'A'
+MODIFIED = 'M'
+DELETED = 'D'
+
+
+class VaultWriter:
+    """
+    Write the pages of one output directory, skipping unchanged ones.
+
+    A manifest remembers the content hash of every page written, so that
+    unchanged pages are not rewritten and pages that were not produced
+    again are removed by finish(). Changes are added to a change list,
+    'A path', 'M path' or 'D path' per line, until a sync step consumes
+    it.
+    """
+
+    MANIFEST_FILENAME = '.vault_manifest.yaml'
+    CHANGES_FILENAME = 'changes.txt'
+
+    def __init__(self, p_output_dir: Path, p_metrics: Optional[Metrics] = None):
+        """
+        Initialize writer.
+
+        Args:
+            p_output_dir: Directory holding the pages, paths are relative to it
+            p_metrics: Receives the write time, pages and bytes written
+        """
+        self.m_output_dir = p_output_dir
+        self.m_metrics = p_metrics or Metrics()
+        self.m_manifest_file = p_output_dir / self.MANIFEST_FILENAME
+        self.m_changes_file = p_output_dir / self.CHANGES_FILENAME
+        self.m_hashes: Dict[str, str] = {}
+        if self.m_manifest_file.exists():
+            self.m_hashes = yaml_io.load_file(self.m_manifest_file, self.m_metrics) or {}
+        self.m_seen: Set[str] = set()
+        self.m_changes: Dict[str, str] = {}
+        self.m_unchanged_count = 0
+
+    def has(self, p_path: str) -> bool:
+        """Tell whether p_path was written by a previous run and still exists."""
+        return p_path in self.m_hashes and (self.m_output_dir / p_path).exists()
+
+    def keep(self, p_path: str) -> None:
+        """Keep a page written by a previous run without rendering it again."""
+        self.m_seen.add(p_path)
+        self.m_unchanged_count += 1
+
+    def write(self, p_path: str, p_content: str) -> bool:
+        """Write p_content to p_path unless it already holds it, return True if written."""
+        with self.m_metrics.stage('vault.write'):
+            return self._write(p_path, p_content)
+
+    def _write(self, p_path: str, p_content: str) -> bool:
+        self.m_seen.add(p_path)
+        l_hash = hashlib.sha256(p_content.encode('utf-8')).hexdigest()
+        l_file_path = self.m_output_dir / p_path
+        l_exists = l_file_path.exists()
+        if l_exists and p_path not in self.m_hashes:
+            # Page from a run without manifest
+            self.m_hashes[p_path] = hashlib.sha256(l_file_path.read_bytes()).hexdigest()
+        if l_exists and self.m_hashes.get(p_path) == l_hash:
+            self.m_unchanged_count += 1
+            return False
+
+        l_file_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(l_file_path, 'w', encoding='utf-8') as l_file:
+            l_file.write(p_content)
+            self.m_metrics.count('bytes_written', l_file.tell())
+        self.m_metrics.count('pages_written')
+        self.m_hashes[p_path] = l_hash
+        self.m_changes[p_path] = MODIFIED if l_exists else ADDED
+        return True
+
+    def finish(self) -> None:
+        """Remove the pages not produced by this run, save manifest and change list."""
+        for c_path in sorted(set(self.m_hashes) - self.m_seen):
+            (self.m_output_dir / c_path).unlink(missing_ok=True)
+            del self.m_hashes[c_path]
+            self.m_changes[c_path] = DELETED
+
+        self.m_output_dir.mkdir(parents=True, exist_ok=True)
+        yaml_io.dump_file(self.m_hashes, self.m_manifest_file, p_metrics=self.m_metrics)
+        self._save_changes()
+
+    def get_changes(self) -> Dict[str, str]:
+        """{path: 'A' | 'M' | 'D'} of this run."""
+        return self.m_changes
+
+    def get_unchanged_count(self) -> int:
+        return self.m_unchanged_count
+
+    def get_summary(self) -> str:
+        l_values = list(self.m_changes.values())
+        return f"{l_values.count(ADDED)} added, {l_values.count(MODIFIED)} updated, " \
+               f"{self.m_unchanged_count} unchanged, {l_values.count(DELETED)} removed"
+
+    def _save_changes(self) -> None:
+        """Merge this run's changes into the change list not synced yet."""
+        l_pending: Dict[str, str] = {}
+        if self.m_changes_file.exists():
+            with open(self.m_changes_file, 'r', encoding='utf-8') as l_file:
+                for c_line in l_file:
+                    l_line = c_line.rstrip('\n')
+                    if l_line:
+                        l_pending[l_line[2:]] = l_line[0]
+        for c_path, c_change in self.m_changes.items():
+            if l_pending.get(c_path) == ADDED and c_change == MODIFIED:
+                continue
+            l_pending[c_path] = c_change
+        if not l_pending:
+            return
+        with open(self.m_changes_file, 'w', encoding='utf-8') as l_file:
+            for c_path, c_change in sorted(l_pending.items()):
+                l_file.write(f"{c_change} {c_path}\n")
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""YAML loading and dumping shared by the whole project, with LibYAML when available."""
+
+from pathlib import Path
+from typing import Any, Optional
+
+import yaml
+
+from metrics import Metrics
+
+try:
+    from yaml import CSafeLoader as LOADER, CSafeDumper as DUMPER
+except ImportError:
+    from yaml import SafeLoader as LOADER, SafeDumper as DUMPER
+
+
+def has_libyaml() -> bool:
+    """Tell whether the LibYAML C loader and dumper are used."""
+    return LOADER is not yaml.SafeLoader
+
+
+def load(p_stream: Any) -> Any:
+    """Parse one YAML document from a string or an open file, as yaml.safe_load()."""
+    return yaml.load(p_stream, Loader=LOADER)
+
+
+def dump(p_data: Any, p_stream: Any = None, p_sort_keys: bool = True) -> Optional[str]:
+    """
+    Dump p_data in block style, the format of every YAML file of the project.
+
+    Args:
+        p_data: Plain dicts, lists and scalars
+        p_stream: Open file, None to return the text
+        p_sort_keys: Sort mapping keys, else keep insertion order
+    """
+    return yaml.dump(p_data, p_stream, Dumper=DUMPER, default_flow_style=False, allow_unicode=True,
+                     sort_keys=p_sort_keys)
+
+
+def load_file(p_path: Path, p_metrics: Optional[Metrics] = None) -> Any:
+    """Parse the YAML file p_path, None if it is empty, timed in p_metrics when given."""
+    l_metrics = p_metrics or Metrics()
+    with l_metrics.stage('yaml.load'), open(p_path, 'r', encoding='utf-8') as l_file:
+        return load(l_file)
+
+
+def dump_file(p_data: Any, p_path: Path, p_sort_keys: bool = True, p_metrics: Optional[Metrics] = None) -> None:
+    l_metrics = p_metrics or Metrics()
+    with l_metrics.stage('yaml.dump'):
+        with open(p_path, 'w', encoding='utf-8') as l_file:
+            dump(p_data, l_file, p_sort_keys)
+        l_metrics.count('bytes_written', p_path.stat().st_size)